@@ -0,0 +1,261 @@
+"""
+Сборка патчей между соседними снапшотами статистики.
+
+Для каждой пары соседних (по времени в имени) файлов
+overwolf_app/database/stats/marvel_rivals_stats_*.json пишет
+stats/patches/<from>__<to>.patch.json и индекс stats/patches/index.json.
+Десктоп (db_patches.js) по индексу находит цепочку патчей от базы, которая
+уже есть локально (скачанная или встроенная), до нужной и качает только её;
+если цепочки нет или результат не сошёлся по хэшу — скачивает файл целиком.
+
+Формат патча (JSON):
+    {"format": 2, "from": ..., "to": ..., "from_sha256": ..., "to_sha256": ..., "delta": {...}}
+delta повторяет структуру базы и содержит только изменившееся:
+    "ключ": "строка" | число | true/false/null — новое скалярное значение
+    "ключ": [значение]                         — значение целиком (списки, новые ветки)
+    "ключ": {...}                               — вложенная delta
+Служебные ключи delta: "$del" — удалённые ключи; "$key" — delta списка словарей,
+элементы которого сопоставляются по полю $key (opponents по opponent, maps по
+map_name, ...), "$order" — итоговый порядок элементов такого списка, если он
+изменился (новые элементы без $order добавляются в конец).
+Хэш считается от канонического JSON (ключи отсортированы, без пробелов,
+у процентов отброшены нули дробной части): встроенная база, которую
+build_static_bundle.py нормализует тем же normalize_numbers, хэшируется так же,
+как исходный снапшот.
+
+Запуск:
+    python build_scripts/build_db_patches.py [--stats-dir DIR] [--force]
+"""
+import os
+import re
+import json
+import glob
+import gzip
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("db_patches")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+STATS_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "database", "stats")
+
+PATCH_FORMAT = 2
+PATCHES_SUBDIR = "patches"
+INDEX_FILE = "index.json"
+SNAPSHOT_PATTERN = re.compile(r"^marvel_rivals_stats_\d{8}-\d{6}\.json$")
+# Поля, по которым элементы списков словарей сопоставляются между версиями
+LIST_KEY_FIELDS = ("opponent", "map_name", "name")
+PERCENT_RE = re.compile(r"^-?\d+\.\d+%$")
+
+
+def normalize_numbers(data):
+    """Проценты без нулей в конце дробной части: "50.00%" -> "50%", "26.460%" -> "26.46%".
+    Значение не округляется — parseFloat в logic.js получает то же число."""
+    if isinstance(data, dict):
+        return {key: normalize_numbers(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [normalize_numbers(value) for value in data]
+    if isinstance(data, str) and PERCENT_RE.match(data):
+        return data[:-1].rstrip("0").rstrip(".") + "%"
+    return data
+
+
+def canonical_json(data) -> bytes:
+    return json.dumps(normalize_numbers(data), sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def sha256(data) -> str:
+    return hashlib.sha256(canonical_json(data)).hexdigest()
+
+
+def list_key_field(items: list) -> Optional[str]:
+    """Поле-идентификатор списка словарей (уникальное у всех элементов) или None."""
+    if not items or not all(isinstance(i, dict) for i in items):
+        return None
+    for field in LIST_KEY_FIELDS:
+        keys = [i.get(field) for i in items]
+        if all(isinstance(k, str) for k in keys) and len(set(keys)) == len(keys):
+            return field
+    return None
+
+
+def _is_plain_dict(data) -> bool:
+    return isinstance(data, dict) and not any(k.startswith("$") for k in data)
+
+
+def _change(old, new):
+    """Запись delta для значения, которое отличается от old."""
+    if not isinstance(new, (dict, list)):
+        return new
+    nested = diff(old, new)
+    return nested if nested is not None else [new]
+
+
+def diff(old, new) -> Optional[Dict]:
+    """Delta, превращающая old в new, или None, если вложенная delta невозможна."""
+    if _is_plain_dict(old) and _is_plain_dict(new):
+        delta = {}
+        for key, value in new.items():
+            if key not in old:
+                delta[key] = value if not isinstance(value, (dict, list)) else [value]
+            elif old[key] != value:
+                delta[key] = _change(old[key], value)
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta["$del"] = removed
+        return delta
+
+    if isinstance(old, list) and isinstance(new, list):
+        field = list_key_field(old)
+        if not field or field != list_key_field(new):
+            return None
+        old_items = {item[field]: item for item in old}
+        new_keys = [item[field] for item in new]
+        new_key_set = set(new_keys)
+        delta = {"$key": field}
+        for item in new:
+            key = item[field]
+            if key not in old_items:
+                delta[key] = [item]
+            elif old_items[key] != item:
+                delta[key] = _change(old_items[key], item)
+        removed = [key for key in old_items if key not in new_key_set]
+        if removed:
+            delta["$del"] = removed
+        kept = [item[field] for item in old if item[field] in new_key_set]
+        if kept + [k for k in new_keys if k not in old_items] != new_keys:
+            delta["$order"] = new_keys
+        return delta
+
+    return None
+
+
+def _apply_value(current, change):
+    if isinstance(change, list):
+        return change[0]
+    if isinstance(change, dict):
+        return apply_delta(current, change)
+    return change
+
+
+def apply_delta(data, delta: Dict):
+    """Применить delta к объекту базы (на месте) и вернуть его."""
+    if "$key" in delta:
+        field = delta["$key"]
+        removed = set(delta.get("$del", []))
+        items = [item for item in data if item.get(field) not in removed]
+        by_key = {item[field]: i for i, item in enumerate(items)}
+        for key, change in delta.items():
+            if key.startswith("$"):
+                continue
+            if key in by_key:
+                items[by_key[key]] = _apply_value(items[by_key[key]], change)
+            else:
+                items.append(_apply_value(None, change))
+        if "$order" in delta:
+            by_key = {item[field]: item for item in items}
+            items = [by_key[key] for key in delta["$order"]]
+        data[:] = items
+        return data
+
+    for key in delta.get("$del", []):
+        data.pop(key, None)
+    for key, change in delta.items():
+        if not key.startswith("$"):
+            data[key] = _apply_value(data.get(key), change)
+    return data
+
+
+def apply_patch(data, patch: Dict):
+    """Применить патч к объекту базы (на месте) и вернуть его."""
+    return apply_delta(data, patch["delta"])
+
+
+def snapshot_files(stats_dir: str) -> List[str]:
+    """Имена снапшотов по возрастанию времени (время зашито в имя)."""
+    names = [os.path.basename(p) for p in glob.glob(os.path.join(stats_dir, "*.json"))]
+    return sorted(n for n in names if SNAPSHOT_PATTERN.match(n))
+
+
+def _load(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_patch(old_name: str, old, new_name: str, new) -> Tuple[Dict, bytes]:
+    patch = {
+        "format": PATCH_FORMAT,
+        "from": old_name,
+        "to": new_name,
+        "from_sha256": sha256(old),
+        "to_sha256": sha256(new),
+        "delta": diff(old, new),
+    }
+    if patch["delta"] is None:
+        raise ValueError(f"Снапшот {new_name}: корень базы должен быть словарём без ключей на '$'")
+    # Проверка: патч обязан давать ровно новую версию
+    if sha256(apply_patch(json.loads(json.dumps(old)), patch)) != patch["to_sha256"]:
+        raise RuntimeError(f"Патч {old_name} -> {new_name} не воспроизводит целевой файл")
+    return patch, json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_patches(stats_dir: str = STATS_DIR, force: bool = False) -> Dict:
+    """Собрать недостающие патчи и переписать индекс. Возвращает индекс."""
+    patches_dir = os.path.join(stats_dir, PATCHES_SUBDIR)
+    os.makedirs(patches_dir, exist_ok=True)
+    names = snapshot_files(stats_dir)
+    entries = []
+
+    for old_name, new_name in zip(names, names[1:]):
+        patch_name = f"{old_name[:-5]}__{new_name[:-5]}.patch.json"
+        patch_path = os.path.join(patches_dir, patch_name)
+        new_path = os.path.join(stats_dir, new_name)
+        full_size = os.path.getsize(new_path)
+
+        patch = _load(patch_path) if os.path.exists(patch_path) and not force else None
+        if patch and patch.get("format") == PATCH_FORMAT:
+            size = os.path.getsize(patch_path)
+        else:
+            old, new = _load(os.path.join(stats_dir, old_name)), _load(new_path)
+            patch, payload = build_patch(old_name, old, new_name, new)
+            size = len(payload)
+            # Сравниваем то, что реально идёт по сети: GitHub отдаёт JSON сжатым
+            with open(new_path, "rb") as f:
+                full_gz = len(gzip.compress(f.read(), 9))
+            patch_gz = len(gzip.compress(payload, 9))
+            if patch_gz >= full_gz:
+                logger.info(f"Патч {old_name} -> {new_name} не меньше полного файла "
+                            f"(gzip {patch_gz} >= {full_gz} байт), пропускаем")
+                if os.path.exists(patch_path):
+                    os.remove(patch_path)
+                continue
+            with open(patch_path, "wb") as f:
+                f.write(payload)
+            logger.info(f"Патч {patch_name}: {size} байт, gzip {patch_gz} (полный файл {full_size}, gzip {full_gz})")
+
+        entries.append({
+            "from": old_name, "to": new_name, "file": patch_name, "size": size,
+            "full_size": full_size, "from_sha256": patch["from_sha256"], "to_sha256": patch["to_sha256"],
+        })
+
+    index = {"format": PATCH_FORMAT, "patches": entries}
+    with open(os.path.join(patches_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    logger.info(f"Индекс патчей обновлён: {len(entries)} шт.")
+    return index
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Патчи между соседними снапшотами статистики")
+    parser.add_argument("--stats-dir", default=STATS_DIR, help="Папка со снапшотами marvel_rivals_stats_*.json")
+    parser.add_argument("--force", action="store_true", help="Пересобрать уже существующие патчи")
+    args = parser.parse_args()
+    build_patches(args.stats_dir, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Инкрементальная сборка эталонных эмбеддингов героев.
+
+Хэширует каждую иконку в overwolf_app/resources/heroes_icons и ведёт
+manifest.json рядом с эмбеддингами. Через модель прогоняются только новые
+или изменённые иконки (все варианты паддинга одним батчем), удалённые
+иконки вычищаются, затем собирается сводная матрица references.npz,
+которую StagedRecognizer грузит одним файлом.
+
+Каждый вариант считается в нескольких масштабах (EMBEDDING_SCALES): иконка
+уменьшается до размера портрета на экране этой высоты, как при захвате.
+Распознаватель берёт эталоны масштаба, ближайшего к разрешению экрана.
+
+Полная пересборка происходит сама, если сменилась модель, набор вариантов
+паддинга или масштабов, либо по флагу --full.
+
+    python build_scripts/build_embeddings.py
+    python build_scripts/build_embeddings.py --full
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "tests"))
+
+import numpy as np
+from PIL import Image
+
+from recognition_common import (
+    MODEL_PATH, EMBEDDINGS_DIR, REFERENCES_FILE, REFERENCE_HEIGHT, EMBEDDING_SCALES, plan_windows,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler("build_embeddings.log", encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger("build_embeddings")
+
+ICONS_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "resources", "heroes_icons")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+# Варианты эталона: доля стороны иконки, добавляемая полями с каждой стороны.
+# На экране драфта портрет попадает в окно со смещением, поэтому кроме
+# самой иконки храним чуть «отодвинутые» версии. Значения подобраны вручную,
+# а не выведены из STEP_SIZE: при шаге в 1/4 окна портрет смещён не больше
+# чем на 1/8 окна, и 0.08/0.16 берут это смещение в вилку. При смене
+# STEP_SIZE или HERO_SQUARE_SIZE варианты стоит пересмотреть — список
+# хранится в манифесте, и его изменение пересобирает все эталоны.
+PADDING_VARIANTS = (0.0, 0.08, 0.16)
+PADDING_COLOR = (0, 0, 0)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def model_signature(model_path):
+    st = os.stat(model_path)
+    return f"{os.path.basename(model_path)}|{st.st_size}|{int(st.st_mtime)}"
+
+
+def padded_variants(image, variants=PADDING_VARIANTS):
+    """Иконка на квадратном холсте с полями для каждого варианта паддинга."""
+    image = image.convert("RGB")
+    side = max(image.size)
+    out = []
+    for pad in variants:
+        margin = int(round(side * pad))
+        canvas = Image.new("RGB", (side + 2 * margin, side + 2 * margin), PADDING_COLOR)
+        canvas.paste(image, (margin + (side - image.width) // 2, margin + (side - image.height) // 2))
+        out.append(canvas)
+    return out
+
+
+def scaled_variants(image, variants=PADDING_VARIANTS, scales=EMBEDDING_SCALES):
+    """Варианты паддинга, уменьшенные до размера портрета на каждой высоте экрана.
+    Порядок строк: масштаб, затем вариант паддинга."""
+    padded = padded_variants(image, variants)
+    out = []
+    for height in scales:
+        side = plan_windows(height * 16 // 9, height)["window"]
+        out.extend(tile.resize((side, side), Image.LANCZOS) for tile in padded)
+    return out
+
+
+def row_scales(rows):
+    """Масштаб каждой строки файла эталонов (раскладка scaled_variants)."""
+    per_scale = len(PADDING_VARIANTS)
+    if rows != per_scale * len(EMBEDDING_SCALES):
+        return np.full(rows, REFERENCE_HEIGHT, dtype=np.int64)  # эталоны без масштабов
+    return np.repeat(np.array(EMBEDDING_SCALES, dtype=np.int64), per_scale)
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Манифест повреждён ({e}) — полная пересборка")
+        return {}
+
+
+def write_atomic(path, writer, mode="wb"):
+    """writer(f) пишет во временный файл, который затем атомарно подменяет path."""
+    tmp = f"{path}.tmp"
+    with open(tmp, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        writer(f)
+    os.replace(tmp, path)
+
+
+def plan(icons, manifest, signature, out_dir, full=False):
+    """(что пересчитать, что удалить) по хэшам иконок и манифесту."""
+    config_changed = (manifest.get("version") != MANIFEST_VERSION
+                      or manifest.get("model") != signature
+                      or manifest.get("variants") != list(PADDING_VARIANTS)
+                      or manifest.get("scales") != list(EMBEDDING_SCALES))
+    known = {} if (full or config_changed) else manifest.get("icons", {})
+    changed = [name for name, digest in icons.items()
+               if known.get(name) != digest
+               or not os.path.exists(os.path.join(out_dir, f"{os.path.splitext(name)[0]}.npy"))]
+    removed = [name for name in manifest.get("icons", {}) if name not in icons]
+    return sorted(changed), sorted(removed), config_changed
+
+
+def consolidate(out_dir):
+    """Склеивает все <герой>.npy в одну матрицу references.npz."""
+    names, rows, scales = [], [], []
+    for fname in sorted(os.listdir(out_dir)):
+        if not fname.endswith(".npy"):
+            continue
+        vec = np.load(os.path.join(out_dir, fname)).astype(np.float32)
+        vec = vec.reshape(-1, vec.shape[-1])
+        rows.append(vec)
+        scales.append(row_scales(len(vec)))
+        names.extend([os.path.splitext(fname)[0]] * len(vec))
+    vectors = np.concatenate(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+    scales = np.concatenate(scales) if scales else np.zeros(0, dtype=np.int64)
+
+    write_atomic(os.path.join(out_dir, REFERENCES_FILE),
+                 lambda f: np.savez(f, vectors=vectors, names=np.array(names), scales=scales))
+    return vectors.shape
+
+
+def main(full=False, icons_dir=ICONS_DIR, out_dir=EMBEDDINGS_DIR, model_path=MODEL_PATH, batch_size=None):
+    if not os.path.exists(model_path):
+        logger.error(f"Модель не найдена: {model_path}")
+        return 1
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    signature = model_signature(model_path)
+
+    icons = {f: file_sha256(os.path.join(icons_dir, f))
+             for f in sorted(os.listdir(icons_dir)) if f.lower().endswith(".png")}
+    changed, removed, config_changed = plan(icons, manifest, signature, out_dir, full)
+    if config_changed and manifest:
+        logger.info("Сменилась модель или варианты паддинга — пересчитываем все иконки")
+    logger.info(f"Иконок: {len(icons)}, к пересчёту: {len(changed)}, удалено: {len(removed)}")
+
+    for name in removed:
+        path = os.path.join(out_dir, f"{os.path.splitext(name)[0]}.npy")
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Удалён эталон: {os.path.basename(path)}")
+
+    if changed:
+        from recognition_pipeline import StagedRecognizer
+        recognizer = StagedRecognizer(model_path=model_path, batch_size=batch_size)
+        if not recognizer.load_model():
+            return 1
+        t = time.perf_counter()
+        tiles = []
+        for name in changed:
+            with Image.open(os.path.join(icons_dir, name)) as img:
+                tiles.extend(scaled_variants(img))
+        # Тензор NCHW готовится по batch_size тайлов, а не сразу на все иконки:
+        # при полной пересборке он занял бы сотни мегабайт
+        step = recognizer.batch_size
+        embeddings = np.concatenate([recognizer.infer(recognizer.prepare(tiles[start:start + step]))
+                                     for start in range(0, len(tiles), step)])
+        per_icon = len(PADDING_VARIANTS) * len(EMBEDDING_SCALES)
+        for i, name in enumerate(changed):
+            path = os.path.join(out_dir, f"{os.path.splitext(name)[0]}.npy")
+            block = embeddings[i * per_icon:(i + 1) * per_icon]
+            write_atomic(path, lambda f: np.save(f, block))
+            logger.info(f"Эталон обновлён: {os.path.basename(path)} ({per_icon} вариантов)")
+        logger.info(f"Эмбеддинги посчитаны за {time.perf_counter() - t:.2f} с")
+
+    shape = consolidate(out_dir)
+    logger.info(f"Сводная матрица: {REFERENCES_FILE} {shape}")
+
+    new_manifest = {
+        "version": MANIFEST_VERSION,
+        "model": signature,
+        "variants": list(PADDING_VARIANTS),
+        "scales": list(EMBEDDING_SCALES),
+        "icons": icons,
+    }
+    write_atomic(manifest_path, lambda f: json.dump(new_manifest, f, indent=2), mode="w")
+    logger.info("=== ГОТОВО ===")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Инкрементальная сборка эталонных эмбеддингов иконок героев")
+    parser.add_argument("--full", action="store_true", help="пересчитать все иконки, игнорируя манифест")
+    parser.add_argument("--icons", default=ICONS_DIR, help="папка с иконками героев")
+    parser.add_argument("--output", default=EMBEDDINGS_DIR, help="папка эмбеддингов")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    sys.exit(main(full=args.full, icons_dir=args.icons, out_dir=args.output,
+                  model_path=args.model, batch_size=args.batch_size))
@@ -0,0 +1,80 @@
+"""
+Сборка атласа иконок героев.
+
+Все overwolf_app/resources/heroes_icons/*.png укладываются сеткой в одну
+картинку resources/atlas/heroes.webp, рядом — индекс resources/atlas/heroes.json:
+    {"version": 1, "image": "heroes.webp", "cell": 96, "columns": 8, "rows": 7,
+     "icons": {"adam_warlock": [0, 0], "angela": [1, 0], ...}}
+Ключ — имя файла без расширения, то есть результат CounterpickLogic.heroIconName;
+значение — [колонка, строка] в сетке. hero_atlas.js рисует портрет как
+фон с background-size/position в процентах, поэтому один атлас подходит
+для всех размеров иконок в интерфейсе (22-48 CSS px).
+
+Размер ячейки — как у иконок в build_static_bundle.py (48 CSS px x2 для HiDPI).
+
+Запуск:
+    python build_scripts/build_icon_atlas.py [--icons-dir DIR] [--out-dir DIR]
+"""
+import os
+import sys
+import json
+import math
+import logging
+from typing import Dict
+
+from PIL import Image
+
+from build_static_bundle import HERO_ICON_SIZE, encode_webp
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("icon_atlas")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+ICONS_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "resources", "heroes_icons")
+ATLAS_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "resources", "atlas")
+ATLAS_NAME = "heroes"
+
+
+def build_atlas(icons_dir: str = ICONS_DIR, out_dir: str = ATLAS_DIR, cell: int = HERO_ICON_SIZE) -> Dict:
+    """Собрать атлас и индекс; возвращает индекс."""
+    names = sorted(os.path.splitext(f)[0] for f in os.listdir(icons_dir) if f.lower().endswith(".png"))
+    if not names:
+        raise RuntimeError(f"В {icons_dir} нет иконок .png")
+
+    columns = math.ceil(math.sqrt(len(names)))
+    rows = math.ceil(len(names) / columns)
+    atlas = Image.new("RGBA", (columns * cell, rows * cell), (0, 0, 0, 0))
+    icons = {}
+    for i, name in enumerate(names):
+        col, row = i % columns, i // columns
+        with Image.open(os.path.join(icons_dir, name + ".png")) as image:
+            icon = image.convert("RGBA").resize((cell, cell), Image.LANCZOS)
+        atlas.paste(icon, (col * cell, row * cell))
+        icons[name] = [col, row]
+
+    os.makedirs(out_dir, exist_ok=True)
+    image_name = ATLAS_NAME + ".webp"
+    payload = encode_webp(atlas)
+    with open(os.path.join(out_dir, image_name), "wb") as f:
+        f.write(payload)
+
+    index = {"version": 1, "image": image_name, "cell": cell, "columns": columns, "rows": rows, "icons": icons}
+    with open(os.path.join(out_dir, ATLAS_NAME + ".json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    logger.info(f"Атлас {image_name}: {len(names)} иконок, сетка {columns}x{rows} по {cell}px, {len(payload)} байт")
+    return index
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Атлас иконок героев для интерфейса оверлея")
+    parser.add_argument("--icons-dir", default=ICONS_DIR, help="Папка с иконками героев .png")
+    parser.add_argument("--out-dir", default=ATLAS_DIR, help="Куда положить heroes.webp и heroes.json")
+    args = parser.parse_args()
+    build_atlas(args.icons_dir, args.out_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
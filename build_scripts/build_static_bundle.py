@@ -0,0 +1,190 @@
+"""
+Сборка оптимизированных статических ресурсов оверлея.
+
+Что делает (по всем файлам параллельно, процессами):
+  * JSON из overwolf_app/database — минифицирует (без отступов) и нормализует
+    проценты: "50.00%" -> "50%", "26.460%" -> "26.46%" — только отбрасывает
+    нули, без округления (значение для parseFloat в logic.js не меняется);
+    рядом кладёт .gz и .br. Хэш патчей build_db_patches.py считается от той
+    же нормализованной формы, поэтому встроенная база сходится с цепочкой
+    патчей. Сами патчи stats/patches только минифицируются;
+  * иконки героев resources/heroes_icons — уменьшает до отображаемого размера
+    (самая крупная иконка в интерфейсе 48 CSS px, x2 для HiDPI) и пишет WebP;
+  * арты карт resources/maps — без увеличения, WebP или квантованный PNG,
+    что меньше;
+  * asset-manifest.json: для каждого файла SHA-256 содержимого, размер,
+    исходник и сжатые варианты.
+
+Результат воспроизводим: одинаковые исходники дают побайтно одинаковый
+результат (gzip без времени/имени, фиксированные параметры кодеков,
+отсортированный манифест). Brotli нужен пакет brotli; без него .br не пишутся.
+
+Запуск:
+    python build_scripts/build_static_bundle.py [--out DIR] [--workers N]
+"""
+import os
+import io
+import sys
+import json
+import gzip
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from build_db_patches import normalize_numbers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("static_bundle")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+APP_DIR = os.path.join(PROJECT_ROOT, "overwolf_app")
+OUT_DIR = os.path.join(PROJECT_ROOT, "build", "static_bundle")
+MANIFEST_FILE = "asset-manifest.json"
+
+# Иконка героя: 48 CSS px (teamup-main в десктопе) x2 для HiDPI
+HERO_ICON_SIZE = 96
+# Плашка карты в трее ~120x75 CSS px; исходники 125x52 — только не увеличиваем
+MAP_MAX_SIZE = (250, 150)
+WEBP_QUALITY = 85
+PNG_COLORS = 128
+# Сжатые варианты имеют смысл только для текстовых ресурсов
+COMPRESS_MIN_BYTES = 512
+
+def minify_json(raw: bytes, normalize: bool = True) -> bytes:
+    data = json.loads(raw.decode("utf-8"))
+    if normalize:
+        data = normalize_numbers(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_webp(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+    return buf.getvalue()
+
+
+def encode_quantized_png(image: Image.Image) -> bytes:
+    rgba = image.convert("RGBA")
+    quantized = rgba.quantize(colors=PNG_COLORS, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    buf = io.BytesIO()
+    quantized.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def resize_to_fit(image: Image.Image, max_size: Tuple[int, int]) -> Image.Image:
+    width, height = image.size
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    if scale >= 1.0:
+        return image
+    return image.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+
+
+def gzip_bytes(payload: bytes) -> bytes:
+    # mtime=0 и без имени файла — иначе .gz меняется от сборки к сборке
+    return gzip.compress(payload, compresslevel=9, mtime=0)
+
+
+def _write(out_dir: str, rel_path: str, payload: bytes) -> Dict:
+    path = os.path.join(out_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(payload)
+    return {"path": rel_path.replace(os.sep, "/"), "size": len(payload)}
+
+
+def process_asset(task: Tuple[str, str, str]) -> Dict:
+    """Обработать один исходник; возвращает запись манифеста."""
+    kind, rel_src, out_dir = task
+    src = os.path.join(APP_DIR, rel_src)
+    with open(src, "rb") as f:
+        raw = f.read()
+
+    if kind == "json":
+        is_patch = os.path.basename(os.path.dirname(rel_src)) == "patches"
+        rel_out, payload = rel_src, minify_json(raw, normalize=not is_patch)
+    elif kind == "hero_icon":
+        with Image.open(src) as image:
+            icon = image.convert("RGBA").resize((HERO_ICON_SIZE, HERO_ICON_SIZE), Image.LANCZOS)
+        rel_out, payload = os.path.splitext(rel_src)[0] + ".webp", encode_webp(icon)
+    elif kind == "map":
+        with Image.open(src) as image:
+            art = resize_to_fit(image.convert("RGBA"), MAP_MAX_SIZE)
+        candidates = [(".webp", encode_webp(art)), (".png", encode_quantized_png(art))]
+        ext, payload = min(candidates, key=lambda c: len(c[1]))
+        rel_out = os.path.splitext(rel_src)[0] + ext
+    else:
+        raise ValueError(f"Неизвестный тип ресурса: {kind}")
+
+    entry = _write(out_dir, rel_out, payload)
+    entry.update({
+        "source": rel_src.replace(os.sep, "/"),
+        "source_size": len(raw),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "encodings": {},
+    })
+    if kind == "json" and len(payload) >= COMPRESS_MIN_BYTES:
+        entry["encodings"]["gzip"] = _write(out_dir, rel_out + ".gz", gzip_bytes(payload))
+        if brotli is not None:
+            entry["encodings"]["br"] = _write(out_dir, rel_out + ".br", brotli.compress(payload, quality=11))
+    return entry
+
+
+def collect_tasks(app_dir: str = APP_DIR) -> List[Tuple[str, str]]:
+    """(тип, путь относительно overwolf_app) для всех исходников, в стабильном порядке."""
+    tasks = []
+    sources = (
+        ("json", "database", (".json",)),
+        ("hero_icon", os.path.join("resources", "heroes_icons"), (".png",)),
+        ("map", os.path.join("resources", "maps"), (".png", ".jpg", ".jpeg")),
+    )
+    for kind, rel_dir, exts in sources:
+        for root, _dirs, files in os.walk(os.path.join(app_dir, rel_dir)):
+            for name in files:
+                if name.lower().endswith(exts):
+                    tasks.append((kind, os.path.relpath(os.path.join(root, name), app_dir)))
+    return sorted(tasks, key=lambda t: t[1])
+
+
+def build_bundle(out_dir: str = OUT_DIR, workers: Optional[int] = None) -> Dict:
+    tasks = [(kind, rel, out_dir) for kind, rel in collect_tasks()]
+    logger.info(f"Ресурсов к обработке: {len(tasks)}, процессов: {workers or os.cpu_count()}")
+    if brotli is None:
+        logger.warning("Пакет brotli не установлен — .br не будут собраны (pip install brotli)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(process_asset, tasks, chunksize=4))
+
+    files = {entry.pop("path"): entry for entry in entries}
+    manifest = {"version": 1, "files": dict(sorted(files.items()))}
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+    source_total = sum(e["source_size"] for e in entries)
+    out_total = sum(e["size"] for e in entries)
+    gz_total = sum(e["encodings"].get("gzip", {"size": e["size"]})["size"] for e in entries)
+    logger.info(f"Готово: {source_total} -> {out_total} байт (с учётом gzip {gz_total}), манифест {MANIFEST_FILE}")
+    return manifest
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Минифицированные и сжатые статические ресурсы оверлея")
+    parser.add_argument("--out", default=OUT_DIR, help="Папка результата")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию — все ядра)")
+    args = parser.parse_args()
+    build_bundle(args.out, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
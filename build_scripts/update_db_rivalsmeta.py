@@ -566,6 +566,12 @@ def main(season="1"):
         saved_path = save_to_json(all_data)
         filename = os.path.basename(saved_path)
         write_latest_index(filename)
+        try:
+            from build_db_patches import build_patches
+            build_patches(os.path.dirname(saved_path))
+        except Exception as e:
+            # Без патчей десктоп просто скачает файл целиком
+            logger.warning(f"Патчи между снапшотами не собраны: {e}")
         logger.info("=== ГОТОВО ===")
         
     except Exception as e:
@@ -1,38 +1,8 @@
 // === КАСТОМНЫЙ ЛОГГЕР ДЛЯ ВКЛАДКИ "ЛОГИ" ===
-window.appLogs =[];
+// Общий журнал всех окон (log_store.js); окна пишут в него через bgWindow.appLogStore
+window.appLogStore = new LogRing(1000);
 window.__appLoggerInstalled = true;
-const origLog = console.log;
-const origWarn = console.warn;
-const origError = console.error;
-
-function formatLog(type, args) {
-    let parsedArgs = Array.from(args).map(arg => {
-        if (typeof arg === 'object') {
-            try {
-                return JSON.stringify(arg);
-            } catch(e) {
-                return String(arg);
-            }
-        }
-        return String(arg);
-    });
-    let msg = `[${new Date().toLocaleTimeString()}] [${type}] ` + parsedArgs.join(' ');
-    window.appLogs.push(msg);
-    if (window.appLogs.length > 1000) window.appLogs.shift();
-}
-
-console.log = function() { formatLog('INFO', arguments); origLog.apply(console, arguments); };
-console.warn = function() { formatLog('WARN', arguments); origWarn.apply(console, arguments); };
-console.error = function() { formatLog('ERROR', arguments); origError.apply(console, arguments); };
-
-window.addEventListener('error', function(ev) {
-    formatLog('JS_ERROR', [`${ev.message} @ ${ev.filename}:${ev.lineno}:${ev.colno}`]);
-});
-window.addEventListener('unhandledrejection', function(ev) {
-    let reason = ev.reason;
-    let msg = (reason && reason.stack) ? reason.stack : (reason && reason.message ? reason.message : String(reason));
-    formatLog('PROMISE_REJECT', [msg]);
-});
+LogRing.captureConsole(window.appLogStore, window);
 
 // === СТАТУС ПОДКЛЮЧЕНИЯ К OVERWOLF ===
 window.overwolfStatus = {
@@ -162,7 +132,7 @@ function setupGameEventsListenersOnce() {
                 console.log("[EVENT] Обновление банов через onInfoUpdates2:", mi.banned_characters);
             }
         }
-        if (updateStateFromInfo(info.info)) processGameData();
+        if (updateStateFromInfo(info.info)) scheduleProcessGameData();
     });
 
     overwolf.games.events.onNewEvents.addListener(function(events) {
@@ -186,7 +156,7 @@ function startInfoPolling() {
     infoPollInterval = setInterval(function() {
         if (!window.overwolfStatus.gameEventsSubscribed) return;
         overwolf.games.events.getInfo(function(info) {
-            if (info && info.res && updateStateFromInfo(info.res)) processGameData();
+            if (info && info.res && updateStateFromInfo(info.res)) scheduleProcessGameData();
             if (info && info.error) {
                 let errStr = String(info.error);
                 if (lastPollError !== errStr) {
@@ -250,6 +220,76 @@ function setupGameEvents() {
     });
 }
 
+// === ДВИЖОК В WEB WORKER ===
+// Пересчёт для трея выполняет logic.worker.js; здесь остаётся копия движка для
+// синхронных вызовов из окон (нормализация имён, тир-лист в десктопе).
+// Если воркер не создаётся или падает — считаем по-старому, в этом потоке.
+let logicWorker = null;
+
+// Вызывается при загрузке скрипта: путь к воркеру берётся от background.js, а не от
+// страницы (в отладке background.js подключается из debug/desktop-debug.html)
+function startLogicWorker() {
+    if (typeof Worker === 'undefined') return null;
+    let client;
+    try {
+        let script = document.currentScript;
+        let url = new URL('logic.worker.js', script && script.src ? script.src : location.href).href;
+        client = { worker: new Worker(url), pending: new Map(), nextId: 1, generation: null };
+    } catch (e) {
+        console.warn("[WORKER] Не удалось запустить logic.worker.js, считаем в фоновом окне:", e);
+        return null;
+    }
+    client.worker.onmessage = function(event) {
+        let msg = event.data;
+        let request = client.pending.get(msg.id);
+        if (!request) return;
+        client.pending.delete(msg.id);
+        if (msg.error) request.reject(new Error(msg.error));
+        else request.resolve(msg.result);
+    };
+    client.worker.onerror = function(event) {
+        console.error("[WORKER] Ошибка logic.worker.js, переключаемся на пересчёт в фоновом окне:", event.message || event);
+        if (logicWorker === client) logicWorker = null;
+        client.worker.terminate();
+        for (let request of client.pending.values()) request.reject(new Error("logic.worker.js остановлен"));
+        client.pending.clear();
+    };
+    return client;
+}
+
+function logicWorkerRequest(client, message) {
+    return new Promise(function(resolve, reject) {
+        message.id = client.nextId++;
+        client.pending.set(message.id, { resolve: resolve, reject: reject });
+        client.worker.postMessage(message);
+    });
+}
+
+// Promise с { scores, optimalTeam }. База пересылается в воркер при первом запросе
+// после каждой (пере)загрузки в marvelLogic — например, после смены БД в десктопе.
+function computeMatchResult(logic, enemies, allies, banned, mapName) {
+    let client = logicWorker;
+    if (!client) return Promise.resolve(logic.computeMatchResult(enemies, allies, banned, mapName));
+    if (client.generation !== logic.loadGeneration) {
+        client.generation = logic.loadGeneration;
+        logicWorkerRequest(client, {
+            type: 'load',
+            data: { heroes: logic.statsData, teamups: logic.teamupsData },
+            gameEntities: logic.gameEntities,
+            dbVersion: logic.dbVersion
+        }).then(function(info) {
+            console.log("[WORKER] База передана в воркер:", info.dbVersion, "героев:", info.heroes);
+        }, function() {});
+    }
+    return logicWorkerRequest(client, { type: 'compute', enemies: enemies, allies: allies, banned: banned, map: mapName })
+        .catch(function(e) {
+            if (logicWorker) throw e;
+            return logic.computeMatchResult(enemies, allies, banned, mapName);
+        });
+}
+
+logicWorker = startLogicWorker();
+
 window.marvelLogic = new CounterpickLogic();
 window.latestData = {
     map: null,
@@ -263,6 +303,8 @@ window.latestData = {
 
 let matchState = { 
     rosters: {}, 
+    // Сырые строки roster_* как пришли от Overwolf: совпадение строки — без JSON.parse/stringify
+    rawRosters: {},
     map: null, 
     matchId: null,
     bannedCharacters:[],
@@ -348,8 +390,10 @@ function updateStateFromInfo(info) {
         changed = true;
         if (mi.map === null || mi.map === "null" || mi.map === "") {
             matchState.rosters = {};
+            matchState.rawRosters = {};
             matchState.bannedCharacters =[];
             matchState.lastProcessedBans = null;
+            matchState.lastRawBans = null;
             console.log("[MATCH_STATE] Карта сброшена, очищаем ростеры и баны.");
         }
     }
@@ -357,19 +401,23 @@ function updateStateFromInfo(info) {
     if (mi.hasOwnProperty('banned_characters')) {
         let rawBans = mi.banned_characters;
         
-        if (matchState.lastRawBans !== JSON.stringify(rawBans)) {
+        let rawBansStr = JSON.stringify(rawBans);
+
+        // Поллинг и повторные onInfoUpdates2 присылают те же сырые баны —
+        // парсить и сравнивать их заново незачем.
+        if (matchState.lastRawBans !== rawBansStr) {
             console.log("[RAW_BANS] Изменение сырых данных banned_characters:", rawBans);
-            matchState.lastRawBans = JSON.stringify(rawBans);
-        }
+            matchState.lastRawBans = rawBansStr;
 
-        let parsed = parseBannedCharacters(rawBans);
-        let newBansStr = JSON.stringify(parsed);
-        let oldBansStr = JSON.stringify(matchState.bannedCharacters);
-        
-        if (newBansStr !== oldBansStr) {
-            matchState.bannedCharacters = parsed;
-            changed = true;
-            console.log("[MATCH_STATE] Список банов успешно обновлен:", newBansStr);
+            let parsed = parseBannedCharacters(rawBans);
+            let newBansStr = JSON.stringify(parsed);
+            let oldBansStr = JSON.stringify(matchState.bannedCharacters);
+
+            if (newBansStr !== oldBansStr) {
+                matchState.bannedCharacters = parsed;
+                changed = true;
+                console.log("[MATCH_STATE] Список банов успешно обновлен:", newBansStr);
+            }
         }
     }
 
@@ -381,9 +429,13 @@ function updateStateFromInfo(info) {
                 // достоверный состав, иначе союзники/враги частично исчезают из трея.
                 // Сброс ростеров происходит только при смене карты/матча (match_id).
                 console.log(`[DIAG] roster '${key}' пришёл пустым (null/""), оставляем старое значение. match_id=${matchState.matchId}`);
+            } else if (typeof val === 'string' && matchState.rawRosters[key] === val) {
+                // Та же строка, что и в прошлый раз — ростер не изменился
+                continue;
             } else {
                 try {
                     let parsedVal = typeof val === 'string' ? JSON.parse(val) : val;
+                    if (typeof val === 'string') matchState.rawRosters[key] = val;
                     if (JSON.stringify(matchState.rosters[key]) !== JSON.stringify(parsedVal)) {
                         matchState.rosters[key] = parsedVal;
                         changed = true;
@@ -407,10 +459,13 @@ function clearTrayForNewMatch(newMatchId) {
 
     console.log(`[MATCH] НАЧАЛО НОВОГО МАТЧА (${newMatchId}) — очищаем трей 1 раз.`);
     matchState.rosters = {};
+    matchState.rawRosters = {};
     matchState.map = null;
     matchState.bannedCharacters = [];
     matchState.lastProcessedBans = null;
     matchState.lastRawBans = null;
+    // Ответ воркера по прошлому матчу не должен вернуть старые данные в трей
+    processGameDataSeq++;
 
     window.latestData = {
         map: null,
@@ -424,6 +479,32 @@ function clearTrayForNewMatch(newMatchId) {
     sendMessageLogged("in_game", "update_data", window.latestData);
 }
 
+// === ПЛАНИРОВЩИК ПЕРЕСЧЁТА ===
+// GEP присылает изменения пачками (10+ roster_* подряд в фазе выбора, баны,
+// поллинг). Пересчёт откладывается, пока события идут чаще RECOMPUTE_COALESCE_MS,
+// но не дольше RECOMPUTE_MAX_WAIT_MS от первого изменения в пачке — трей не
+// «замирает» при непрерывном потоке.
+const RECOMPUTE_COALESCE_MS = 50;
+const RECOMPUTE_MAX_WAIT_MS = 250;
+let recomputeTimer = null;
+let recomputeFirstRequestAt = 0;
+// Номер последнего запроса пересчёта: ответ на устаревший запрос отбрасывается
+let processGameDataSeq = 0;
+
+function scheduleProcessGameData() {
+    let now = Date.now();
+    if (recomputeTimer) {
+        clearTimeout(recomputeTimer);
+    } else {
+        recomputeFirstRequestAt = now;
+    }
+    let wait = Math.max(0, Math.min(RECOMPUTE_COALESCE_MS, recomputeFirstRequestAt + RECOMPUTE_MAX_WAIT_MS - now));
+    recomputeTimer = setTimeout(function() {
+        recomputeTimer = null;
+        processGameData();
+    }, wait);
+}
+
 function processGameData() {
     try {
         if (!window.marvelLogic.isReady) return;
@@ -504,30 +585,35 @@ function processGameData() {
         }
 
         let activeEnemies = enemyHeroes.filter(h => !bannedHeroes.includes(h));
-        
-        let result;
-        if (activeEnemies.length === 0) {
-            let tierScores = window.marvelLogic.calculateTierListScoresWithMap(finalMapName);
-            result = { 
-                scores: tierScores, 
-                optimalTeam: allyHeroes.length > 0 ? window.marvelLogic.getRecommendedHeroes(tierScores, allyHeroes, bannedHeroes) :[]
+
+        // Результат зависит только от состава (не от порядка слотов), банов, карты и базы
+        let logic = window.marvelLogic;
+        let sortedEnemies = activeEnemies.slice().sort();
+        let cacheKey = JSON.stringify([
+            sortedEnemies, allyHeroes.slice().sort(), bannedHeroes.slice().sort(),
+            finalMapName, logic.dbVersion
+        ]);
+        let seq = ++processGameDataSeq;
+        let pending = logic.cachedResult(cacheKey, function() {
+            return computeMatchResult(logic, sortedEnemies, allyHeroes, bannedHeroes, finalMapName);
+        });
+
+        pending.then(function(result) {
+            if (seq !== processGameDataSeq) return;
+            window.latestData = {
+                map: finalMapName,
+                is_map_effective: isMapEffective,
+                enemy_heroes: enemyHeroes,
+                ally_heroes: allyHeroes,
+                banned_heroes: bannedHeroes,
+                counter_scores: result.scores,
+                effective_team: result.optimalTeam
             };
-        } else {
-            result = window.marvelLogic.calculateCounterScoresForTeam(activeEnemies, finalMapName);
-            result.optimalTeam = allyHeroes.length > 0 ? window.marvelLogic.getRecommendedHeroes(result.scores, allyHeroes, bannedHeroes) :[];
-        }
 
-        window.latestData = {
-            map: finalMapName,
-            is_map_effective: isMapEffective,
-            enemy_heroes: enemyHeroes,
-            ally_heroes: allyHeroes,
-            banned_heroes: bannedHeroes,
-            counter_scores: result.scores,
-            effective_team: result.optimalTeam
-        };
-
-        sendMessageLogged("in_game", "update_data", window.latestData);
+            sendMessageLogged("in_game", "update_data", window.latestData);
+        }).catch(function(e) {
+            console.error("Ошибка пересчёта в processGameData:", e);
+        });
     } catch (e) {
         console.error("Критическая ошибка в processGameData:", e);
     }
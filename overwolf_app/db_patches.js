@@ -0,0 +1,137 @@
+// Применение патчей между снапшотами базы (собираются build_scripts/build_db_patches.py).
+// Рядом с папкой stats на GitHub лежит stats/patches/index.json: список рёбер
+// { from, to, file, size, from_sha256, to_sha256 }. По нему ищется цепочка от базы,
+// которая уже есть локально, до нужной; результат сверяется по SHA-256 канонического
+// JSON (проценты в нём без нулей дробной части — как во встроенной базе после
+// build_static_bundle.py). Любая неудача — null, и десктоп качает файл целиком.
+const DbPatches = {
+    FORMAT: 2,
+
+    // Тот же канонический JSON, что canonical_json в build_db_patches.py:
+    // normalize_numbers + json.dumps(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    canonicalJson(value) {
+        if (Array.isArray(value)) {
+            return '[' + value.map(v => this.canonicalJson(v)).join(',') + ']';
+        }
+        if (value && typeof value === 'object') {
+            return '{' + Object.keys(value).sort()
+                .map(k => JSON.stringify(k) + ':' + this.canonicalJson(value[k])).join(',') + '}';
+        }
+        if (typeof value === 'string' && /^-?\d+\.\d+%$/.test(value)) {
+            value = value.replace(/\.?0+%$/, '%');
+        }
+        return JSON.stringify(value);
+    },
+
+    async sha256(data) {
+        let bytes = new TextEncoder().encode(this.canonicalJson(data));
+        let digest = await crypto.subtle.digest('SHA-256', bytes);
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    },
+
+    _applyValue(current, change) {
+        if (Array.isArray(change)) return change[0];
+        if (change && typeof change === 'object') return this.applyDelta(current, change);
+        return change;
+    },
+
+    // Применить delta к объекту базы (на месте) и вернуть его
+    applyDelta(data, delta) {
+        if ('$key' in delta) {
+            let field = delta.$key;
+            let removed = new Set(delta.$del || []);
+            let items = data.filter(item => !removed.has(item[field]));
+            let byKey = new Map(items.map((item, i) => [item[field], i]));
+            for (let key of Object.keys(delta)) {
+                if (key.startsWith('$')) continue;
+                if (byKey.has(key)) {
+                    let i = byKey.get(key);
+                    items[i] = this._applyValue(items[i], delta[key]);
+                } else {
+                    items.push(this._applyValue(null, delta[key]));
+                }
+            }
+            if (delta.$order) {
+                let byField = new Map(items.map(item => [item[field], item]));
+                items = delta.$order.map(key => byField.get(key));
+            }
+            data.length = 0;
+            data.push(...items);
+            return data;
+        }
+
+        for (let key of delta.$del || []) delete data[key];
+        for (let key of Object.keys(delta)) {
+            if (!key.startsWith('$')) data[key] = this._applyValue(data[key], delta[key]);
+        }
+        return data;
+    },
+
+    // Самая лёгкая (по сумме size) цепочка патчей от любой из localNames до target, или null
+    findChain(index, localNames, target) {
+        let edges = (index && index.format === this.FORMAT && index.patches) || [];
+        let best = new Map(localNames.map(name => [name, { size: 0, chain: [] }]));
+        // Граф маленький (десятки снапшотов) — хватает релаксации Беллмана-Форда
+        for (let round = 0; round < edges.length; round++) {
+            let changed = false;
+            for (let edge of edges) {
+                let from = best.get(edge.from);
+                if (!from) continue;
+                let size = from.size + edge.size;
+                let to = best.get(edge.to);
+                if (!to || size < to.size) {
+                    best.set(edge.to, { size: size, chain: from.chain.concat([edge]) });
+                    changed = true;
+                }
+            }
+            if (!changed) break;
+        }
+        let found = best.get(target);
+        return found && found.chain.length > 0 ? found.chain : null;
+    },
+
+    // Собрать target из локальной базы и патчей.
+    //   indexUrl          — адрес stats/patches/index.json
+    //   localNames        — имена баз, доступных локально
+    //   loadLocal(name)   — Promise с объектом локальной базы
+    //   log(msg)          — журнал
+    // Возвращает { data, downloaded } или null, если патчами не обойтись.
+    async build(target, indexUrl, localNames, loadLocal, log = () => {}) {
+        if (!(window.crypto && crypto.subtle)) return null;
+
+        let res = await fetch(indexUrl);
+        if (!res.ok) {
+            log(`Индекс патчей недоступен: HTTP ${res.status}`);
+            return null;
+        }
+        let chain = this.findChain(await res.json(), localNames, target);
+        if (!chain) return null;
+
+        let base = chain[0].from;
+        let data = await loadLocal(base);
+        if (!data || await this.sha256(data) !== chain[0].from_sha256) {
+            log(`Локальная база ${base} не совпадает с базой патча, патчи не применяем`);
+            return null;
+        }
+
+        let downloaded = 0;
+        for (let edge of chain) {
+            let patchRes = await fetch(new URL(edge.file, indexUrl).href);
+            if (!patchRes.ok) throw new Error(`Патч ${edge.file}: HTTP ${patchRes.status}`);
+            let text = await patchRes.text();
+            downloaded += text.length;
+            let patch = JSON.parse(text);
+            if (patch.format !== this.FORMAT || patch.from !== edge.from || patch.to !== edge.to) {
+                throw new Error(`Патч ${edge.file} не соответствует индексу`);
+            }
+            data = this.applyDelta(data, patch.delta);
+        }
+
+        if (await this.sha256(data) !== chain[chain.length - 1].to_sha256) {
+            log(`База ${target}, собранная из патчей, не совпала по SHA-256`);
+            return null;
+        }
+        log(`База ${target} собрана из ${base} и ${chain.length} патч(ей), скачано ${downloaded} байт`);
+        return { data: data, downloaded: downloaded };
+    }
+};
@@ -0,0 +1,106 @@
+// Хранилище скачанных баз (снапшотов статистики).
+// Каждый снапшот лежит отдельной записью в IndexedDB как готовый объект —
+// без JSON.parse/stringify всего набора при каждом обращении. Синхронно, в
+// localStorage, хранится только маленький индекс { имя файла: { size, savedAt } },
+// по нему строится список баз в десктопе.
+// Раньше все базы лежали одной JSON-строкой в localStorage['saved_dbs'] и упирались
+// в лимит после нескольких скачиваний; при первом открытии они переносятся сюда.
+const DbStorage = {
+    DB_NAME: 'rivals_counter_peaks',
+    STORE: 'snapshots',
+    INDEX_KEY: 'saved_dbs_index',
+    LEGACY_KEY: 'saved_dbs',
+    _dbPromise: null,
+
+    _open() {
+        if (!this._dbPromise) {
+            this._dbPromise = new Promise((resolve, reject) => {
+                if (typeof indexedDB === 'undefined') {
+                    reject(new Error("IndexedDB недоступен"));
+                    return;
+                }
+                let req = indexedDB.open(this.DB_NAME, 1);
+                req.onupgradeneeded = () => req.result.createObjectStore(this.STORE);
+                req.onsuccess = () => resolve(req.result);
+                req.onerror = () => reject(req.error);
+            });
+            // Неудачное открытие не кэшируем — следующий вызов попробует снова
+            this._dbPromise.catch(() => { this._dbPromise = null; });
+        }
+        return this._dbPromise;
+    },
+
+    async _request(mode, action) {
+        let db = await this._open();
+        return new Promise((resolve, reject) => {
+            let tx = db.transaction(this.STORE, mode);
+            let req = action(tx.objectStore(this.STORE));
+            tx.oncomplete = () => resolve(req.result);
+            tx.onerror = () => reject(tx.error || req.error);
+            tx.onabort = () => reject(tx.error || new Error("Транзакция IndexedDB прервана"));
+        });
+    },
+
+    // Индекс скачанных баз: { имя файла: { size, savedAt } }. Не трогает IndexedDB.
+    list() {
+        try {
+            return JSON.parse(localStorage.getItem(this.INDEX_KEY) || '{}') || {};
+        } catch (e) {
+            console.warn("[DB] Индекс сохранённых баз повреждён, сбрасываем:", e);
+            return {};
+        }
+    },
+
+    has(name) {
+        return Object.prototype.hasOwnProperty.call(this.list(), name);
+    },
+
+    _writeIndex(index) {
+        localStorage.setItem(this.INDEX_KEY, JSON.stringify(index));
+    },
+
+    async get(name) {
+        if (!this.has(name)) return null;
+        let data = await this._request('readonly', store => store.get(name));
+        return data || null;
+    },
+
+    // size — размер скачанного файла в байтах (для списка баз), если известен
+    async put(name, data, size = null) {
+        await this._request('readwrite', store => store.put(data, name));
+        let index = this.list();
+        index[name] = { size: size, savedAt: Date.now() };
+        this._writeIndex(index);
+    },
+
+    async remove(name) {
+        let index = this.list();
+        delete index[name];
+        this._writeIndex(index);
+        await this._request('readwrite', store => store.delete(name));
+    },
+
+    // Перенос баз из старого localStorage['saved_dbs']. Старый ключ удаляется только
+    // после того, как все базы записаны, — при ошибке данные не теряются.
+    async migrateFromLocalStorage() {
+        let legacy = localStorage.getItem(this.LEGACY_KEY);
+        if (legacy === null) return 0;
+
+        let savedDbs;
+        try {
+            savedDbs = JSON.parse(legacy) || {};
+        } catch (e) {
+            console.warn("[DB] Не удалось разобрать старый saved_dbs, пропускаем перенос:", e);
+            localStorage.removeItem(this.LEGACY_KEY);
+            return 0;
+        }
+
+        let names = Object.keys(savedDbs);
+        for (let name of names) {
+            await this.put(name, savedDbs[name], JSON.stringify(savedDbs[name]).length);
+        }
+        localStorage.removeItem(this.LEGACY_KEY);
+        console.log(`[DB] Перенесено баз из localStorage в IndexedDB: ${names.length}`);
+        return names.length;
+    }
+};
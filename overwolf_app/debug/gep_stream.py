@@ -0,0 +1,218 @@
+"""
+DEBUG ONLY: синтетический поток игровых событий Overwolf (GEP) по SSE.
+
+Эмулирует обновления match_info так, как их шлёт Marvel Rivals: новые
+match_id и карта, roster_* с character_name=null (только character_id) в
+фазе выбора, пустые roster_* посреди матча, banned_characters в виде JSON
+внутри JSON'а, повторы одного и того же снапшота, сброс карты в конце.
+
+serve.py отдаёт поток по адресу /__gep/stream; overwolf-mock.js подключается
+к нему, если страница открыта с ?gep=..., например
+    http://localhost:8000/debug/desktop-debug.html?gep=storm&rate=200
+
+Параметры (query string или флаги CLI):
+    pattern   steady | burst | storm
+    rate      событий в секунду (steady/storm)
+    burst     размер пачки событий без пауз (burst/storm)
+    interval  пауза между пачками, с (burst)
+    seed      зерно генератора (одинаковое зерно — одинаковый поток)
+    duration  длительность потока, с (0 — бесконечно)
+
+Без сервера тот же поток пишется в JSONL для tests/game_state_replay.py:
+    python debug/gep_stream.py --record storm.jsonl --pattern storm --duration 60
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENTITIES_FILE = os.path.join(ROOT, "database", "game_entities_dict.json")
+
+PATTERNS = ("steady", "burst", "storm")
+DEFAULTS = {"pattern": "steady", "rate": 20.0, "burst": 10, "interval": 2.0, "seed": 0, "duration": 0.0}
+ROSTER_SLOTS = 12
+
+
+def load_entities(path: str = ENTITIES_FILE) -> Tuple[Dict[str, str], List[str]]:
+    """(id героя -> ИМЯ, список карт) из словаря игровых сущностей."""
+    with open(path, "r", encoding="utf-8") as f:
+        entities = json.load(f)
+    maps = entities.get("maps") or []
+    if isinstance(maps, dict):
+        maps = list(maps.values())
+    return entities.get("heroes") or {}, [m for m in maps if m]
+
+
+class MatchSimulator:
+    """Бесконечная последовательность обновлений match_info, матч за матчем."""
+
+    def __init__(self, heroes: Dict[str, str], maps: List[str], seed: int = 0):
+        self.heroes = heroes
+        self.maps = maps or ["Arakko"]
+        self.rng = random.Random(seed)
+        self.match_no = 0
+
+    def _roster(self, hero_id: str, teammate: bool, named: bool) -> str:
+        return json.dumps({
+            "character_id": int(hero_id),
+            "character_name": self.heroes[hero_id] if named else None,
+            "is_teammate": teammate,
+            "is_local": False,
+        })
+
+    def _bans(self, hero_ids: List[str]) -> str:
+        """Список банов; чаще всего двойной JSON, иногда строка имён через запятую."""
+        variant = self.rng.random()
+        if variant < 0.6:
+            return json.dumps(json.dumps([{"character_id": int(h)} for h in hero_ids]))
+        if variant < 0.8:
+            return json.dumps([{"character_id": int(h), "character_name": self.heroes[h]} for h in hero_ids])
+        return ", ".join(self.heroes[h] for h in hero_ids)
+
+    def match(self) -> Iterator[Dict]:
+        """События одного матча: {"kind": "info", "info": {...}} или {"kind": "event", "name": ...}."""
+        rng = self.rng
+        self.match_no += 1
+        match_id = f"sim-{self.match_no}-{rng.randrange(1 << 30):08x}"
+        picks = rng.sample(sorted(self.heroes), ROSTER_SLOTS + 4)
+        lineup, bans = picks[:ROSTER_SLOTS], picks[ROSTER_SLOTS:]
+        snapshot: Dict = {}
+
+        def info(**delta):
+            snapshot.update(delta)
+            return {"kind": "info", "info": {"match_info": dict(delta)}}
+
+        yield {"kind": "event", "name": "match_start"}
+        yield info(match_id=match_id, map=rng.choice(self.maps))
+
+        # Фаза банов: список растёт по одному герою, каждый раз целиком
+        for n in range(1, len(bans) + 1):
+            yield info(banned_characters=self._bans(bans[:n]))
+
+        # Фаза выбора: сначала только character_id, потом имена
+        order = list(range(ROSTER_SLOTS))
+        for named in (False, True):
+            rng.shuffle(order)
+            for slot in order:
+                yield info(**{f"roster_{slot}": self._roster(lineup[slot], slot < 6, named or rng.random() < 0.3)})
+
+        # Игра: шум — пустые roster_*, повтор снапшота (как ответ getInfo), смена героя
+        for _ in range(rng.randint(20, 40)):
+            roll = rng.random()
+            if roll < 0.4:
+                yield info(**{f"roster_{rng.randrange(ROSTER_SLOTS)}": rng.choice([None, "null", ""])})
+            elif roll < 0.8:
+                yield {"kind": "info", "info": {"match_info": dict(snapshot)}}
+            elif roll < 0.9:
+                slot = rng.randrange(ROSTER_SLOTS)
+                lineup[slot] = rng.choice([h for h in sorted(self.heroes) if h not in lineup and h not in bans])
+                yield info(**{f"roster_{slot}": self._roster(lineup[slot], slot < 6, True)})
+            else:
+                yield info(banned_characters=snapshot.get("banned_characters"))
+
+        yield info(map=None)
+        yield info(match_id="null")
+
+    def events(self) -> Iterator[Dict]:
+        while True:
+            yield from self.match()
+
+
+def delays(pattern: str, rate: float, burst: int, interval: float, seed: int = 0) -> Iterator[float]:
+    """Паузы (с) перед каждым следующим событием по заданному шаблону нагрузки."""
+    rng = random.Random(seed + 1)
+    period = 1.0 / rate if rate > 0 else 0.0
+    if pattern == "steady":
+        while True:
+            yield period
+    elif pattern == "burst":
+        while True:
+            yield interval
+            for _ in range(max(burst, 1) - 1):
+                yield 0.0
+    elif pattern == "storm":
+        # Пуассоновский поток с редкими пачками до burst событий подряд
+        while True:
+            yield rng.expovariate(rate) if rate > 0 else 0.0
+            if rng.random() < 0.1:
+                for _ in range(rng.randint(1, max(burst, 1))):
+                    yield 0.0
+    else:
+        raise ValueError(f"Неизвестный шаблон нагрузки: {pattern} (ожидается один из {PATTERNS})")
+
+
+def parse_params(query: str) -> Dict:
+    params = dict(DEFAULTS)
+    for key, values in parse_qs(query).items():
+        if key in DEFAULTS and values:
+            params[key] = type(DEFAULTS[key])(values[-1])
+    return params
+
+
+def generate(params: Dict, heroes: Optional[Dict[str, str]] = None,
+             maps: Optional[List[str]] = None) -> Iterator[Dict]:
+    """События с порядковым номером и временем от начала потока: {"seq", "t", "kind", ...}."""
+    if heroes is None:
+        heroes, maps = load_entities()
+    simulator = MatchSimulator(heroes, maps, seed=params["seed"])
+    t = 0.0
+    waits = delays(params["pattern"], params["rate"], params["burst"], params["interval"], params["seed"])
+    for seq, (event, wait) in enumerate(zip(simulator.events(), waits)):
+        t += wait
+        if params["duration"] and t > params["duration"]:
+            return
+        yield dict(event, seq=seq, t=round(t, 4))
+
+
+def stream(handler, query: str):
+    """Отдать поток SSE в http.server-обработчик (вызывается из serve.py)."""
+    params = parse_params(query)
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.end_headers()
+
+    start = time.perf_counter()
+    try:
+        handler.wfile.write(f"event: params\ndata: {json.dumps(params)}\n\n".encode("utf-8"))
+        for event in generate(params):
+            delay = start + event["t"] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            event["sent_ms"] = round(time.time() * 1000.0, 1)
+            handler.wfile.write(f"event: gep\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+        handler.wfile.write(b"event: done\ndata: {}\n\n")
+        handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # страница закрыта или перезагружена
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Синтетический поток событий GEP в JSONL")
+    parser.add_argument("--record", required=True, help="Файл JSONL для tests/game_state_replay.py")
+    parser.add_argument("--pattern", choices=PATTERNS, default=DEFAULTS["pattern"])
+    parser.add_argument("--rate", type=float, default=DEFAULTS["rate"])
+    parser.add_argument("--burst", type=int, default=DEFAULTS["burst"])
+    parser.add_argument("--interval", type=float, default=DEFAULTS["interval"])
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+    parser.add_argument("--duration", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    params = {key: getattr(args, key) for key in DEFAULTS}
+    count = 0
+    with open(args.record, "w", encoding="utf-8") as f:
+        for event in generate(params):
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"Записано событий: {count} ({args.pattern}, {args.duration:g} с) -> {args.record}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+DEBUG ONLY: локальная замена GitHub для менеджера баз в desktop.js.
+
+Эмулирует два адреса, которые дёргает вкладка «Базы данных»:
+    contents API  /__github/<профиль>/api/repos/<owner>/<repo>/contents/<путь>?ref=...
+    raw-файлы     /__github/<профиль>/raw/<owner>/<repo>/<ref>/<путь>
+Путь в репозитории начинается с overwolf_app/ и отображается на локальную
+папку приложения; ref игнорируется (отдаётся рабочая копия). download_url
+в листинге указывает на raw-адрес этого же сервера и профиля, поэтому
+desktop.js (и патчи из stats/patches) работают без изменений.
+
+Как у настоящего GitHub:
+  * X-RateLimit-* на API (по умолчанию 60 запросов в час на IP, как без токена);
+    сверх лимита — 403 с JSON-ошибкой; ответ 304 лимит не расходует;
+  * ETag + If-None-Match -> 304 (API — слабый ETag, raw — сильный);
+  * gzip, если клиент его принимает.
+
+Профиль сети задаётся в пути (desktop.js дописывает к download_url "?t=...",
+поэтому query string для настроек не годится):
+    local    без задержек
+    dsl      80 мс, 1 МБ/с
+    3g       300 мс, 90 КБ/с
+    lossy    150 мс, 250 КБ/с, 10% ответов обрываются на середине тела
+
+Страница подхватывает заглушку так:
+    http://localhost:8000/debug/desktop-debug.html?github=3g
+"""
+import os
+import gzip
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PREFIX = "/__github/"
+REPO_APP_DIR = "overwolf_app"
+
+# latency — задержка до заголовков, с; bandwidth — байт/с (None — без ограничения);
+# loss — доля ответов, оборванных посреди тела
+NETWORK_PROFILES = {
+    "local": {"latency": 0.0, "bandwidth": None, "loss": 0.0},
+    "dsl": {"latency": 0.08, "bandwidth": 1_000_000, "loss": 0.0},
+    "3g": {"latency": 0.3, "bandwidth": 90_000, "loss": 0.0},
+    "lossy": {"latency": 0.15, "bandwidth": 250_000, "loss": 0.1},
+}
+RATE_LIMIT = 60
+RATE_WINDOW_S = 3600
+# GitHub отдаёт содержимое файла в contents API только до 1 МБ
+CONTENTS_MAX_BYTES = 1024 * 1024
+RAW_CACHE_CONTROL = "max-age=300"
+CHUNK_BYTES = 16 * 1024
+DOCS_URL = "https://docs.github.com/rest"
+
+
+class GitHubStub:
+    """Состояние заглушки: счётчики лимита по IP и кэш хэшей файлов."""
+
+    def __init__(self, root: str = ROOT, rate_limit: int = RATE_LIMIT,
+                 rate_window: float = RATE_WINDOW_S, seed: Optional[int] = None):
+        self.root = root
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rng = random.Random(seed)
+        self._rates: Dict[str, Tuple[float, int]] = {}
+        self._blob_sha: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    # --- лимит запросов ---
+    def rate_state(self, client: str, consume: bool) -> Tuple[int, int, int]:
+        """(использовано, осталось, время сброса unix); consume — засчитать запрос."""
+        now = time.time()
+        with self._lock:
+            reset, used = self._rates.get(client, (now + self.rate_window, 0))
+            if now >= reset:
+                reset, used = now + self.rate_window, 0
+            if consume and used < self.rate_limit:
+                used += 1
+            self._rates[client] = (reset, used)
+        return used, self.rate_limit - used, int(reset)
+
+    # --- файлы ---
+    def local_path(self, repo_path: str) -> Optional[str]:
+        """Путь в репозитории -> локальный путь; None — вне overwolf_app/."""
+        repo_path = repo_path.strip("/")
+        if repo_path != REPO_APP_DIR and not repo_path.startswith(REPO_APP_DIR + "/"):
+            return None
+        local = os.path.normpath(os.path.join(self.root, repo_path[len(REPO_APP_DIR):].lstrip("/")))
+        if local != self.root and not local.startswith(self.root + os.sep):
+            return None
+        return local
+
+    def blob_sha(self, path: str) -> str:
+        """SHA-1 git-блоба, как в поле sha у GitHub; пересчёт только при изменении файла."""
+        st = os.stat(path)
+        key = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._blob_sha.get(path)
+            if cached and cached[0] == key:
+                return cached[1]
+        with open(path, "rb") as f:
+            data = f.read()
+        sha = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+        with self._lock:
+            self._blob_sha[path] = (key, sha)
+        return sha
+
+    def entry(self, base: str, owner: str, repo: str, ref: str, repo_path: str, local: str) -> Dict:
+        is_dir = os.path.isdir(local)
+        api_url = f"{base}api/repos/{owner}/{repo}/contents/{repo_path}?ref={ref}"
+        html_url = f"https://github.com/{owner}/{repo}/{'tree' if is_dir else 'blob'}/{ref}/{repo_path}"
+        sha = hashlib.sha1(repo_path.encode("utf-8")).hexdigest() if is_dir else self.blob_sha(local)
+        git_url = f"{base}api/repos/{owner}/{repo}/git/{'trees' if is_dir else 'blobs'}/{sha}"
+        return {
+            "name": os.path.basename(local),
+            "path": repo_path,
+            "sha": sha,
+            "size": 0 if is_dir else os.path.getsize(local),
+            "url": api_url,
+            "html_url": html_url,
+            "git_url": git_url,
+            "download_url": None if is_dir else f"{base}raw/{owner}/{repo}/{ref}/{repo_path}",
+            "type": "dir" if is_dir else "file",
+            "_links": {"self": api_url, "git": git_url, "html": html_url},
+        }
+
+    def contents(self, base: str, owner: str, repo: str, ref: str, repo_path: str):
+        """Ответ contents API: список для папки, объект с base64 для файла; None — 404."""
+        repo_path = repo_path.strip("/")
+        local = self.local_path(repo_path)
+        if local is None or not os.path.exists(local):
+            return None
+        if os.path.isdir(local):
+            names = sorted(n for n in os.listdir(local) if not n.startswith(".") and n != "__pycache__")
+            return [self.entry(base, owner, repo, ref, f"{repo_path}/{n}", os.path.join(local, n)) for n in names]
+        item = self.entry(base, owner, repo, ref, repo_path, local)
+        with open(local, "rb") as f:
+            data = f.read()
+        item["encoding"] = "base64" if len(data) <= CONTENTS_MAX_BYTES else "none"
+        item["content"] = base64.encodebytes(data).decode("ascii") if len(data) <= CONTENTS_MAX_BYTES else ""
+        return item
+
+
+def _accepts_gzip(handler) -> bool:
+    return "gzip" in handler.headers.get("Accept-Encoding", "").lower()
+
+
+def _etag_matches(handler, etag: str) -> bool:
+    # Слабое сравнение: W/"x" и "x" — одна версия
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in [strip(tag) for tag in handler.headers.get("If-None-Match", "").split(",")]
+
+
+def _send(handler, status: int, body: bytes, headers: Dict[str, str], profile: Dict, rng: random.Random):
+    """Отправить ответ с задержкой, ограничением скорости и возможным обрывом."""
+    if profile["latency"]:
+        time.sleep(profile["latency"])
+    encoding = None
+    if body and _accepts_gzip(handler):
+        body, encoding = gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+
+    handler.send_response(status)
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.send_header("Access-Control-Expose-Headers",
+                        "ETag, X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, X-RateLimit-Used")
+    handler.send_header("Vary", "Accept-Encoding")
+    if encoding:
+        handler.send_header("Content-Encoding", encoding)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if handler.command == "HEAD":
+        return
+
+    # Обрыв посреди тела: клиент получает заголовки, но fetch().text() падает
+    cut = len(body) // 2 if body and rng.random() < profile["loss"] else None
+    payload = body if cut is None else body[:cut]
+    bandwidth = profile["bandwidth"]
+    for offset in range(0, len(payload), CHUNK_BYTES):
+        chunk = payload[offset:offset + CHUNK_BYTES]
+        handler.wfile.write(chunk)
+        if bandwidth:
+            handler.wfile.flush()
+            time.sleep(len(chunk) / bandwidth)
+    handler.wfile.flush()
+    if cut is not None:
+        handler.close_connection = True
+
+
+def _json_body(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def handle(handler, path: str, stub: GitHubStub):
+    """Обработать GET/HEAD на PREFIX... из serve.py."""
+    parts = path[len(PREFIX):].split("/")
+    profile_name = parts[0] if parts else ""
+    profile = NETWORK_PROFILES.get(profile_name)
+    if profile is None:
+        body = _json_body({"message": f"Неизвестный профиль сети '{profile_name}'",
+                           "profiles": sorted(NETWORK_PROFILES)})
+        return _send(handler, 404, body, {"Content-Type": "application/json; charset=utf-8"},
+                     NETWORK_PROFILES["local"], stub.rng)
+
+    host = handler.headers.get("Host") or "%s:%s" % handler.server.server_address[:2]
+    base = f"http://{host}{PREFIX}{profile_name}/"
+    kind, rest = (parts[1] if len(parts) > 1 else ""), parts[2:]
+
+    if kind == "api":
+        return _handle_api(handler, stub, profile, base, rest)
+    if kind == "raw" and len(rest) >= 4:
+        return _handle_raw(handler, stub, profile, rest)
+    _send(handler, 404, _json_body({"message": "Not Found", "documentation_url": DOCS_URL}),
+          {"Content-Type": "application/json; charset=utf-8"}, profile, stub.rng)
+
+
+def _handle_api(handler, stub: GitHubStub, profile: Dict, base: str, rest):
+    query = handler.path.partition("?")[2]
+    params = dict(p.partition("=")[::2] for p in query.split("&") if p)
+    ref = params.get("ref", "master")
+    client = handler.client_address[0]
+    headers = {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "private, max-age=60, s-maxage=60"}
+
+    def rate_headers(used, remaining, reset):
+        headers.update({"X-RateLimit-Limit": str(stub.rate_limit), "X-RateLimit-Remaining": str(remaining),
+                        "X-RateLimit-Reset": str(reset), "X-RateLimit-Used": str(used),
+                        "X-RateLimit-Resource": "core"})
+
+    # /repos/<owner>/<repo>/contents/<путь>
+    if len(rest) < 4 or rest[0] != "repos" or rest[3] != "contents":
+        rate_headers(*stub.rate_state(client, consume=True))
+        return _send(handler, 404, _json_body({"message": "Not Found", "documentation_url": DOCS_URL}),
+                     headers, profile, stub.rng)
+    owner, repo, repo_path = rest[1], rest[2], "/".join(rest[4:])
+
+    data = stub.contents(base, owner, repo, ref, repo_path)
+    body = _json_body(data) if data is not None else None
+    etag = 'W/"' + hashlib.sha256(body).hexdigest()[:40] + '"' if body is not None else None
+    used, remaining, reset = stub.rate_state(client, consume=False)
+    if etag and _etag_matches(handler, etag):
+        # Условный запрос с 304 лимит не расходует — даже исчерпанный
+        headers["ETag"] = etag
+        rate_headers(used, remaining, reset)
+        return _send(handler, 304, b"", headers, profile, stub.rng)
+
+    if remaining <= 0:
+        rate_headers(used, remaining, reset)
+        body = _json_body({"message": f"API rate limit exceeded for {client}. (But here's the good news: "
+                                      f"Authenticated requests get a higher rate limit.)",
+                           "documentation_url": DOCS_URL + "/overview/resources-in-the-rest-api#rate-limiting"})
+        return _send(handler, 403, body, headers, profile, stub.rng)
+
+    rate_headers(*stub.rate_state(client, consume=True))
+    if body is None:
+        return _send(handler, 404, _json_body({"message": "Not Found", "documentation_url": DOCS_URL}),
+                     headers, profile, stub.rng)
+    headers["ETag"] = etag
+    _send(handler, 200, body, headers, profile, stub.rng)
+
+
+def _handle_raw(handler, stub: GitHubStub, profile: Dict, rest):
+    # <owner>/<repo>/<ref>/<путь>
+    local = stub.local_path("/".join(rest[3:]))
+    if local is None or not os.path.isfile(local):
+        return _send(handler, 404, b"404: Not Found", {"Content-Type": "text/plain; charset=utf-8"},
+                     profile, stub.rng)
+    headers = {"Content-Type": "text/plain; charset=utf-8", "Cache-Control": RAW_CACHE_CONTROL,
+               "ETag": '"' + stub.blob_sha(local) + '"'}
+    if _etag_matches(handler, headers["ETag"]):
+        return _send(handler, 304, b"", headers, profile, stub.rng)
+    with open(local, "rb") as f:
+        body = f.read()
+    _send(handler, 200, body, headers, profile, stub.rng)
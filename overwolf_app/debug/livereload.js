@@ -0,0 +1,83 @@
+// DEBUG ONLY: клиент live-reload (сервер — debug/livereload.py, поток /__livereload в serve.py).
+// css  — подмена <link rel="stylesheet"> на месте, без перезагрузки;
+// db   — JSON из database/: marvelLogic.init() заново и перерисовка окна;
+// page — js/html: перезагрузка, только если файл подключён к ЭТОЙ странице
+//        (правка in_game.js не трогает открытое desktop-окно).
+(function () {
+    if (!window.EventSource || location.protocol === 'file:') return;
+
+    // Корень приложения (overwolf_app/) относительно этого скрипта: .../debug/livereload.js
+    const script = document.currentScript;
+    const appRoot = new URL('../', script ? script.src : location.href);
+
+    function appPath(url) {
+        const abs = new URL(url, location.href);
+        if (abs.origin !== appRoot.origin || !abs.pathname.startsWith(appRoot.pathname)) return null;
+        return decodeURIComponent(abs.pathname.slice(appRoot.pathname.length));
+    }
+
+    function pageFiles() {
+        const files = new Set();
+        const page = appPath(location.href);
+        if (page) files.add(page);
+        document.querySelectorAll('script[src]').forEach(s => {
+            const p = appPath(s.src);
+            if (p) files.add(p);
+        });
+        return files;
+    }
+
+    function swapCss(path) {
+        let swapped = false;
+        document.querySelectorAll('link[rel="stylesheet"]').forEach(link => {
+            if (appPath(link.href) !== path) return;
+            const next = link.cloneNode();
+            const url = new URL(link.href);
+            url.searchParams.set('livereload', Date.now());
+            next.href = url.toString();
+            // Старый стиль убираем после загрузки нового — без мигания
+            next.onload = next.onerror = () => link.remove();
+            link.after(next);
+            swapped = true;
+        });
+        return swapped;
+    }
+
+    async function reloadDatabase(paths) {
+        const logic = window.marvelLogic;
+        if (!logic) return;
+        console.log('[LIVERELOAD] База изменена:', paths.join(', '));
+        if (typeof reloadAppLogic === 'function') {
+            await reloadAppLogic('DEBUG: база перечитана с диска');
+        } else {
+            logic.isReady = false;
+            await logic.init();
+        }
+    }
+
+    function onChange(files) {
+        const loaded = pageFiles();
+        const dbPaths = [];
+        for (const file of files) {
+            if (file.kind === 'page' && loaded.has(file.path)) {
+                console.log('[LIVERELOAD] Перезагрузка страницы:', file.path);
+                location.reload();
+                return;
+            }
+            if (file.kind === 'css' && swapCss(file.path)) {
+                console.log('[LIVERELOAD] Стиль обновлён:', file.path);
+            }
+            if (file.kind === 'db') dbPaths.push(file.path);
+        }
+        if (dbPaths.length) {
+            reloadDatabase(dbPaths).catch(e => console.error('[LIVERELOAD] Ошибка перезагрузки базы:', e));
+        }
+    }
+
+    const source = new EventSource(new URL('/__livereload', appRoot.origin));
+    source.addEventListener('hello', ev => {
+        console.log('[LIVERELOAD] Подключено:', JSON.parse(ev.data).backend);
+    });
+    source.addEventListener('change', ev => onChange(JSON.parse(ev.data).files));
+    // При перезапуске serve.py EventSource переподключается сам
+})();
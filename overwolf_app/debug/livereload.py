@@ -0,0 +1,247 @@
+"""
+DEBUG ONLY: live-reload для serve.py.
+
+Следит за overwolf_app/ (inotify на Linux, иначе опрос mtime) и рассылает
+изменения подписчикам по SSE (/__livereload). Клиент — debug/livereload.js:
+    css  — подменяет <link rel="stylesheet"> без перезагрузки страницы;
+    db   — JSON из database/: заново marvelLogic.init() и перерисовка;
+    page — остальное (js/html): перезагрузка, если файл подключён к этой странице.
+
+Событие SSE:
+    event: change
+    data: {"files": [{"path": "windows/desktop/desktop.html", "kind": "page"}, ...]}
+"""
+import os
+import json
+import time
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IGNORED_DIRS = {"__pycache__", ".git", "node_modules"}
+IGNORED_SUFFIXES = (".gz", ".br", ".pyc", ".swp", ".tmp", "~")
+DEBOUNCE_S = 0.1
+POLL_INTERVAL_S = 0.25
+KEEPALIVE_S = 15.0
+
+# inotify(7)
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_ignored(rel_path: str) -> bool:
+    parts = rel_path.replace(os.sep, "/").split("/")
+    name = parts[-1]
+    return (any(p in IGNORED_DIRS for p in parts) or name.startswith(".")
+            or name.endswith(IGNORED_SUFFIXES))
+
+
+def classify(rel_path: str) -> str:
+    """Что делать клиенту: css / db / page."""
+    rel_path = rel_path.replace(os.sep, "/")
+    if rel_path.endswith(".css"):
+        return "css"
+    if rel_path.startswith("database/") and rel_path.endswith(".json"):
+        return "db"
+    return "page"
+
+
+def _walk_dirs(root: str) -> Iterable[str]:
+    for dirpath, dirnames, _files in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith(".")]
+        yield dirpath
+
+
+class ChangeWatcher:
+    """Фоновый поток: пачки изменённых путей (относительно root) -> on_change(paths)."""
+
+    def __init__(self, root: str, on_change: Callable[[List[str]], None],
+                 debounce: float = DEBOUNCE_S, interval: float = POLL_INTERVAL_S,
+                 use_inotify: bool = True):
+        self.root = root
+        self.on_change = on_change
+        self.debounce = debounce
+        self.interval = interval
+        self._stop = threading.Event()
+        self._inotify = self._init_inotify() if use_inotify else None
+        self.backend = "inotify" if self._inotify else "polling"
+        self._thread: Optional[threading.Thread] = None
+
+    # --- inotify ---
+    def _init_inotify(self):
+        name = ctypes.util.find_library("c")
+        if not name:
+            return None
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return {"libc": libc, "fd": fd, "dirs": {}}
+
+    def _add_watch(self, path: str):
+        state = self._inotify
+        wd = state["libc"].inotify_add_watch(state["fd"], os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            state["dirs"][wd] = path
+
+    def _read_inotify(self, timeout: Optional[float]) -> List[str]:
+        fd = self._inotify["fd"]
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(fd, 64 * 1024)
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            directory = self._inotify["dirs"].get(wd)
+            if directory is None or not name:
+                continue
+            full = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Файлы могли появиться раньше, чем встал watch на новую папку
+                    for sub in _walk_dirs(full):
+                        self._add_watch(sub)
+                        try:
+                            paths.extend(e.path for e in os.scandir(sub) if e.is_file())
+                        except OSError:
+                            continue  # папку уже удалили или переименовали (временные папки сборки)
+                continue
+            paths.append(full)
+        return paths
+
+    def _run_inotify(self):
+        for path in _walk_dirs(self.root):
+            self._add_watch(path)
+        while not self._stop.is_set():
+            changed = self._read_inotify(0.5)
+            if not changed:
+                continue
+            # Редактор пишет файл в несколько приёмов — собираем пачку
+            deadline = time.monotonic() + self.debounce
+            while (left := deadline - time.monotonic()) > 0:
+                changed += self._read_inotify(left)
+            self._emit(changed)
+
+    # --- опрос ---
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for dirpath in _walk_dirs(self.root):
+            try:
+                entries = list(os.scandir(dirpath))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    state[entry.path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            changed = [p for p in current.keys() | previous.keys() if current.get(p) != previous.get(p)]
+            previous = current
+            self._emit(changed)
+
+    def _emit(self, paths: List[str]):
+        rel = sorted({os.path.relpath(p, self.root).replace(os.sep, "/") for p in paths})
+        rel = [p for p in rel if not is_ignored(p)]
+        if rel:
+            self.on_change(rel)
+
+    def start(self) -> "ChangeWatcher":
+        target = self._run_inotify if self._inotify else self._run_polling
+        self._thread = threading.Thread(target=target, name="livereload-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._inotify:
+            os.close(self._inotify["fd"])
+            self._inotify = None
+
+
+class LiveReloadHub:
+    """Рассылка изменений всем открытым SSE-соединениям. Наблюдатель стартует с первым подписчиком."""
+
+    def __init__(self, root: str = ROOT):
+        self.root = root
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self.watcher: Optional[ChangeWatcher] = None
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue()
+        with self._lock:
+            if self.watcher is None:
+                self.watcher = ChangeWatcher(self.root, self.publish).start()
+                print(f"[livereload] Слежение за {self.root} ({self.watcher.backend})")
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def publish(self, paths: List[str]):
+        message = {"files": [{"path": p, "kind": classify(p)} for p in paths]}
+        with self._lock:
+            for q in self._subscribers:
+                q.put(message)
+
+
+def stream(handler, hub: LiveReloadHub):
+    """Отдать SSE-поток изменений в http.server-обработчик (вызывается из serve.py)."""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+    handler.send_header("Cache-Control", "no-store")
+    handler.end_headers()
+
+    q = hub.subscribe()
+    try:
+        handler.wfile.write(f"event: hello\ndata: {json.dumps({'backend': hub.watcher.backend})}\n\n".encode("utf-8"))
+        handler.wfile.flush()
+        while True:
+            try:
+                message = q.get(timeout=KEEPALIVE_S)
+            except queue.Empty:
+                # Комментарий SSE: закрытая вкладка обнаружится на записи
+                handler.wfile.write(b": keepalive\n\n")
+                handler.wfile.flush()
+                continue
+            payload = json.dumps(message, ensure_ascii=False)
+            handler.wfile.write(f"event: change\ndata: {payload}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # страница закрыта или перезагружена
+    finally:
+        hub.unsubscribe(q)
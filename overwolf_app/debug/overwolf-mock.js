@@ -31,8 +31,9 @@
             sendMessage: function (windowId, id, content, cb) {
                 if (cb) cb({ success: true });
                 // Имитируем получение сообщения внутри того же окна (для in_game-стиля)
-                if (id === 'update_data' && typeof window.onDebugMessage === 'function') {
-                    window.onDebugMessage(content);
+                if (id === 'update_data') {
+                    if (window.__gepStats) window.__gepStats.recomputes++;
+                    if (typeof window.onDebugMessage === 'function') window.onDebugMessage(content);
                 }
             },
             onMessageReceived: {
@@ -50,22 +51,123 @@
         };
     }
 
-    function makeGamesEventsApi() {
+    // === Поток событий GEP (gep_stream.py) ===
+    // desktop-debug.html?gep=storm&rate=200 — вместо «игра не запущена» мок
+    // подключается к /__gep/stream и раздаёт события листенерам background.js.
+    const pageParams = new URLSearchParams(location.search);
+    const gepPattern = pageParams.get('gep');
+    window.__gepStream = gepPattern ? { pattern: gepPattern } : null;
+
+    // === Заглушка GitHub (github_stub.py) ===
+    // desktop-debug.html?github=3g — менеджер баз ходит не на api.github.com,
+    // а в serve.py с профилем сети local / dsl / 3g / lossy.
+    const githubProfile = pageParams.get('github');
+    if (githubProfile) {
+        window.DB_GITHUB_API_OVERRIDE = `${location.origin}/__github/${githubProfile}/api/repos/Sankyuubigan/rivals_counter_peaks/contents/overwolf_app/database/stats?ref=master`;
+    }
+
+    function makeEvent() {
+        const listeners = [];
         return {
+            addListener: function (fn) { listeners.push(fn); },
+            removeListener: function (fn) {
+                const i = listeners.indexOf(fn);
+                if (i >= 0) listeners.splice(i, 1);
+            },
+            _fire: function (payload) { listeners.slice().forEach(fn => fn(payload)); }
+        };
+    }
+
+    function makeGamesEventsApi() {
+        const api = {
             setRequiredFeatures: function (features, cb) {
-                if (cb) cb({ success: false, error: 'debug: overwolf not available' });
+                if (!cb) return;
+                if (window.__gepStream) cb({ success: true, supportedFeatures: features });
+                else cb({ success: false, error: 'debug: overwolf not available' });
             },
             getInfo: function (cb) {
-                if (cb) cb({ success: false, error: 'debug: overwolf not available' });
+                if (!cb) return;
+                if (window.__gepStream) cb({ success: true, res: { match_info: Object.assign({}, gepSnapshot) } });
+                else cb({ success: false, error: 'debug: overwolf not available' });
             },
-            onInfoUpdates2: { addListener: noop },
-            onNewEvents: { addListener: noop }
+            onInfoUpdates2: makeEvent(),
+            onNewEvents: makeEvent(),
+            onError: makeEvent()
         };
+        return api;
+    }
+
+    // Накопленный match_info — то, что вернул бы getInfo()
+    const gepSnapshot = {};
+
+    // Статистика нагрузки: время синхронной обработки события листенерами
+    // (для background.js это updateStateFromInfo + processGameData), число
+    // пересчётов (update_data в in_game), задержка от отправки сервером и
+    // длинные кадры (jank) главного потока.
+    const gepStats = window.__gepStats = {
+        events: 0, recomputes: 0, dispatchMs: [], maxDispatchMs: 0,
+        maxLatencyMs: 0, longFrames: 0, maxFrameMs: 0
+    };
+
+    function summarizeMs(values) {
+        if (!values.length) return 'нет данных';
+        const sorted = values.slice().sort((a, b) => a - b);
+        const p = q => sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))].toFixed(2);
+        return `p50 ${p(0.5)} / p95 ${p(0.95)} / max ${sorted[sorted.length - 1].toFixed(2)} мс`;
+    }
+
+    function startGepStream(eventsApi) {
+        const query = new URLSearchParams(pageParams);
+        query.delete('gep');
+        query.set('pattern', gepPattern);
+        const source = new EventSource('/__gep/stream?' + query.toString());
+
+        source.addEventListener('params', ev => {
+            console.log('[GEP_STREAM] Подключено, параметры потока:', ev.data);
+        });
+        source.addEventListener('gep', ev => {
+            const msg = JSON.parse(ev.data);
+            gepStats.events++;
+            if (msg.sent_ms) gepStats.maxLatencyMs = Math.max(gepStats.maxLatencyMs, Date.now() - msg.sent_ms);
+            const started = performance.now();
+            if (msg.kind === 'info' && msg.info) {
+                Object.assign(gepSnapshot, msg.info.match_info || {});
+                eventsApi.onInfoUpdates2._fire({ info: msg.info, feature: 'match_info' });
+            } else if (msg.kind === 'event') {
+                eventsApi.onNewEvents._fire({ events: [{ name: msg.name, data: msg.data || '' }] });
+            }
+            const took = performance.now() - started;
+            gepStats.dispatchMs.push(took);
+            if (gepStats.dispatchMs.length > 5000) gepStats.dispatchMs.splice(0, 1000);
+            gepStats.maxDispatchMs = Math.max(gepStats.maxDispatchMs, took);
+        });
+        source.addEventListener('done', () => {
+            console.log('[GEP_STREAM] Поток завершён сервером.');
+            source.close();
+        });
+        source.onerror = () => console.warn('[GEP_STREAM] Ошибка соединения с /__gep/stream (сервер запущен?)');
+
+        let lastFrame = performance.now();
+        (function frame(now) {
+            const gap = now - lastFrame;
+            lastFrame = now;
+            gepStats.maxFrameMs = Math.max(gepStats.maxFrameMs, gap);
+            if (gap > 50) gepStats.longFrames++;
+            requestAnimationFrame(frame);
+        })(lastFrame);
+
+        setInterval(() => {
+            console.log(`[GEP_STREAM] событий ${gepStats.events}, пересчётов ${gepStats.recomputes}, ` +
+                `обработка ${summarizeMs(gepStats.dispatchMs)}, задержка до ${gepStats.maxLatencyMs} мс, ` +
+                `длинных кадров ${gepStats.longFrames} (макс. ${gepStats.maxFrameMs.toFixed(0)} мс)`);
+        }, 5000);
     }
 
     function makeGamesApi() {
+        const events = makeGamesEventsApi();
+        if (window.__gepStream) startGepStream(events);
         return {
-            events: makeGamesEventsApi(),
+            events: events,
             onGameInfoUpdated: { addListener: noop },
             getRunningGameInfo: function (cb) {
                 if (cb) cb({ success: false, isRunning: false });
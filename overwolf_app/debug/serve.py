@@ -1,27 +1,194 @@
 import http.server
-import socketserver
 import os
+import re
+import hashlib
+import threading
+from email.utils import formatdate
+
+import gep_stream
+import github_stub
+import livereload
 
 PORT = 8000
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+GEP_STREAM_PATH = "/__gep/stream"
+LIVERELOAD_PATH = "/__livereload"
+
+# Кэш браузера разрешён, но каждый запрос перепроверяется по ETag:
+# неизменённый файл — 304 без тела, изменённый — сразу новая версия.
+CACHE_CONTROL = "no-cache"
+# Предсжатые соседи (file.json.br / file.json.gz, см. build_static_bundle.py) в порядке предпочтения
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_etag_cache = {}
+_etag_lock = threading.Lock()
+# Слежение за файлами стартует с первой открытой страницей
+livereload_hub = livereload.LiveReloadHub(ROOT)
+# Заглушка GitHub для менеджера баз: лимит запросов общий на весь сервер
+github = github_stub.GitHubStub(ROOT)
+
+
+def file_etag(path: str, st: os.stat_result) -> str:
+    """Сильный ETag по содержимому; пересчитывается, только если файл изменился."""
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _etag_lock:
+        etag = _etag_cache.get(path)
+        if etag and etag[0] == key:
+            return etag[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    value = '"' + digest.hexdigest()[:32] + '"'
+    with _etag_lock:
+        _etag_cache[path] = (key, value)
+    return value
 
 
-class NoCacheHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+def parse_range(header: str, size: int):
+    """(start, end) включительно для "bytes=a-b" / "a-" / "-n"; None — диапазон невыполним."""
+    match = RANGE_RE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if not first:
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+
+class DebugRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # keep-alive: браузер не открывает новое соединение на каждую иконку
+    protocol_version = "HTTP/1.1"
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=ROOT, **kwargs)
+        kwargs.setdefault("directory", ROOT)
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self._route(head_only=False)
+
+    def do_HEAD(self):
+        self._route(head_only=True)
+
+    def _route(self, head_only: bool):
+        path, _, query = self.path.partition("?")
+        if path in (GEP_STREAM_PATH, LIVERELOAD_PATH):
+            if head_only:
+                # У потока нет ни длины, ни конца — заголовки без тела ничего не скажут
+                self.send_response(405)
+                self.send_header("Allow", "GET")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            # Поток без Content-Length: тело кончается закрытием соединения
+            self.close_connection = True
+            if path == GEP_STREAM_PATH:
+                gep_stream.stream(self, query)
+            else:
+                livereload.stream(self, livereload_hub)
+            return
+        if path.startswith(github_stub.PREFIX):
+            try:
+                github_stub.handle(self, path, github)  # на HEAD — те же заголовки без тела
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            return
+        self._serve(head_only)
+
+    def _serve(self, head_only: bool):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            # Каталоги (index.html, листинг) и 404 — стандартным обработчиком
+            return super().do_HEAD() if head_only else super().do_GET()
+        try:
+            self._send_file(path, head_only)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _select_encoding(self, path: str):
+        """(путь к телу, Content-Encoding или None) с учётом Accept-Encoding и соседей .br/.gz."""
+        accepted = {part.split(";")[0].strip().lower() for part in self.headers.get("Accept-Encoding", "").split(",")}
+        source_mtime = os.stat(path).st_mtime_ns
+        for encoding, suffix in PRECOMPRESSED:
+            sibling = path + suffix
+            # Сосед старше исходника — устарел, отдаём исходник
+            if encoding in accepted and os.path.isfile(sibling) and os.stat(sibling).st_mtime_ns >= source_mtime:
+                return sibling, encoding
+        return path, None
+
+    def _send_file(self, source: str, head_only: bool):
+        body_path, encoding = self._select_encoding(source)
+        st = os.stat(body_path)
+        etag = file_etag(body_path, st)
+        size = st.st_size
+
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self._send_common_headers(etag, encoding)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        # If-Range: диапазон только для той же версии файла, иначе — файл целиком
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            parsed = parse_range(range_header, size)
+            if parsed is None:
+                self.send_response(416)
+                self._send_common_headers(etag, encoding)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = parsed
+            status = 206
+
+        self.send_response(status)
+        self._send_common_headers(etag, encoding)
+        self.send_header("Content-Type", self.guess_type(source))
+        self.send_header("Last-Modified", formatdate(st.st_mtime, usegmt=True))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1 if size else 0))
+        self.end_headers()
+
+        if head_only or size == 0:
+            return
+        with open(body_path, "rb") as f:
+            # socket.sendfile — os.sendfile там, где он есть, иначе обычная отправка
+            self.wfile.flush()
+            self.connection.sendfile(f, offset=start, count=end - start + 1)
 
-    def end_headers(self):
-        self.send_header("Cache-Control", "no-store, no-cache, must-revalidate, max-age=0")
-        self.send_header("Pragma", "no-cache")
-        self.send_header("Expires", "0")
-        super().end_headers()
+    def _send_common_headers(self, etag: str, encoding):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
 
 
-class ReusableTCPServer(socketserver.TCPServer):
+class DebugHTTPServer(http.server.ThreadingHTTPServer):
+    # Поток событий GEP держит соединение открытым — остальные запросы
+    # обслуживаются параллельно, каждый в своём потоке
     allow_reuse_address = True
+    daemon_threads = True
 
 
 if __name__ == "__main__":
-    with ReusableTCPServer(("127.0.0.1", PORT), NoCacheHTTPRequestHandler) as httpd:
-        print(f"Serving {ROOT} at http://localhost:{PORT} (no-cache)")
+    with DebugHTTPServer(("127.0.0.1", PORT), DebugRequestHandler) as httpd:
+        print(f"Serving {ROOT} at http://localhost:{PORT} (ETag revalidation)")
+        print(f"Live reload: http://localhost:{PORT}{LIVERELOAD_PATH}")
+        print(f"GitHub stub: http://localhost:{PORT}{github_stub.PREFIX}local/api/repos/<owner>/<repo>/contents/overwolf_app/database/stats")
+        print(f"GEP stream: http://localhost:{PORT}{GEP_STREAM_PATH}?pattern=storm&rate=200")
         httpd.serve_forever()
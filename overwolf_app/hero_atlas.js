@@ -0,0 +1,54 @@
+// Атлас иконок героев (собирается build_scripts/build_icon_atlas.py).
+// Все портреты — одна картинка resources/atlas/heroes.webp: окно декодирует её
+// один раз вместо десятков отдельных PNG. Позиция иконки задаётся в процентах,
+// поэтому один атлас подходит для любого размера элемента.
+// Пока индекс не загружен (или его нет) — apply() возвращает false и окно
+// грузит отдельный PNG, как раньше.
+const HeroAtlas = {
+    ready: false,
+    index: null,
+    imageUrl: null,
+
+    load(baseUrl = '../../resources/atlas/') {
+        return fetch(baseUrl + 'heroes.json')
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(index => new Promise((resolve, reject) => {
+                let url = baseUrl + index.image;
+                let img = new Image();
+                img.onload = () => {
+                    this.index = index;
+                    this.imageUrl = url;
+                    this.ready = true;
+                    resolve(true);
+                };
+                img.onerror = () => reject(new Error(`не загрузилась картинка ${url}`));
+                img.src = url;
+            }))
+            .catch(e => {
+                console.warn("[ATLAS] Атлас иконок недоступен, используем отдельные PNG:", e && e.message ? e.message : e);
+                return false;
+            });
+    },
+
+    has(iconName) {
+        return this.ready && Object.prototype.hasOwnProperty.call(this.index.icons, iconName);
+    },
+
+    // Нарисовать портрет фоном элемента. false — иконки в атласе нет.
+    apply(element, iconName) {
+        if (!this.has(iconName)) return false;
+        let { columns, rows } = this.index;
+        let [col, row] = this.index.icons[iconName];
+        element.style.backgroundImage = `url('${this.imageUrl}')`;
+        element.style.backgroundSize = `${columns * 100}% ${rows * 100}%`;
+        element.style.backgroundPosition =
+            `${columns > 1 ? col / (columns - 1) * 100 : 0}% ${rows > 1 ? row / (rows - 1) * 100 : 0}%`;
+        element.style.backgroundRepeat = 'no-repeat';
+        return true;
+    }
+};
+
+HeroAtlas.load();
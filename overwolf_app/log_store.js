@@ -0,0 +1,132 @@
+// Общий журнал вкладки «Логи»: кольцевой буфер фиксированной ёмкости.
+// Живёт в background (window.appLogStore); окна пишут в него через bgWindow.
+// Запись дешёвая: сохраняются время, уровень и сами аргументы, текст строки
+// собирается только при просмотре/копировании (и кэшируется до перезаписи ячейки).
+// Подряд идущие одинаковые записи в пределах dupWindowMs не занимают новых
+// ячеек — у последней растёт счётчик повторов.
+// Объекты в аргументах форматируются при просмотре — мутировать их после
+// логирования не стоит, иначе в журнале будет новое состояние. Записи из
+// других окон (snapshot = true) сразу переводят объекты в строку: ссылка на
+// объект закрытого окна держит его в памяти, а при просмотре уже недоступна.
+class LogRing {
+    constructor(capacity = 1000, dupWindowMs = 2000) {
+        this.capacity = capacity;
+        this.dupWindowMs = dupWindowMs;
+        this.times = new Float64Array(capacity);
+        this.repeats = new Uint32Array(capacity);
+        this.levels = new Array(capacity).fill(null);
+        this.sources = new Array(capacity).fill(null);
+        this.args = new Array(capacity).fill(null);
+        this.formatted = new Array(capacity).fill(null);
+        this.head = 0;      // ячейка следующей записи
+        this.size = 0;
+        this.version = 0;   // растёт с каждой записью — окно логов не перерисовывает то же самое
+        this.counts = {};   // уровень -> число вызовов (включая подавленные повторы)
+        this.suppressed = 0;
+        this.home = typeof window !== 'undefined' ? window : null;  // окно, где живёт журнал
+    }
+
+    // snapshot — запись из другого окна: объекты сохраняются строкой, примитивы как есть
+    write(level, args, source = null, snapshot = false) {
+        if (snapshot) args = LogRing.snapshot(args);
+        this.counts[level] = (this.counts[level] || 0) + 1;
+        this.version++;
+        let now = Date.now();
+        let last = (this.head + this.capacity - 1) % this.capacity;
+        if (this.size && this.levels[last] === level && this.sources[last] === source
+            && now - this.times[last] <= this.dupWindowMs && this._sameArgs(this.args[last], args)) {
+            this.repeats[last]++;
+            this.times[last] = now;
+            this.formatted[last] = null;
+            this.suppressed++;
+            return;
+        }
+        let i = this.head;
+        this.times[i] = now;
+        this.repeats[i] = 0;
+        this.levels[i] = level;
+        this.sources[i] = source;
+        this.args[i] = snapshot ? args : Array.prototype.slice.call(args);
+        this.formatted[i] = null;
+        this.head = (i + 1) % this.capacity;
+        if (this.size < this.capacity) this.size++;
+    }
+
+    _sameArgs(a, b) {
+        if (a.length !== b.length) return false;
+        for (let k = 0; k < a.length; k++) {
+            if (a[k] !== b[k]) return false;
+        }
+        return true;
+    }
+
+    _format(i) {
+        let cached = this.formatted[i];
+        if (cached !== null) return cached;
+        let text = this.args[i].map(a => LogRing._stringify(a)).join(' ');
+        let line = `[${new Date(this.times[i]).toLocaleTimeString()}] [${this.levels[i]}] `
+            + (this.sources[i] ? `[${this.sources[i]}] ` : '') + text
+            + (this.repeats[i] ? ` (×${this.repeats[i] + 1})` : '');
+        this.formatted[i] = line;
+        return line;
+    }
+
+    static _stringify(a) {
+        if (typeof a === 'object' && a !== null) {
+            try { return JSON.stringify(a); } catch (_) { return String(a); }
+        }
+        return String(a);
+    }
+
+    static snapshot(args) {
+        let out = new Array(args.length);
+        for (let k = 0; k < args.length; k++) {
+            let a = args[k];
+            out[k] = (a !== null && (typeof a === 'object' || typeof a === 'function')) ? LogRing._stringify(a) : a;
+        }
+        return out;
+    }
+
+    // Строки от старых к новым
+    lines() {
+        let out = new Array(this.size);
+        let start = (this.head + this.capacity - this.size) % this.capacity;
+        for (let k = 0; k < this.size; k++) out[k] = this._format((start + k) % this.capacity);
+        return out;
+    }
+
+    text() {
+        return this.lines().join('\n');
+    }
+
+    clear() {
+        this.args.fill(null);
+        this.formatted.fill(null);
+        this.head = 0;
+        this.size = 0;
+        this.version++;
+    }
+
+    // Перехват console.* и необработанных ошибок окна.
+    //   names — уровни для log/warn/error, например {log: 'UI_LOG', warn: 'UI_WARN', error: 'UI_ERROR'}
+    static captureConsole(store, win = window, names = {}, source = null) {
+        let levels = Object.assign({ log: 'INFO', warn: 'WARN', error: 'ERROR' }, names);
+        let snapshot = win !== store.home;
+        let target = win.console;
+        ['log', 'warn', 'error'].forEach(method => {
+            let orig = target[method].bind(target);
+            target[method] = function () {
+                store.write(levels[method], arguments, source, snapshot);
+                orig.apply(null, arguments);
+            };
+        });
+        win.addEventListener('error', function (ev) {
+            store.write('JS_ERROR', [`${ev.message} @ ${ev.filename}:${ev.lineno}:${ev.colno}`], source);
+        });
+        win.addEventListener('unhandledrejection', function (ev) {
+            let reason = ev.reason;
+            let msg = (reason && reason.stack) ? reason.stack : (reason && reason.message ? reason.message : String(reason));
+            store.write('PROMISE_REJECT', [msg], source);
+        });
+    }
+}
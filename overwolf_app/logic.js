@@ -11,6 +11,22 @@ class CounterpickLogic {
         this.SYNERGY_BONUS = 10.0;
         this.FAVORITE_TEAMUP_BONUS = 25.0;
         this.isReady = false;
+        // Версия загруженной базы (имя файла) — часть ключа кэша результатов
+        this.dbVersion = null;
+        // LRU результатов пересчёта: Map хранит порядок вставки, последний — самый свежий
+        this.RESULT_CACHE_SIZE = 32;
+        this.resultCache = new Map();
+        // Номер загрузки базы: растёт при каждом loadData, по нему воркер понимает, что базу надо переслать
+        this.loadGeneration = 0;
+        // Скомпилированные индексы (см. compileIndex)
+        this.heroIndex = new Map();
+        this.heroIndexLower = new Map();
+        this.heroRoleOf = new Map();
+        this.opponentIndex = new Map();
+        this.counterMatrix = new Float64Array(0);
+        this.mapNameIndex = new Map();
+        this.mapWinRates = new Map();
+        this.effectiveMaps = new Set();
     }
 
     async init() {
@@ -24,12 +40,19 @@ class CounterpickLogic {
 
             // 2. Проверяем, скачивал ли юзер что-то с Гитхаба
             const activeDbName = localStorage.getItem('active_db_name') || 'local';
-            const savedDbs = JSON.parse(localStorage.getItem('saved_dbs') || '{}');
             
             let fullData;
-            if (activeDbName !== 'local' && savedDbs[activeDbName]) {
+            if (typeof DbStorage !== 'undefined') {
+                try {
+                    await DbStorage.migrateFromLocalStorage();
+                    if (activeDbName !== 'local') fullData = await DbStorage.get(activeDbName);
+                } catch (e) {
+                    console.warn('[DB] Хранилище скачанных баз недоступно:', e);
+                }
+            }
+            if (fullData) {
                 // Грузим пользовательскую скачанную базу
-                fullData = savedDbs[activeDbName];
+                this.dbVersion = activeDbName;
                 console.log(`[DB] Загружена пользовательская база: ${activeDbName}`);
             }
 
@@ -57,54 +80,143 @@ class CounterpickLogic {
                     throw new Error(`Не удалось загрузить базу ${dbFileName} (HTTP ${statsRes.status})`);
                 }
                 fullData = await statsRes.json();
+                this.dbVersion = dbFileName;
                 console.log(`[DB] Загружена база из коробки: ${dbFileName}`);
             }
 
-            this.statsData = fullData.heroes || {};
-            this.teamupsData = fullData.teamups || [];
-            this.allHeroes = Object.keys(this.statsData).sort();
+            this.loadData(fullData);
+            this.isReady = true;
+        } catch (e) {
+            console.error("Ошибка загрузки баз данных:", e);
+        }
+    }
+
+    // Разбор загруженной базы. Вызывается из init() и из logic.worker.js, которому
+    // фоновое окно пересылает уже скачанные данные.
+    loadData(fullData, gameEntities = null, dbVersion = null) {
+        if (gameEntities) this.gameEntities = gameEntities;
+        if (dbVersion) this.dbVersion = dbVersion;
+        this.resultCache.clear();
+        this.statsData = fullData.heroes || {};
+        this.teamupsData = fullData.teamups || [];
+        this.allHeroes = Object.keys(this.statsData).sort();
+        this.heroRoles = {};
+        this.matchupsData = {};
+        this.heroStatsData = {};
 
-            for (let hero of this.allHeroes) {
-                let role = this.statsData[hero].role;
-                if (role) {
-                    if (!this.heroRoles[role]) this.heroRoles[role] =[];
-                    this.heroRoles[role].push(hero);
-                }
+        for (let hero of this.allHeroes) {
+            let role = this.statsData[hero].role;
+            if (role) {
+                if (!this.heroRoles[role]) this.heroRoles[role] =[];
+                this.heroRoles[role].push(hero);
+            }
 
-                this.matchupsData[hero] = this.statsData[hero].opponents ||[];
+            this.matchupsData[hero] = this.statsData[hero].opponents ||[];
 
-                let wrStr = this.statsData[hero].win_rate || "50%";
-                let wr = parseFloat(wrStr.replace('%', '')) / 100;
-                this.heroStatsData[hero] = { win_rate: wr };
+            let wrStr = this.statsData[hero].win_rate || "50%";
+            let wr = parseFloat(wrStr.replace('%', '')) / 100;
+            this.heroStatsData[hero] = { win_rate: wr };
+        }
+
+        this.compileIndex();
+        this.loadGeneration++;
+        console.log(`[DB] Собрано уникальных карт: ${this.availableMaps.length}`, this.availableMaps);
+    }
+
+    // Один проход по базе вместо поиска по массивам на каждый пересчёт:
+    // матрица разниц винрейтов герой × противник, роль героя, винрейты по картам.
+    compileIndex() {
+        this.mapNameIndex = new Map();
+        let filenameToName = this.gameEntities.map_filename_to_name || {};
+        for (let key in filenameToName) {
+            let lowerKey = key.toLowerCase();
+            if (!this.mapNameIndex.has(lowerKey)) this.mapNameIndex.set(lowerKey, filenameToName[key]);
+        }
+
+        this.heroIndex = new Map();
+        this.heroIndexLower = new Map();
+        this.heroRoleOf = new Map();
+        this.opponentIndex = new Map();
+        this.allHeroes.forEach((hero, i) => {
+            this.heroIndex.set(hero, i);
+            let lower = hero.toLowerCase();
+            if (!this.heroIndexLower.has(lower)) this.heroIndexLower.set(lower, i);
+            if (!this.opponentIndex.has(lower)) this.opponentIndex.set(lower, this.opponentIndex.size);
+            let role = this.statsData[hero].role;
+            if (role) this.heroRoleOf.set(hero, role);
+        });
+        for (let hero of this.allHeroes) {
+            for (let m of this.matchupsData[hero]) {
+                if (!m.opponent) continue;
+                let lower = m.opponent.toLowerCase();
+                if (!this.opponentIndex.has(lower)) this.opponentIndex.set(lower, this.opponentIndex.size);
+            }
+        }
+
+        // NaN — матчапа нет (или разница не число); при дублях берётся первый, как делал find()
+        let cols = this.opponentIndex.size;
+        this.counterMatrix = new Float64Array(this.allHeroes.length * cols).fill(NaN);
+        this.allHeroes.forEach((hero, i) => {
+            let seen = new Set();
+            for (let m of this.matchupsData[hero]) {
+                if (!m.opponent) continue;
+                let col = this.opponentIndex.get(m.opponent.toLowerCase());
+                if (seen.has(col)) continue;
+                seen.add(col);
+                this.counterMatrix[i * cols + col] = -parseFloat(String(m.difference).replace('%', ''));
             }
+        });
 
-            let mapsSet = new Set();
-            for (let hero of this.allHeroes) {
-                let heroMaps = this.statsData[hero].maps || [];
-                for (let m of heroMaps) {
-                    if (m.map_name) mapsSet.add(this.resolveMapName(m.map_name));
-                }
+        this.mapWinRates = new Map();
+        this.effectiveMaps = new Set();
+        let mapsSet = new Set();
+        for (let hero of this.allHeroes) {
+            let byMap = new Map();
+            let minWr = Infinity, maxWr = -Infinity;
+            for (let m of this.statsData[hero].maps || []) {
+                if (!m.map_name) continue;
+                let dbMapName = this.resolveMapName(m.map_name);
+                mapsSet.add(dbMapName);
+                this.effectiveMaps.add(dbMapName.toLowerCase());
+                let wr = parseFloat(String(m.win_rate).replace('%', ''));
+                if (isNaN(wr)) continue;
+                if (wr < minWr) minWr = wr;
+                if (wr > maxWr) maxWr = wr;
+                byMap.set(dbMapName.toLowerCase(), wr);
             }
-            this.availableMaps = Array.from(mapsSet).sort();
-            console.log(`[DB] Собрано уникальных карт: ${this.availableMaps.length}`, this.availableMaps);
-            this.isReady = true;
-        } catch (e) {
-            console.error("Ошибка загрузки баз данных:", e);
+            if (byMap.size > 0) this.mapWinRates.set(hero, { minWr, maxWr, byMap });
+        }
+        this.availableMaps = Array.from(mapsSet).sort();
+    }
+
+    // Результат пересчёта по каноническому ключу (враги, союзники, баны, карта, версия БД).
+    // compute() вызывается только при промахе; результат нельзя мутировать снаружи.
+    // compute() может вернуть Promise (ответ воркера): в кэш кладётся сам Promise, чтобы
+    // одинаковые запросы, пришедшие до ответа, не считались повторно; отклонённый — выкидывается.
+    cachedResult(key, compute) {
+        if (this.resultCache.has(key)) {
+            let hit = this.resultCache.get(key);
+            this.resultCache.delete(key);
+            this.resultCache.set(key, hit);
+            return hit;
+        }
+        let result = compute();
+        if (result && typeof result.then === 'function') {
+            result.catch(() => {
+                if (this.resultCache.get(key) === result) this.resultCache.delete(key);
+            });
+        }
+        this.resultCache.set(key, result);
+        if (this.resultCache.size > this.RESULT_CACHE_SIZE) {
+            this.resultCache.delete(this.resultCache.keys().next().value);
         }
+        return result;
     }
 
     resolveMapName(rawName) {
         if (!rawName) return rawName;
-        let lowerRaw = rawName.toLowerCase();
-        
-        if (this.gameEntities.map_filename_to_name) {
-            for (let key in this.gameEntities.map_filename_to_name) {
-                if (key.toLowerCase() === lowerRaw) {
-                    return this.gameEntities.map_filename_to_name[key];
-                }
-            }
-        }
-        return rawName;
+        let resolved = this.mapNameIndex.get(rawName.toLowerCase());
+        return resolved !== undefined ? resolved : rawName;
     }
 
     normalizeHeroName(name) {
@@ -128,16 +240,16 @@ class CounterpickLogic {
 
         if (aliases[normalized]) {
             let canonical = aliases[normalized];
-            let found = this.allHeroes.find(h => h.toLowerCase() === canonical.toLowerCase());
-            return found || canonical;
+            let idx = this.heroIndexLower.get(canonical.toLowerCase());
+            return idx !== undefined ? this.allHeroes[idx] : canonical;
         }
 
-        let found = this.allHeroes.find(h => h.toLowerCase() === normalized);
-        if (found) return found;
+        let idx = this.heroIndexLower.get(normalized);
+        if (idx !== undefined) return this.allHeroes[idx];
 
         let capitalized = normalized.split(' ').map(p => p ? p[0].toUpperCase() + p.slice(1) : '').join(' ');
-        found = this.allHeroes.find(h => h === capitalized);
-        return found || capitalized || name;
+        if (this.heroIndex.has(capitalized)) return capitalized;
+        return capitalized || name;
     }
 
     heroIconName(heroName) {
@@ -152,45 +264,17 @@ class CounterpickLogic {
 
     doesMapAffectScores(mapName) {
         if (!mapName) return false;
-        let lowerMap = mapName.toLowerCase();
-        
-        for (let hero of this.allHeroes) {
-            let heroData = this.statsData[hero];
-            if (heroData && heroData.maps) {
-                for (let m of heroData.maps) {
-                    let dbMapName = this.resolveMapName(m.map_name);
-                    if (dbMapName.toLowerCase() === lowerMap) {
-                        return true;
-                    }
-                }
-            }
-        }
-        return false;
+        return this.effectiveMaps.has(mapName.toLowerCase());
     }
 
     getMapScore(heroName, mapName, minScore = 0, maxScore = 20) {
-        let heroData = this.statsData[heroName];
-        if (!heroData || !heroData.maps) return 0;
-
-        let winRates =[];
-        let targetMapWr = null;
-
-        for (let m of heroData.maps) {
-            let wr = parseFloat(m.win_rate.replace('%', ''));
-            if (isNaN(wr)) continue;
-            winRates.push(wr);
-            
-            let dbMapName = this.resolveMapName(m.map_name);
-            if (dbMapName.toLowerCase() === mapName.toLowerCase()) {
-                targetMapWr = wr;
-            }
-        }
-
-        if (targetMapWr === null || winRates.length === 0) return 0;
+        let rates = this.mapWinRates.get(heroName);
+        if (!rates) return 0;
 
-        let minWr = Math.min(...winRates);
-        let maxWr = Math.max(...winRates);
+        let targetMapWr = rates.byMap.get(mapName.toLowerCase());
+        if (targetMapWr === undefined) return 0;
 
+        let { minWr, maxWr } = rates;
         if (minWr === maxWr) return minScore;
 
         let score = minScore + (targetMapWr - minWr) * (maxScore - minScore) / (maxWr - minWr);
@@ -201,23 +285,28 @@ class CounterpickLogic {
         if (!enemyTeam || enemyTeam.length === 0) return[];
         let heroScores = {};
 
-        for (let hero of this.allHeroes) {
-            if (!isTierListCalc && enemyTeam.includes(hero)) continue;
+        // Колонки матрицы для врагов считаются один раз на вызов, а не на каждого героя
+        let cols = this.opponentIndex.size;
+        let enemyCols = enemyTeam.map(enemy => this.opponentIndex.get(enemy.toLowerCase()));
+        let enemySet = new Set(enemyTeam);
+
+        for (let i = 0; i < this.allHeroes.length; i++) {
+            let hero = this.allHeroes[i];
+            if (!isTierListCalc && enemySet.has(hero)) continue;
             
             let totalDifference = 0;
             let foundMatchups = 0;
-            let matchups = this.matchupsData[hero] ||[];
-
-            for (let enemy of enemyTeam) {
-                if (isTierListCalc && hero === enemy) continue;
-                
-                let matchup = matchups.find(m => m.opponent && m.opponent.toLowerCase() === enemy.toLowerCase());
-                if (matchup) {
-                    let diff = -parseFloat(matchup.difference.replace('%', ''));
-                    if (!isNaN(diff)) {
-                        totalDifference += diff;
-                        foundMatchups++;
-                    }
+            let row = i * cols;
+
+            for (let k = 0; k < enemyTeam.length; k++) {
+                if (isTierListCalc && hero === enemyTeam[k]) continue;
+                let col = enemyCols[k];
+                if (col === undefined) continue;
+
+                let diff = this.counterMatrix[row + col];
+                if (!isNaN(diff)) {
+                    totalDifference += diff;
+                    foundMatchups++;
                 }
             }
 
@@ -239,9 +328,11 @@ class CounterpickLogic {
 
         if (originalScores.length === 0) return {};
 
-        let values = originalScores.map(s => s[1]);
-        let minScore = Math.min(...values);
-        let maxScore = Math.max(...values);
+        let minScore = Infinity, maxScore = -Infinity;
+        for (let [, value] of originalScores) {
+            if (value < minScore) minScore = value;
+            if (value > maxScore) maxScore = value;
+        }
 
         let finalScores = {};
         for (let [hero, originalScore] of originalScores) {
@@ -262,10 +353,7 @@ class CounterpickLogic {
         let vanguards =[], duelists = [], strategists = [];
         
         for (let [hero, score] of sortedHeroes) {
-            let role = null;
-            for (let r in this.heroRoles) {
-                if (this.heroRoles[r].includes(hero)) { role = r; break; }
-            }
+            let role = this.heroRoleOf.get(hero);
             if (role === "Vanguard") vanguards.push([hero, score]);
             else if (role === "Duelist") duelists.push([hero, score]);
             else if (role === "Strategist") strategists.push([hero, score]);
@@ -286,11 +374,12 @@ class CounterpickLogic {
 
                     let baseScore = teamCandidates.reduce((sum, curr) => sum + curr[1], 0);
                     let teamNames = teamCandidates.map(c => c[0]);
+                    let teamSet = new Set(teamNames);
                     
                     let synergyScore = 0;
                     for (let teamup of this.teamupsData) {
                         let heroesInTeamup = teamup.heroes ||[];
-                        let isSubset = heroesInTeamup.every(h => teamNames.includes(h));
+                        let isSubset = heroesInTeamup.every(h => teamSet.has(h));
                         if (heroesInTeamup.length > 1 && isSubset) {
                             synergyScore += this.SYNERGY_BONUS;
                         }
@@ -316,12 +405,8 @@ class CounterpickLogic {
         
         let currentRoles = { Vanguard: 0, Duelist: 0, Strategist: 0 };
         for (let hero of allyTeam) {
-            for (let r in this.heroRoles) {
-                if (this.heroRoles[r].includes(hero)) {
-                    currentRoles[r]++;
-                    break;
-                }
-            }
+            let role = this.heroRoleOf.get(hero);
+            if (role) currentRoles[role]++;
         }
 
         let v = currentRoles.Vanguard;
@@ -339,13 +424,14 @@ class CounterpickLogic {
         }
         
         let recommended = [];
+        let allySet = new Set(allyTeam);
+        let bannedSet = new Set(bannedTeam);
         
         if (allyTeam.length === 0) {
             for (let role of ["Vanguard", "Duelist", "Strategist"]) {
                 let candidates = sortedHeroes.filter(h => 
-                    this.heroRoles[role] && 
-                    this.heroRoles[role].includes(h[0]) &&
-                    !bannedTeam.includes(h[0])
+                    this.heroRoleOf.get(h[0]) === role &&
+                    !bannedSet.has(h[0])
                 );
                 recommended.push(...candidates.map(h => h[0]));
             }
@@ -354,10 +440,9 @@ class CounterpickLogic {
         
         for (let role of neededRoles) {
             let candidates = sortedHeroes.filter(h => 
-                this.heroRoles[role] && 
-                this.heroRoles[role].includes(h[0]) && 
-                !allyTeam.includes(h[0]) &&
-                !bannedTeam.includes(h[0])
+                this.heroRoleOf.get(h[0]) === role &&
+                !allySet.has(h[0]) &&
+                !bannedSet.has(h[0])
             );
             recommended.push(...candidates.map(h => h[0]));
         }
@@ -382,6 +467,22 @@ class CounterpickLogic {
         return { scores: finalScores, optimalTeam: optimalTeam };
     }
 
+    // Пересчёт для трея по текущему матчу: контрпики против живых врагов (или тир-лист,
+    // если враги ещё не известны) и рекомендации под роли союзников.
+    // Вызывается из logic.worker.js; фоновое окно — только если воркер недоступен.
+    computeMatchResult(activeEnemies, allyHeroes, bannedHeroes, mapName) {
+        if (activeEnemies.length === 0) {
+            let tierScores = this.calculateTierListScoresWithMap(mapName);
+            return {
+                scores: tierScores,
+                optimalTeam: allyHeroes.length > 0 ? this.getRecommendedHeroes(tierScores, allyHeroes, bannedHeroes) :[]
+            };
+        }
+        let counters = this.calculateCounterScoresForTeam(activeEnemies, mapName);
+        counters.optimalTeam = allyHeroes.length > 0 ? this.getRecommendedHeroes(counters.scores, allyHeroes, bannedHeroes) :[];
+        return counters;
+    }
+
     applyFavoriteTeamupBonus(scores, allyHeroes = [], favoriteTeamupNames = []) {
         if (!favoriteTeamupNames || favoriteTeamupNames.length === 0) return scores;
         if (!this.teamupsData || this.teamupsData.length === 0) return scores;
@@ -0,0 +1,27 @@
+// Движок контрпиков в отдельном потоке.
+// Фоновое окно пересылает сюда скачанную базу (type: 'load') и запросы пересчёта
+// (type: 'compute'), чтобы обмен сообщениями с окнами и хоткеи не ждали подсчёта.
+// Сообщения обрабатываются строго по порядку, поэтому compute после load видит новую базу.
+importScripts('logic.js');
+
+const engine = new CounterpickLogic();
+
+self.onmessage = function(event) {
+    let msg = event.data || {};
+    try {
+        let result;
+        if (msg.type === 'load') {
+            engine.loadData(msg.data, msg.gameEntities, msg.dbVersion);
+            engine.isReady = true;
+            result = { heroes: engine.allHeroes.length, dbVersion: engine.dbVersion };
+        } else if (msg.type === 'compute') {
+            if (!engine.isReady) throw new Error("База ещё не загружена в воркер");
+            result = engine.computeMatchResult(msg.enemies, msg.allies, msg.banned, msg.map);
+        } else {
+            throw new Error("Неизвестный тип сообщения: " + msg.type);
+        }
+        self.postMessage({ id: msg.id, result: result });
+    } catch (e) {
+        self.postMessage({ id: msg.id, error: (e && e.message) || String(e) });
+    }
+};
@@ -2,52 +2,18 @@ let bgWindow = overwolf.windows.getMainWindow();
 let manualSelectedEnemies =[];
 
 function getLogStore() {
-    if (!window.appLogs) window.appLogs = [];
-    // В debug-режиме bgWindow === window, поэтому синхронизируем явно,
-    // чтобы логгер (desktop-debug.html) и refreshLogs смотрели в один массив.
-    if (bgWindow && bgWindow !== window && !bgWindow.appLogs) {
-        try { bgWindow.appLogs = window.appLogs; } catch (_) {}
-    }
-    if (bgWindow && bgWindow.appLogs && bgWindow.appLogs !== window.appLogs) {
-        // отдаём тот же массив, что наполняет логгер
-        window.appLogs = bgWindow.appLogs;
-    }
-    return window.appLogs;
+    // Журнал живёт в background; в debug-режиме bgWindow === window,
+    // и его создаёт desktop-debug.html (или сам background.js при ?gep=...).
+    if (bgWindow && bgWindow.appLogStore) return bgWindow.appLogStore;
+    if (!window.appLogStore) window.appLogStore = new LogRing(1000);
+    return window.appLogStore;
 }
 
 // Устанавливаем перехват console только если он ещё не установлен
 // (в debug-режиме логгер уже поднят в desktop-debug.html до logic.js).
 if (!window.__appLoggerInstalled) {
     window.__appLoggerInstalled = true;
-
-    const origDesktopLog = console.log.bind(console);
-    const origDesktopWarn = console.warn.bind(console);
-    const origDesktopError = console.error.bind(console);
-
-    const writeToLogStore = function(level, args) {
-        const text = Array.from(args).map(a => {
-            if (typeof a === 'object' && a !== null) {
-                try { return JSON.stringify(a); } catch (_) { return String(a); }
-            }
-            return String(a);
-        }).join(' ');
-        const store = getLogStore();
-        store.push(`[${new Date().toLocaleTimeString()}][${level}] ${text}`);
-        if (store.length > 1000) store.shift();
-    };
-
-    console.log = function(...args) { origDesktopLog(...args); writeToLogStore('UI_LOG', args); };
-    console.warn = function(...args) { origDesktopWarn(...args); writeToLogStore('UI_WARN', args); };
-    console.error = function(...args) { origDesktopError(...args); writeToLogStore('UI_ERROR', args); };
-
-    window.addEventListener('error', function(ev) {
-        writeToLogStore('JS_ERROR', [`${ev.message} @ ${ev.filename}:${ev.lineno}:${ev.colno}`]);
-    });
-    window.addEventListener('unhandledrejection', function(ev) {
-        let reason = ev.reason;
-        let msg = (reason && reason.stack) ? reason.stack : (reason && reason.message ? reason.message : String(reason));
-        writeToLogStore('PROMISE_REJECT', [msg]);
-    });
+    LogRing.captureConsole(getLogStore(), window, { log: 'UI_LOG', warn: 'UI_WARN', error: 'UI_ERROR' });
 }
 
 const imageCache = {};
@@ -55,6 +21,8 @@ const imageCache = {};
 function applyHeroImage(element, heroName) {
     if (!heroName) return;
     let formatted = (bgWindow && bgWindow.marvelLogic ? bgWindow.marvelLogic.heroIconName(heroName) : heroName.toLowerCase().trim().replace(/\s*\&\s*/g, ' ').replace(/\(([^)]+)\)/g, ' $1').replace(/[^\w-]+/g, ' ').trim().replace(/[\s-]+/g, '_'));
+    // Портрет из общего атласа — без отдельной загрузки; нет атласа/иконки — отдельный PNG
+    if (HeroAtlas.apply(element, formatted)) return;
     let localUrl = `../../resources/heroes_icons/${formatted}.png`;
     let githubUrl = `https://raw.githubusercontent.com/Sankyuubigan/rivals_counter_peaks/master/overwolf_app/resources/heroes_icons/${formatted}.png`;
 
@@ -384,11 +352,16 @@ function appLogError(...args) {
     console.error('[DESKTOP]', ...args);
 }
 
+let _logsVersion = -1;
+
 function refreshLogs() {
-    let logs = getLogStore();
+    let store = getLogStore();
     let ta = document.getElementById('logs-area');
     if (!ta) return;
-    ta.value = logs.join('\n');
+    // Журнал не менялся — не пересобираем textarea (и не сбиваем выделение)
+    if (store.version === _logsVersion) return;
+    _logsVersion = store.version;
+    ta.value = store.text();
     ta.scrollTop = ta.scrollHeight;
 }
 
@@ -457,7 +430,30 @@ function openTab(tabId, btn) {
 }
 
 // --- ЛОГИКА ОБНОВЛЕНИЯ БАЗ ДАННЫХ ---
-const DB_GITHUB_API = "https://api.github.com/repos/Sankyuubigan/rivals_counter_peaks/contents/overwolf_app/database/stats?ref=master";
+// Адрес подменяет только debug-страница (debug/overwolf-mock.js, ?github=...):
+// window.DB_GITHUB_API_OVERRIDE с query string — ниже дописывается &t=...
+const DB_GITHUB_API = window.DB_GITHUB_API_OVERRIDE
+    || "https://api.github.com/repos/Sankyuubigan/rivals_counter_peaks/contents/overwolf_app/database/stats?ref=master";
+
+// Сборка базы из патчей (stats/patches рядом с файлом на GitHub) от одной из
+// локальных баз: скачанных или встроенной. null — патчами не обойтись.
+async function buildDbFromPatches(fileName, downloadUrl) {
+    let localNames = Object.keys(DbStorage.list());
+    let builtInName = null;
+    try {
+        let latestRes = await fetch('../../database/stats/latest.json');
+        if (latestRes.ok) builtInName = (await latestRes.json()).current || null;
+    } catch (e) {}
+    if (builtInName && !localNames.includes(builtInName)) localNames.push(builtInName);
+
+    let loadLocal = async (name) => {
+        if (DbStorage.has(name)) return DbStorage.get(name);
+        let res = await fetch(`../../database/stats/${name}`);
+        return res.ok ? res.json() : null;
+    };
+    let indexUrl = new URL('patches/index.json', downloadUrl).href + "?t=" + Date.now();
+    return DbPatches.build(fileName, indexUrl, localNames, loadLocal, appLog);
+}
 
 function renderDbList(githubFiles = []) {
     const container = document.getElementById('db-list-container');
@@ -466,7 +462,7 @@ function renderDbList(githubFiles = []) {
     container.innerHTML = '';
     
     const activeDbName = localStorage.getItem('active_db_name') || 'local';
-    const savedDbs = JSON.parse(localStorage.getItem('saved_dbs') || '{}');
+    const savedDbs = DbStorage.list();
     
     const builtInFileName = (bgWindow.marvelLogic && bgWindow.marvelLogic.gameEntities) 
         ? bgWindow.marvelLogic.gameEntities.default_db_file 
@@ -516,42 +512,51 @@ function createDbRowItem(displayName, fileName, downloadUrl, isActive, isDownloa
                 reloadAppLogic(`База ${fileName} активирована!`);
             } else if (downloadUrl) {
                 msgEl.innerText = "Скачивание...";
-                const url = downloadUrl + "?t=" + Date.now();
-                appLog(`Скачивание базы "${fileName}" с ${url}`);
                 try {
-                    let res;
+                    let data = null;
+                    let size = null;
                     try {
-                        res = await fetch(url);
-                    } catch (netErr) {
-                        throw new Error(`Сетевая ошибка при запросе к ${url}: ${netErr && netErr.message ? netErr.message : netErr}`);
+                        let built = await buildDbFromPatches(fileName, downloadUrl);
+                        if (built) data = built.data;
+                    } catch (patchErr) {
+                        appLog(`Патчи для "${fileName}" не применены (${patchErr && patchErr.message ? patchErr.message : patchErr}), качаем файл целиком`);
                     }
 
-                    appLog(`Ответ сервера: HTTP ${res.status} ${res.statusText}`);
-
-                    if (!res.ok) {
-                        let bodyText = '';
-                        try { bodyText = await res.text(); } catch (_) {}
-                        throw new Error(`HTTP ${res.status} ${res.statusText}. Тело ответа: ${bodyText.slice(0, 500)}`);
+                    if (!data) {
+                        const url = downloadUrl + "?t=" + Date.now();
+                        appLog(`Скачивание базы "${fileName}" с ${url}`);
+                        let res;
+                        try {
+                            res = await fetch(url);
+                        } catch (netErr) {
+                            throw new Error(`Сетевая ошибка при запросе к ${url}: ${netErr && netErr.message ? netErr.message : netErr}`);
+                        }
+
+                        appLog(`Ответ сервера: HTTP ${res.status} ${res.statusText}`);
+
+                        if (!res.ok) {
+                            let bodyText = '';
+                            try { bodyText = await res.text(); } catch (_) {}
+                            throw new Error(`HTTP ${res.status} ${res.statusText}. Тело ответа: ${bodyText.slice(0, 500)}`);
+                        }
+
+                        let rawText = await res.text();
+                        try {
+                            data = JSON.parse(rawText);
+                        } catch (parseErr) {
+                            throw new Error(`Не удалось распарсить JSON (${parseErr.message}). Начало ответа: ${rawText.slice(0, 300)}`);
+                        }
+
+                        if (!data || (typeof data === 'object' && !data.heroes && !data.teamups)) {
+                            throw new Error(`Скачанный файл не похож на базу данных (нет полей heroes/teamups). Ключи: ${data && typeof data === 'object' ? Object.keys(data).join(', ') : typeof data}`);
+                        }
+                        size = rawText.length;
                     }
 
-                    let rawText = await res.text();
-                    let data;
                     try {
-                        data = JSON.parse(rawText);
-                    } catch (parseErr) {
-                        throw new Error(`Не удалось распарсить JSON (${parseErr.message}). Начало ответа: ${rawText.slice(0, 300)}`);
-                    }
-
-                    if (!data || (typeof data === 'object' && !data.heroes && !data.teamups)) {
-                        throw new Error(`Скачанный файл не похож на базу данных (нет полей heroes/teamups). Ключи: ${data && typeof data === 'object' ? Object.keys(data).join(', ') : typeof data}`);
-                    }
-
-                    let savedDbs = JSON.parse(localStorage.getItem('saved_dbs') || '{}');
-                    savedDbs[fileName] = data;
-                    try {
-                        localStorage.setItem('saved_dbs', JSON.stringify(savedDbs));
+                        await DbStorage.put(fileName, data, size);
                     } catch (storageErr) {
-                        throw new Error(`Не удалось сохранить в localStorage (возможно, превышен лимит): ${storageErr.message}`);
+                        throw new Error(`Не удалось сохранить базу в IndexedDB: ${storageErr && storageErr.message ? storageErr.message : storageErr}`);
                     }
                     localStorage.setItem('active_db_name', fileName);
 
@@ -574,10 +579,12 @@ function createDbRowItem(displayName, fileName, downloadUrl, isActive, isDownloa
         btnDel.style.backgroundColor = '#f38ba8';
         btnDel.style.color = '#11111b';
         btnDel.innerText = getTranslation('db_btn_delete');
-        btnDel.onclick = () => {
-            let savedDbs = JSON.parse(localStorage.getItem('saved_dbs') || '{}');
-            delete savedDbs[fileName];
-            localStorage.setItem('saved_dbs', JSON.stringify(savedDbs));
+        btnDel.onclick = async () => {
+            try {
+                await DbStorage.remove(fileName);
+            } catch (e) {
+                appLogError(`Ошибка удаления базы "${fileName}": ${e && e.message ? e.message : e}`);
+            }
             
             if (isActive) {
                 localStorage.setItem('active_db_name', 'local');
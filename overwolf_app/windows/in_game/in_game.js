@@ -3,20 +3,12 @@ let bgWindow = overwolf.windows.getMainWindow();
 // Логгер окна трея: пишем в общий лог-стор (вкладка "Логи" в десктопе),
 // а не только в dev console.
 function owLog(level, args) {
-    let text = Array.from(args).map(a => {
-        if (typeof a === 'object' && a !== null) {
-            try { return JSON.stringify(a); } catch (e) { return String(a); }
-        }
-        return String(a);
-    }).join(' ');
+    // Журнал живёт в background: объекты этого окна он сохраняет строкой сразу
     try {
-        if (bgWindow && bgWindow.appLogs) {
-            bgWindow.appLogs.push(`[${new Date().toLocaleTimeString()}][${level}][IN_GAME] ${text}`);
-            if (bgWindow.appLogs.length > 1000) bgWindow.appLogs.shift();
-        }
+        if (bgWindow && bgWindow.appLogStore) bgWindow.appLogStore.write(level, args, 'IN_GAME', true);
     } catch (e) {}
-    if (level === 'ERROR') console.error('[IN_GAME]', text);
-    else console.log('[IN_GAME]', text);
+    if (level === 'ERROR') console.error('[IN_GAME]', ...args);
+    else console.log('[IN_GAME]', ...args);
 }
 
 // Перехват JS-ошибок окна трея, чтобы краши рендера были видны в логах.
@@ -40,6 +32,8 @@ const imageCache = {};
 function applyHeroImage(element, heroName) {
     if (!heroName) return;
     let formatted = (bgWindow && bgWindow.marvelLogic ? bgWindow.marvelLogic.heroIconName(heroName) : heroName.toLowerCase().trim().replace(/\s*\&\s*/g, ' ').replace(/\(([^)]+)\)/g, ' $1').replace(/[^\w-]+/g, ' ').trim().replace(/[\s-]+/g, '_'));
+    // Портрет из общего атласа — без отдельной загрузки; нет атласа/иконки — отдельный PNG
+    if (HeroAtlas.apply(element, formatted)) return;
     let localUrl = `../../resources/heroes_icons/${formatted}.png`;
     let githubUrl = `https://raw.githubusercontent.com/Sankyuubigan/rivals_counter_peaks/master/overwolf_app/resources/heroes_icons/${formatted}.png`;
 
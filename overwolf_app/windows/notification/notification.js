@@ -5,20 +5,12 @@ try { bgWindow = overwolf.windows.getMainWindow(); } catch (e) {}
 
 // Мини-логгер уведомления: пишем в общий лог-стор (вкладка "Логи" в десктопе).
 function notifLog(level, args) {
-    let text = Array.from(args).map(a => {
-        if (typeof a === 'object' && a !== null) {
-            try { return JSON.stringify(a); } catch (e) { return String(a); }
-        }
-        return String(a);
-    }).join(' ');
+    // Журнал живёт в background: объекты этого окна он сохраняет строкой сразу
     try {
-        if (bgWindow && bgWindow.appLogs) {
-            bgWindow.appLogs.push(`[${new Date().toLocaleTimeString()}][${level}][NOTIFY] ${text}`);
-            if (bgWindow.appLogs.length > 1000) bgWindow.appLogs.shift();
-        }
+        if (bgWindow && bgWindow.appLogStore) bgWindow.appLogStore.write(level, args, 'NOTIFY', true);
     } catch (e) {}
-    if (level === 'ERROR') console.error('[NOTIFY]', text);
-    else console.log('[NOTIFY]', text);
+    if (level === 'ERROR') console.error('[NOTIFY]', ...args);
+    else console.log('[NOTIFY]', ...args);
 }
 
 window.addEventListener('error', function(ev) {
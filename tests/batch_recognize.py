@@ -0,0 +1,168 @@
+"""
+Пакетное распознавание архива скриншотов.
+
+Обходит дерево папок, раздаёт файлы пулу процессов (одна ONNX-сессия на
+процесс, общий бюджет потоков делится между процессами) и построчно пишет
+результаты в JSONL: файл, герои, уверенности, позиции, время по стадиям.
+
+Повторный запуск с тем же --output продолжает с места остановки: файлы,
+для которых уже есть успешная строка, пропускаются.
+
+    python tests/batch_recognize.py screenshots --output results.jsonl
+    python tests/batch_recognize.py D:/drafts --workers 4 --threads 8
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing as mp
+from typing import Dict, List, Optional, Set
+
+from recognition_common import PROJECT_ROOT, DEBUG_DIR
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+DEFAULT_OUTPUT = os.path.join(DEBUG_DIR, "batch_results.jsonl")
+
+logger = logging.getLogger("batch_recognize")
+
+# Распознаватель процесса пула (создаётся в initializer)
+_recognizer = None
+_init_error = None
+
+
+def walk_images(root: str) -> List[str]:
+    """Все изображения под root, пути относительно root, в стабильном порядке."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(dirpath, fname), root).replace(os.sep, "/"))
+    return found
+
+
+def load_done(output: str) -> Set[str]:
+    """Файлы, уже успешно обработанные в прошлых запусках."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # недописанная строка после аварийной остановки
+            if "error" not in record and "file" in record:
+                done.add(record["file"])
+    return done
+
+
+def ensure_trailing_newline(output: str):
+    """Если прошлый запуск оборвался посреди строки, дописанная запись начнётся с новой."""
+    if not os.path.exists(output) or os.path.getsize(output) == 0:
+        return
+    with open(output, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def split_threads(threads: int, workers: int) -> int:
+    """intra_op потоков на процесс, чтобы суммарно не выйти за бюджет."""
+    return max(1, threads // max(workers, 1))
+
+
+def _init_worker(recognizer_kwargs: Dict):
+    # Исключение в initializer заставило бы Pool бесконечно перезапускать
+    # процессы — поэтому ошибка запоминается и возвращается из _process.
+    global _recognizer, _init_error
+    try:
+        from recognition_pipeline import StagedRecognizer
+        _recognizer = StagedRecognizer(**recognizer_kwargs)
+        if not (_recognizer.load_model() and _recognizer.load_embeddings()):
+            _init_error = "Не удалось загрузить модель или эмбеддинги"
+    except Exception as e:
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _process(task) -> Dict:
+    root, rel = task
+    if _init_error:
+        return {"file": rel, "error": _init_error, "fatal": True}
+    timings: Dict[str, float] = {}
+    t = time.perf_counter()
+    try:
+        detections = _recognizer.recognize_file(os.path.join(root, rel), timings)
+    except Exception as e:
+        return {"file": rel, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "file": rel,
+        "heroes": [d["hero"] for d in detections],
+        "confidences": [round(d["confidence"], 4) for d in detections],
+        "positions": [list(d["position"]) for d in detections],
+        "timings_ms": {k: round(v * 1000.0, 2) for k, v in timings.items()},
+        "total_ms": round((time.perf_counter() - t) * 1000.0, 2),
+        "worker": os.getpid(),
+    }
+
+
+def run(root: str, output: str, workers: int, threads: int, limit: Optional[int] = None,
+        chunksize: int = 4) -> Dict:
+    files = walk_images(root)
+    done = load_done(output)
+    pending = [f for f in files if f not in done][:limit]
+    logger.info(f"Найдено {len(files)} файлов, уже обработано {len(done)}, в очереди {len(pending)}")
+    if not pending:
+        return {"processed": 0, "errors": 0, "skipped": len(done)}
+
+    intra = split_threads(threads, workers)
+    recognizer_kwargs = {"session_options": {"intra_op_threads": intra, "inter_op_threads": 1}}
+    logger.info(f"Процессов: {workers}, потоков на процесс: {intra}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    ensure_trailing_newline(output)
+    processed = errors = 0
+    t0 = time.perf_counter()
+    with open(output, "a", encoding="utf-8") as out, \
+            mp.Pool(workers, initializer=_init_worker, initargs=(recognizer_kwargs,)) as pool:
+        for record in pool.imap_unordered(_process, ((root, f) for f in pending), chunksize=chunksize):
+            if record.get("fatal"):
+                logger.error(f"Воркер не запустился: {record['error']}")
+                errors += 1
+                break
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()  # строка на диске сразу — перезапуск не потеряет готовое
+            processed += 1
+            if "error" in record:
+                errors += 1
+                logger.warning(f"{record['file']}: {record['error']}")
+            if processed % 50 == 0 or processed == len(pending):
+                rate = processed / (time.perf_counter() - t0)
+                logger.info(f"{processed}/{len(pending)} ({rate:.2f} файл/с)")
+    return {"processed": processed, "errors": errors, "skipped": len(done),
+            "elapsed_s": round(time.perf_counter() - t0, 2)}
+
+
+def main(argv=None) -> int:
+    cpu = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Пакетное распознавание скриншотов пулом процессов")
+    parser.add_argument("root", nargs="?", default=os.path.join(PROJECT_ROOT, "screenshots"))
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSONL с результатами (дописывается)")
+    parser.add_argument("--workers", type=int, default=max(1, cpu // 2), help="Процессов в пуле")
+    parser.add_argument("--threads", type=int, default=cpu, help="Общий бюджет потоков onnxruntime")
+    parser.add_argument("--limit", type=int, default=None, help="Обработать не больше N новых файлов")
+    parser.add_argument("--restart", action="store_true", help="Начать заново, удалив прежний вывод")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    summary = run(args.root, args.output, args.workers, args.threads, args.limit)
+    logger.info(f"Итог: {summary}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
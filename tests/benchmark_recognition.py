@@ -0,0 +1,283 @@
+"""
+Бенчмарк распознавания героев.
+
+Прогоняет каждый скриншот N раз (после прогрева), собирает p50/p95/p99 по
+стадиям конвейера (load, crop, windowing, inference, matching, nms),
+пропускную способность, пиковый RSS и precision/recall/F1 из
+calculate_metrics. Результат пишется в JSON и сравнивается с сохранённым
+baseline — при регрессии скрипт завершается с кодом 1.
+
+Что замеряется (--entry):
+  * pipeline (по умолчанию) — StagedRecognizer из recognition_pipeline.py,
+    порт распознавания с явными стадиями. Это НЕ тот код, который запускает
+    приложение: регрессии в hero_recognition_system этот режим не увидит;
+  * system — HeroRecognitionSystem, как в check_recognition.py: обрезка
+    области + recognize_heroes_optimized. По стадиям видны только crop и
+    общее время (остальные стадии внутри системы не размечены).
+Baseline хранит точку входа и сравнивается только с прогоном той же.
+
+Примеры:
+    python tests/benchmark_recognition.py --iterations 20
+    python tests/benchmark_recognition.py --update-baseline
+    python tests/benchmark_recognition.py --screenshots screenshots --no-baseline
+    python tests/benchmark_recognition.py --entry system --baseline system_baseline.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from recognition_common import (
+    PROJECT_ROOT, SCREENSHOTS_DIR, CORRECT_ANSWERS_FILE, MODEL_PATH,
+    STAGES, calculate_metrics, load_correct_answers,
+)
+from latency_stats import summarize
+
+BASELINE_FILE = os.path.join(PROJECT_ROOT, "tests", "for_recogn", "benchmark_baseline.json")
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "tests", "debug", "benchmark_result.json")
+
+# Допуски при сравнении с baseline
+LATENCY_TOLERANCE = 0.20   # p95 может вырасти не более чем на 20%
+THROUGHPUT_TOLERANCE = 0.15  # пропускная способность может упасть не более чем на 15%
+F1_TOLERANCE = 0.01        # абсолютное падение среднего F1
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("recognition_benchmark")
+
+
+# =============================================================================
+# СТАТИСТИКА
+# =============================================================================
+def peak_rss_mb() -> Optional[float]:
+    """Пиковое потребление памяти процессом (МБ) или None, если узнать нельзя."""
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдаёт килобайты, macOS — байты
+        return round(rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024.0 * 1024.0), 1)
+    except ImportError:
+        return None
+
+
+def compare_with_baseline(result: Dict, baseline: Dict) -> List[str]:
+    """Возвращает список найденных регрессий (пустой — всё в порядке)."""
+    entry = (result.get("meta") or {}).get("entry", "pipeline")
+    base_entry = (baseline.get("meta") or {}).get("entry", "pipeline")
+    if entry != base_entry:
+        return [f"baseline снят для точки входа '{base_entry}', а прогон — для '{entry}'"]
+    problems = []
+    for stage, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base.get("p95"):
+            continue
+        limit = base["p95"] * (1 + LATENCY_TOLERANCE)
+        if stats["p95"] > limit:
+            problems.append(f"стадия '{stage}': p95 {stats['p95']:.1f} мс > {limit:.1f} мс (baseline {base['p95']:.1f})")
+
+    base_total = baseline.get("total", {}).get("p95")
+    if base_total and result["total"]["p95"] > base_total * (1 + LATENCY_TOLERANCE):
+        problems.append(f"общее время: p95 {result['total']['p95']:.1f} мс > baseline {base_total:.1f} мс + {LATENCY_TOLERANCE:.0%}")
+
+    base_fps = baseline.get("throughput_fps")
+    if base_fps and result["throughput_fps"] < base_fps * (1 - THROUGHPUT_TOLERANCE):
+        problems.append(f"пропускная способность {result['throughput_fps']:.2f} кадр/с < baseline {base_fps:.2f} - {THROUGHPUT_TOLERANCE:.0%}")
+
+    base_f1 = (baseline.get("accuracy") or {}).get("f1")
+    cur_f1 = (result.get("accuracy") or {}).get("f1")
+    if base_f1 is not None and cur_f1 is not None and cur_f1 < base_f1 - F1_TOLERANCE:
+        problems.append(f"средний F1 упал: {cur_f1:.3f} < baseline {base_f1:.3f}")
+    return problems
+
+
+# =============================================================================
+# ПРОГОН
+# =============================================================================
+def collect_screenshots(directory: str) -> List[str]:
+    files = [f for f in os.listdir(directory) if f.lower().endswith(".png")]
+    # 1.png, 2.png, ... 10.png сортируем численно, остальные — по имени
+    files.sort(key=lambda f: (0, int(f[:-4]), "") if f[:-4].isdigit() else (1, 0, f))
+    return [os.path.join(directory, f) for f in files]
+
+
+class SystemRecognizer:
+    """HeroRecognitionSystem (распознаватель приложения) с интерфейсом StagedRecognizer."""
+
+    def __init__(self, roi_cache: bool = False):
+        from hero_recognition_system import HeroRecognitionSystem
+        self.system = HeroRecognitionSystem()
+        self.roi_cache = roi_cache
+
+    def load_model(self) -> bool:
+        return self.system.load_model()
+
+    def load_embeddings(self) -> bool:
+        return self.system.load_embeddings()
+
+    def recognize_file(self, path: str, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        import numpy as np
+        from PIL import Image
+
+        timings = {} if timings is None else timings
+        t = time.perf_counter()
+        if self.roi_cache:
+            from roi_cache import load_roi
+            roi = Image.fromarray(np.asarray(load_roi(path)[0]))
+        else:
+            with Image.open(path) as img:
+                roi = self.system.crop_image_to_recognition_area(img.convert("RGB"))
+        timings["crop"] = time.perf_counter() - t
+        heroes = self.system.recognize_heroes_optimized(roi)
+        return [{"hero": self.system.normalize_hero_name_for_display(h)} for h in heroes]
+
+
+def run_benchmark(screenshots: List[str], answers: Dict, iterations: int, warmup: int,
+                  roi_cache: bool = False, entry: str = "pipeline") -> Dict:
+    if entry == "system":
+        recognizer = SystemRecognizer(roi_cache=roi_cache)
+    else:
+        from recognition_pipeline import StagedRecognizer
+        recognizer = StagedRecognizer(known_names=answers.get("all_heroes", []), roi_cache=roi_cache)
+    if not (recognizer.load_model() and recognizer.load_embeddings()):
+        raise RuntimeError("Не удалось загрузить модель или эмбеддинги")
+
+    stage_samples: Dict[str, List[float]] = {s: [] for s in STAGES}
+    total_samples: List[float] = []
+    per_image = {}
+
+    for path in screenshots:
+        test_id = os.path.splitext(os.path.basename(path))[0]
+        for _ in range(warmup):
+            recognizer.recognize_file(path)
+
+        heroes: List[str] = []
+        for _ in range(iterations):
+            timings: Dict[str, float] = {}
+            t = time.perf_counter()
+            detections = recognizer.recognize_file(path, timings)
+            total_samples.append(time.perf_counter() - t)
+            for stage in STAGES:
+                stage_samples[stage].append(timings.get(stage, 0.0))
+            heroes = [d["hero"] for d in detections]
+
+        image = {"recognized": heroes}
+        if test_id in answers:
+            image["metrics"] = calculate_metrics(heroes, answers[test_id])
+        per_image[test_id] = image
+        logger.info(f"{test_id}: {heroes}")
+
+    scored = [e["metrics"] for e in per_image.values() if "metrics" in e]
+    accuracy = None
+    if scored:
+        accuracy = {k: round(sum(m[k] for m in scored) / len(scored), 4) for k in ("precision", "recall", "f1")}
+
+    total_time = sum(total_samples)
+    try:
+        import onnxruntime
+        ort_version = onnxruntime.__version__
+    except ImportError:
+        ort_version = None
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "entry": entry,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "onnxruntime": ort_version,
+            "model": os.path.relpath(MODEL_PATH, PROJECT_ROOT),
+            "iterations": iterations,
+            "warmup": warmup,
+            "roi_cache": roi_cache,
+            "screenshots": len(screenshots),
+        },
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        "total": summarize(total_samples),
+        "throughput_fps": round(len(total_samples) / total_time, 3) if total_time else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "accuracy": accuracy,
+        "per_image": per_image,
+    }
+
+
+def print_report(result: Dict):
+    logger.info(f"\n{'='*70}\nБЕНЧМАРК РАСПОЗНАВАНИЯ\n{'='*70}")
+    logger.info(f"{'Стадия':<12} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10} {'mean, мс':>10}")
+    rows = list(result["stages"].items()) + [("ИТОГО", result["total"])]
+    for name, s in rows:
+        logger.info(f"{name:<12} {s['p50']:>10.2f} {s['p95']:>10.2f} {s['p99']:>10.2f} {s['mean']:>10.2f}")
+    logger.info(f"Пропускная способность: {result['throughput_fps']:.2f} кадр/с")
+    if result["peak_rss_mb"] is not None:
+        logger.info(f"Пиковый RSS: {result['peak_rss_mb']:.1f} МБ")
+    if result["accuracy"]:
+        acc = result["accuracy"]
+        logger.info(f"Precision: {acc['precision']:.3f}, Recall: {acc['recall']:.3f}, F1: {acc['f1']:.3f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк распознавания героев с перцентилями по стадиям")
+    parser.add_argument("--screenshots", default=SCREENSHOTS_DIR, help="Папка со скриншотами (*.png)")
+    parser.add_argument("--answers", default=CORRECT_ANSWERS_FILE, help="JSON с правильными ответами")
+    parser.add_argument("--iterations", type=int, default=10, help="Замеряемых прогонов на скриншот")
+    parser.add_argument("--warmup", type=int, default=2, help="Прогревочных прогонов на скриншот")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Куда записать JSON с результатом")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON baseline для сравнения")
+    parser.add_argument("--update-baseline", action="store_true", help="Сохранить результат как новый baseline")
+    parser.add_argument("--no-baseline", action="store_true", help="Не сравнивать с baseline")
+    parser.add_argument("--roi-cache", action="store_true",
+                        help="Читать обрезанные области из .npy-кэша (roi_cache.py) вместо PNG")
+    parser.add_argument("--entry", choices=("pipeline", "system"), default="pipeline",
+                        help="pipeline — StagedRecognizer (порт по стадиям), system — HeroRecognitionSystem приложения")
+    args = parser.parse_args(argv)
+
+    screenshots = collect_screenshots(args.screenshots)
+    if not screenshots:
+        logger.error(f"В {args.screenshots} нет скриншотов")
+        return 2
+    answers = load_correct_answers(args.answers) if os.path.exists(args.answers) else {}
+
+    result = run_benchmark(screenshots, answers, args.iterations, args.warmup, args.roi_cache, args.entry)
+    print_report(result)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    logger.info(f"Результат сохранён: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        logger.info(f"Baseline обновлён: {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        logger.warning(f"Baseline не найден ({args.baseline}). Запустите с --update-baseline, чтобы создать его.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    problems = compare_with_baseline(result, baseline)
+    if problems:
+        logger.error("РЕГРЕССИЯ относительно baseline:")
+        for p in problems:
+            logger.error(f"  - {p}")
+        return 1
+    logger.info("Регрессий относительно baseline нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
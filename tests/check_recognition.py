@@ -2,30 +2,25 @@ import os
 import sys
 import time
 import json
+import math
 import logging
-import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
-from PIL import Image
-import onnxruntime
+import importlib.util
 import shutil
-from hero_recognition_system import HeroRecognitionSystem
-# Установка Numba (если еще не установлена)
-try:
-    from numba import jit
-    NUMBA_AVAILABLE = True
-except ImportError:
-    NUMBA_AVAILABLE = False
+# numpy, PIL, HeroRecognitionSystem и кэш ROI импортируются в main(), Numba
+# проверяем без импорта: сам импорт и JIT-компиляция откладываются до первого
+# вызова get_embeddings_for_batch_jit.
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+if not NUMBA_AVAILABLE:
     print("Numba не установлена. Установите: pip install numba")
-# =============================================================================
-# ПУТИ К РЕСУРСАМ
-# =============================================================================
-MODEL_PATH = "vision_models/dinov3-vitb16-pretrain-lvd1689m/model_q4.onnx"
-EMBEDDINGS_DIR = "resources/embeddings_padded"
-SCREENSHOTS_DIR = "tests/for_recogn/screenshots"
-CORRECT_ANSWERS_FILE = "tests/for_recogn/correct_answers.json"
-DEBUG_DIR = "tests/debug"
+from recognition_common import (
+    MODEL_PATH, EMBEDDINGS_DIR, SCREENSHOTS_DIR, CORRECT_ANSWERS_FILE, DEBUG_DIR,
+    TARGET_SIZE, LEFT_OFFSET, IMAGE_MEAN, IMAGE_STD, CONFIDENCE_THRESHOLD, MAX_HEROES,
+    BATCH_SIZE_SLIDING_WINDOW_DINO, HERO_SQUARE_SIZE, STEP_SIZE, RECOGNITION_AREA,
+    calculate_metrics,
+)
 # Создаем директорию для отладки
 os.makedirs(DEBUG_DIR, exist_ok=True)
 LOG_FILENAME = "recognition_test.log"
@@ -52,120 +47,47 @@ file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 # =============================================================================
-# ОСНОВНЫЕ НАСТРОЙКИ
-# =============================================================================
-TARGET_SIZE = 224
-LEFT_OFFSET = 45
-# =============================================================================
-# КОНСТАНТЫ
-# =============================================================================
-IMAGE_MEAN = [0.485, 0.456, 0.406]
-IMAGE_STD = [0.229, 0.224, 0.225]
-# Параметры для распознавания - УВЕЛИЧЕН ПОРОГ УВЕРЕННОСТИ
-CONFIDENCE_THRESHOLD = 0.70  # Было 0.65
-MAX_HEROES = 6
-BATCH_SIZE_SLIDING_WINDOW_DINO = 32
-# Параметры для поиска квадратов
-HERO_SQUARE_SIZE = 95
-STEP_SIZE = HERO_SQUARE_SIZE // 4  # Шаг как в Rust коде
-RECOGNITION_AREA = {
-    'monitor': 1, 'left_pct': 50, 'top_pct': 20, 'width_pct': 20, 'height_pct': 50
-}
-# =============================================================================
-# НОВЫЕ ФУНКЦИИ ДЛЯ NMS
-# =============================================================================
-def box_area(box):
-    """Вычислить площадь bounding box"""
-    return (box[2] - box[0]) * (box[3] - box[1])
-def box_iou_batch(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
-    """Векторизованный расчет IoU для двух наборов bounding boxes"""
-    area_a = box_area(boxes_a.T)
-    area_b = box_area(boxes_b.T)
-    
-    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[:, :2])
-    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[:, 2:])
-    
-    area_inter = np.prod(
-        np.clip(bottom_right - top_left, a_min=0, a_max=None), axis=2
-    )
-    
-    return area_inter / (area_a[:, None] + area_b - area_inter)
-def non_max_suppression(detections: List[Dict], iou_threshold: float = 0.4) -> List[Dict]:
-    """Non-Maximum Suppression для удаления пересекающихся детекций"""
-    if not detections:
-        return []
-    
-    # Сортируем детекции по уверенности (по убыванию)
-    detections_sorted = sorted(detections, key=lambda x: x['confidence'], reverse=True)
-    
-    # Преобразуем в формат для NMS
-    boxes = []
-    scores = []
-    for det in detections_sorted:
-        x, y = det['position']
-        w, h = det['size']
-        boxes.append([x, y, x + w, y + h])  # [x1, y1, x2, y2]
-        scores.append(det['confidence'])
-    
-    boxes = np.array(boxes)
-    scores = np.array(scores)
-    
-    # Рассчитываем IoU для всех пар
-    ious = box_iou_batch(boxes, boxes)
-    np.fill_diagonal(ious, 0)  # Исключаем сравнение с самим собой
-    
-    keep = []
-    suppressed = np.zeros(len(boxes), dtype=bool)
-    
-    for i in range(len(boxes)):
-        if suppressed[i]:
-            continue
-            
-        keep.append(i)
-        
-        # Подавляем все детекции с высоким IoU
-        suppress_indices = np.where(ious[i] > iou_threshold)[0]
-        suppressed[suppress_indices] = True
-    
-    # Возвращаем оригинальные детекции в правильном порядке
-    result = [detections_sorted[i] for i in keep]
-    return result
-# =============================================================================
 # УСКОРЕНИЕ С NUMBA
 # =============================================================================
-if NUMBA_AVAILABLE:
-    @jit(nopython=True)
-    def get_embeddings_for_batch_jit(arrays_data, embeddings_shape):
-        """Ускоренная обработка эмбеддингов"""
-        batch_size = embeddings_shape[0]
-        emb_size = embeddings_shape[1]
-        embeddings = np.zeros((batch_size, emb_size), dtype=np.float32)
-        
-        for i in range(batch_size):
-            start_idx = i * emb_size
-            end_idx = start_idx + emb_size
-            embedding = arrays_data[start_idx:end_idx]
-            
-            # Нормализация
-            norm = 0.0
+def _get_embeddings_for_batch(arrays_data, embeddings):
+    """Ускоренная обработка эмбеддингов: строки arrays_data, нормированные, в embeddings"""
+    batch_size = embeddings.shape[0]
+    emb_size = embeddings.shape[1]
+
+    for i in range(batch_size):
+        start_idx = i * emb_size
+        end_idx = start_idx + emb_size
+        embedding = arrays_data[start_idx:end_idx]
+
+        # Нормализация
+        norm = 0.0
+        for j in range(emb_size):
+            norm += embedding[j] * embedding[j]
+        norm = math.sqrt(norm)
+
+        if norm > 1e-6:
             for j in range(emb_size):
-                norm += embedding[j] * embedding[j]
-            norm = np.sqrt(norm)
-            
-            if norm > 1e-6:
-                for j in range(emb_size):
-                    embeddings[i, j] = embedding[j] / norm
-        
-        return embeddings
+                embeddings[i, j] = embedding[j] / norm
+
+
+_embeddings_kernel = None
+
+
+def get_embeddings_for_batch_jit(arrays_data, embeddings_shape):
+    """Компилирует ядро при первом вызове; cache=True сохраняет машинный код
+    на диск, поэтому следующие запуски не тратят время на JIT."""
+    global _embeddings_kernel
+    import numpy as np
+    if _embeddings_kernel is None:
+        if NUMBA_AVAILABLE:
+            from numba import njit
+            _embeddings_kernel = njit(cache=True)(_get_embeddings_for_batch)
+        else:
+            _embeddings_kernel = _get_embeddings_for_batch
+    embeddings = np.zeros(embeddings_shape, dtype=np.float32)
+    _embeddings_kernel(arrays_data, embeddings)
+    return embeddings
 
-def calculate_metrics(recognized, expected):
-    rec_set, exp_set = set(recognized), set(expected)
-    correct = len(rec_set & exp_set)
-    fp, fn = len(rec_set - exp_set), len(exp_set - rec_set)
-    precision = correct / len(rec_set) if rec_set else 0
-    recall = correct / len(exp_set) if exp_set else 0
-    f1 = 2*precision*recall / (precision+recall) if (precision+recall) > 0 else 0
-    return {'correct': correct, 'false_positive': fp, 'false_negative': fn, 'precision': precision, 'recall': recall, 'f1': f1}
 def print_test_summary(total_stats, recognition_times):
     logging.info(f"\n{'='*60}\nСВОДНЫЙ ОТЧЕТ ПО ТЕСТИРОВАНИЮ\n{'='*60}")
     logging.info(f"Всего тестов: {total_stats['total_tests']}")
@@ -191,6 +113,11 @@ def print_test_summary(total_stats, recognition_times):
             logging.info(f"(Ускорено с помощью Numba JIT)")
         logging.info(f"{'='*60}")
 def main():
+    import numpy as np
+    from PIL import Image
+    from hero_recognition_system import HeroRecognitionSystem
+    from roi_cache import load_roi
+
     if NUMBA_AVAILABLE:
         logging.info("Numba доступна - будет использовано ускорение JIT")
     else:
@@ -218,12 +145,11 @@ def main():
             
             start_time = time.time()
             
-            # Загружаем изображение
+            # Область распознавания из кэша .npy (PNG декодируется только при первом запуске).
+            # Та же recognition_box, что и у crop_image_to_recognition_area; ROI всегда RGB
             scr_path = os.path.join(SCREENSHOTS_DIR, f"{i}.png")
-            full_image = Image.open(scr_path)
-            
-            # Обрезаем до области распознавания
-            roi_image = system.crop_image_to_recognition_area(full_image)
+            roi, _ = load_roi(scr_path)
+            roi_image = Image.fromarray(np.asarray(roi))
             
             # Распознаем героев
             recognized_raw = system.recognize_heroes_optimized(roi_image, debug_id=str(i))
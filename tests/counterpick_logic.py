@@ -0,0 +1,333 @@
+"""
+Порт движка контрпиков из overwolf_app/logic.js (CounterpickLogic) на Python.
+
+Поведение совпадает с JS-версией построчно (включая parseFloat по строкам
+вида "26.46%", Math.round и порядок сортировок), чтобы офлайн-замеры и
+сравнение результатов с приложением были честными. Используется
+реплеем игровых событий (game_state_replay.py).
+"""
+import os
+import re
+import json
+import math
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from recognition_common import PROJECT_ROOT
+
+DATABASE_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "database")
+STATS_DIR = os.path.join(DATABASE_DIR, "stats")
+ENTITIES_FILE = os.path.join(DATABASE_DIR, "game_entities_dict.json")
+
+HERO_SUFFIXES = ["_icon", "_template", "_small", "_left", "_right", "_horizontal", "_adv", "_padded"]
+HERO_ALIASES = {
+    "bruce banner": "Hulk",
+    "deadpool duelist": "Deadpool (Duelist)",
+    "deadpool strategist": "Deadpool (Strategist)",
+    "deadpool vanguard": "Deadpool (Vanguard)",
+}
+ROLES = ("Vanguard", "Duelist", "Strategist")
+
+_FLOAT_PREFIX = re.compile(r"^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+
+logger = logging.getLogger("counterpick_logic")
+
+
+def parse_float(value) -> float:
+    """parseFloat из JS: число в начале строки, иначе NaN."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _FLOAT_PREFIX.match(str(value))
+    return float(m.group(0)) if m else math.nan
+
+
+def js_round(value: float) -> float:
+    """Math.round: половины округляются вверх (к +∞), а не к чётному."""
+    return math.floor(value + 0.5)
+
+
+def resolve_db_file(stats_dir: str = STATS_DIR, entities: Optional[Dict] = None) -> str:
+    """Имя файла базы так же, как в init(): latest.json, иначе default_db_file."""
+    name = (entities or {}).get("default_db_file") or "stats.json"
+    try:
+        with open(os.path.join(stats_dir, "latest.json"), "r", encoding="utf-8") as f:
+            latest = json.load(f)
+        if latest and latest.get("current"):
+            name = latest["current"]
+    except (OSError, ValueError):
+        logger.warning("latest.json недоступен, используем default_db_file")
+    return os.path.join(stats_dir, name)
+
+
+class CounterpickLogic:
+    def __init__(self):
+        self.stats_data: Dict = {}
+        self.game_entities: Dict = {}
+        self.teamups_data: List = []
+        self.hero_roles: Dict[str, List[str]] = {}
+        self.matchups_data: Dict[str, List] = {}
+        self.hero_stats_data: Dict[str, Dict] = {}
+        self.all_heroes: List[str] = []
+        self.available_maps: List[str] = []
+        self.SYNERGY_BONUS = 10.0
+        self.FAVORITE_TEAMUP_BONUS = 25.0
+        self.db_version: Optional[str] = None
+        self.is_ready = False
+        self.RESULT_CACHE_SIZE = 32
+        self.result_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.cache_hits = 0
+
+    def init(self, stats_path: Optional[str] = None, entities_path: str = ENTITIES_FILE) -> bool:
+        try:
+            with open(entities_path, "r", encoding="utf-8") as f:
+                self.game_entities = json.load(f)
+            stats_path = stats_path or resolve_db_file(entities=self.game_entities)
+            with open(stats_path, "r", encoding="utf-8") as f:
+                full_data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка загрузки баз данных: {e}")
+            return False
+        self.db_version = os.path.basename(stats_path)
+        self.load_data(full_data)
+        logger.info(f"[DB] Загружена база {self.db_version}: героев {len(self.all_heroes)}, "
+                    f"карт {len(self.available_maps)}")
+        return True
+
+    def load_data(self, full_data: Dict):
+        self.result_cache.clear()
+        self.stats_data = full_data.get("heroes") or {}
+        self.teamups_data = full_data.get("teamups") or []
+        self.all_heroes = sorted(self.stats_data)
+        self.hero_roles, self.matchups_data, self.hero_stats_data = {}, {}, {}
+
+        for hero in self.all_heroes:
+            role = self.stats_data[hero].get("role")
+            if role:
+                self.hero_roles.setdefault(role, []).append(hero)
+            self.matchups_data[hero] = self.stats_data[hero].get("opponents") or []
+            wr_str = self.stats_data[hero].get("win_rate") or "50%"
+            self.hero_stats_data[hero] = {"win_rate": parse_float(wr_str.replace("%", "")) / 100}
+
+        maps = set()
+        for hero in self.all_heroes:
+            for m in self.stats_data[hero].get("maps") or []:
+                if m.get("map_name"):
+                    maps.add(self.resolve_map_name(m["map_name"]))
+        self.available_maps = sorted(maps)
+        self.is_ready = True
+
+    def cached_result(self, key: str, compute: Callable[[], Dict]) -> Dict:
+        """LRU результатов пересчёта, как cachedResult в logic.js."""
+        if key in self.result_cache:
+            self.result_cache.move_to_end(key)
+            self.cache_hits += 1
+            return self.result_cache[key]
+        result = self.result_cache[key] = compute()
+        if len(self.result_cache) > self.RESULT_CACHE_SIZE:
+            self.result_cache.popitem(last=False)
+        return result
+
+    def resolve_map_name(self, raw_name):
+        if not raw_name:
+            return raw_name
+        lower_raw = raw_name.lower()
+        for key, name in (self.game_entities.get("map_filename_to_name") or {}).items():
+            if key.lower() == lower_raw:
+                return name
+        return raw_name
+
+    def normalize_hero_name(self, name) -> str:
+        if not name:
+            return ""
+        normalized = name.lower()
+        normalized = re.sub(r"[_ ]*v\d+$", "", normalized)
+        normalized = re.sub(r"_\d+$", "", normalized)
+        for s in HERO_SUFFIXES:
+            if normalized.endswith(s):
+                normalized = normalized[:-len(s)]
+        normalized = re.sub(r"[-_]+", " ", normalized).strip()
+
+        if normalized in HERO_ALIASES:
+            canonical = HERO_ALIASES[normalized]
+            found = next((h for h in self.all_heroes if h.lower() == canonical.lower()), None)
+            return found or canonical
+
+        found = next((h for h in self.all_heroes if h.lower() == normalized), None)
+        if found:
+            return found
+
+        capitalized = " ".join(p[0].upper() + p[1:] if p else "" for p in normalized.split(" "))
+        found = next((h for h in self.all_heroes if h == capitalized), None)
+        return found or capitalized or name
+
+    def does_map_affect_scores(self, map_name) -> bool:
+        if not map_name:
+            return False
+        lower_map = map_name.lower()
+        for hero in self.all_heroes:
+            for m in self.stats_data[hero].get("maps") or []:
+                if self.resolve_map_name(m["map_name"]).lower() == lower_map:
+                    return True
+        return False
+
+    def get_map_score(self, hero_name: str, map_name: str, min_score: float = 0, max_score: float = 20) -> float:
+        hero_data = self.stats_data.get(hero_name)
+        if not hero_data or not hero_data.get("maps"):
+            return 0
+
+        win_rates = []
+        target_map_wr = None
+        for m in hero_data["maps"]:
+            wr = parse_float(m["win_rate"].replace("%", ""))
+            if math.isnan(wr):
+                continue
+            win_rates.append(wr)
+            if self.resolve_map_name(m["map_name"]).lower() == map_name.lower():
+                target_map_wr = wr
+
+        if target_map_wr is None or not win_rates:
+            return 0
+        min_wr, max_wr = min(win_rates), max(win_rates)
+        if min_wr == max_wr:
+            return min_score
+        score = min_score + (target_map_wr - min_wr) * (max_score - min_score) / (max_wr - min_wr)
+        return js_round(score * 100) / 100
+
+    def calculate_team_counters(self, enemy_team: List[str], is_tier_list_calc: bool = False) -> List[Tuple[str, float]]:
+        if not enemy_team:
+            return []
+        hero_scores = {}
+        for hero in self.all_heroes:
+            if not is_tier_list_calc and hero in enemy_team:
+                continue
+            total_difference = 0.0
+            found_matchups = 0
+            matchups = self.matchups_data.get(hero) or []
+            for enemy in enemy_team:
+                if is_tier_list_calc and hero == enemy:
+                    continue
+                matchup = next((m for m in matchups
+                                if m.get("opponent") and m["opponent"].lower() == enemy.lower()), None)
+                if matchup:
+                    diff = -parse_float(matchup["difference"].replace("%", ""))
+                    if not math.isnan(diff):
+                        total_difference += diff
+                        found_matchups += 1
+            if found_matchups > 0:
+                hero_scores[hero] = total_difference / found_matchups
+        return sorted(hero_scores.items(), key=lambda kv: -kv[1])
+
+    def absolute_with_context(self, scores_tuples: List[Tuple[str, float]]) -> Dict[str, float]:
+        original_scores = []
+        for hero, score in scores_tuples:
+            stats = self.hero_stats_data.get(hero)
+            overall_winrate = stats["win_rate"] * 100 if stats else 50.0
+            original_scores.append((hero, (100 + score) * (overall_winrate / 50.0)))
+        if not original_scores:
+            return {}
+
+        values = [s for _, s in original_scores]
+        min_score, max_score = min(values), max(values)
+        final_scores = {}
+        for hero, original in original_scores:
+            if max_score == min_score:
+                final_scores[hero] = 50.5
+            else:
+                final_scores[hero] = (original - min_score) / (max_score - min_score) * 99 + 1
+        return final_scores
+
+    def _role_of(self, hero: str) -> Optional[str]:
+        for role, heroes in self.hero_roles.items():
+            if hero in heroes:
+                return role
+        return None
+
+    def select_optimal_team(self, sorted_scores: Dict[str, float]) -> List[str]:
+        sorted_heroes = sorted(sorted_scores.items(), key=lambda kv: -kv[1])
+        if not sorted_heroes:
+            return []
+
+        by_role = {role: [] for role in ROLES}
+        for hero, score in sorted_heroes:
+            role = self._role_of(hero)
+            if role in by_role:
+                by_role[role].append((hero, score))
+        vanguards, duelists, strategists = by_role["Vanguard"], by_role["Duelist"], by_role["Strategist"]
+
+        best_team, best_score = [], -math.inf
+        for v in range(1, 5):
+            for s in range(2, 4):
+                d = 6 - v - s
+                if d >= 0 and len(vanguards) >= v and len(strategists) >= s and len(duelists) >= d:
+                    candidates = vanguards[:v] + strategists[:s] + duelists[:d]
+                    base_score = sum(score for _, score in candidates)
+                    team_names = [hero for hero, _ in candidates]
+                    synergy_score = 0.0
+                    for teamup in self.teamups_data:
+                        heroes = teamup.get("heroes") or []
+                        if len(heroes) > 1 and all(h in team_names for h in heroes):
+                            synergy_score += self.SYNERGY_BONUS
+                    total = base_score + synergy_score
+                    if total > best_score:
+                        best_score, best_team = total, team_names
+
+        if not best_team:
+            best_team = [hero for hero, _ in sorted_heroes[:6]]
+        return best_team
+
+    def get_recommended_heroes(self, sorted_scores: Dict[str, float], ally_team: List[str] = (),
+                               banned_team: List[str] = ()) -> List[str]:
+        sorted_heroes = sorted(sorted_scores.items(), key=lambda kv: -kv[1])
+
+        current_roles = {role: 0 for role in ROLES}
+        for hero in ally_team:
+            role = self._role_of(hero)
+            if role is not None:
+                current_roles[role] = current_roles.get(role, 0) + 1
+        v, d, s = current_roles["Vanguard"], current_roles["Duelist"], current_roles["Strategist"]
+
+        needed_roles = []
+        if s < 2:
+            needed_roles.append("Strategist")
+        if v < 2:
+            needed_roles.append("Vanguard")
+        if d < 2:
+            needed_roles.append("Duelist")
+        if v >= 2 and d >= 2 and s >= 2:
+            return []
+
+        recommended = []
+        if not ally_team:
+            for role in ROLES:
+                role_heroes = self.hero_roles.get(role) or []
+                recommended += [h for h, _ in sorted_heroes if h in role_heroes and h not in banned_team]
+        else:
+            for role in needed_roles:
+                role_heroes = self.hero_roles.get(role) or []
+                recommended += [h for h, _ in sorted_heroes
+                                if h in role_heroes and h not in ally_team and h not in banned_team]
+        return list(dict.fromkeys(recommended))
+
+    def calculate_counter_scores_for_team(self, enemy_team: List[str], map_name: Optional[str] = None) -> Dict:
+        if not enemy_team:
+            return {"scores": {}, "optimalTeam": []}
+        final_scores = self.absolute_with_context(self.calculate_team_counters(enemy_team, True))
+        if map_name:
+            for hero in final_scores:
+                bonus = self.get_map_score(hero, map_name)
+                if bonus > 0:
+                    final_scores[hero] += bonus
+        return {"scores": final_scores, "optimalTeam": self.select_optimal_team(final_scores)}
+
+    def calculate_tier_list_scores(self) -> Dict[str, float]:
+        return self.absolute_with_context(self.calculate_team_counters(self.all_heroes, True))
+
+    def calculate_tier_list_scores_with_map(self, map_name: Optional[str] = None) -> Dict[str, float]:
+        scores = self.calculate_tier_list_scores()
+        if map_name:
+            for hero in scores:
+                bonus = self.get_map_score(hero, map_name)
+                if bonus > 0:
+                    scores[hero] += bonus
+        return scores
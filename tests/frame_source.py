@@ -0,0 +1,369 @@
+"""
+Источники кадров для цикла распознавания.
+
+Все источники отдают только область распознавания (RECOGNITION_AREA или
+явный регион) в виде массива RGB uint8 [H, W, 3]:
+
+- ScreenSource — захват экрана; через mss (если установлен) или
+  pyautogui, в обоих случаях копируется только регион, а не весь экран;
+- FolderSource — папка с PNG (например, screenshots/), по кругу;
+- VideoSource — видеофайл через OpenCV.
+
+FrameRing — заранее выделенный кольцевой буфер кадров: при захвате не
+создаются новые массивы, а при отставании потребителя старые кадры
+перезаписываются.
+
+Нагрузочный прогон без монитора:
+    python tests/frame_source.py screenshots --fps 30 --frames 300
+    python tests/frame_source.py match.mp4 --fps 10 --recognize
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from recognition_common import RECOGNITION_AREA, recognition_box
+
+logger = logging.getLogger("frame_source")
+
+Region = Tuple[int, int, int, int]  # left, top, right, bottom
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm")
+
+
+# =============================================================================
+# КОЛЬЦЕВОЙ БУФЕР
+# =============================================================================
+class FrameRing:
+    """Кольцевой буфер из capacity кадров одинакового размера.
+
+    Писатель получает слот через next_slot() и заполняет его на месте, затем
+    вызывает commit(); до commit() слот считается пустым (is_current() ложно). Читатель берёт latest() — самый свежий кадр — или
+    get(seq) по номеру, пока тот не перезаписан.
+
+    buffer — готовая память размера FrameRing.nbytes(...) (например,
+    multiprocessing.shared_memory): номера кадров, метки времени и сами
+    кадры лежат в ней, поэтому буфер можно читать из другого процесса.
+    """
+
+    def __init__(self, capacity: int, shape: Tuple[int, ...], dtype=np.uint8, buffer=None, init: bool = True):
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        if buffer is None:
+            buffer = bytearray(self.nbytes(capacity, self.shape, dtype))
+        header = 8 * capacity
+        # Номер кадра в каждом слоте: читатель по нему понимает, что слот перезаписан
+        self.slot_seq = np.ndarray((capacity,), dtype=np.int64, buffer=buffer, offset=0)
+        self.timestamps = np.ndarray((capacity,), dtype=np.float64, buffer=buffer, offset=header)
+        self.frames = np.ndarray((capacity,) + self.shape, dtype=dtype, buffer=buffer, offset=2 * header)
+        if init:
+            self.slot_seq[:] = -1
+        self.seq = int(self.slot_seq.max()) if not init else -1  # номер последнего записанного кадра
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def nbytes(capacity: int, shape: Tuple[int, ...], dtype=np.uint8) -> int:
+        return 16 * capacity + capacity * int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    def next_slot(self) -> np.ndarray:
+        slot = (self.seq + 1) % self.capacity
+        with self._lock:
+            # Слот сначала помечается пустым, потом перезаписывается: читатель,
+            # проверивший is_current() до и после обработки, не примет рваный кадр
+            self.slot_seq[slot] = -1
+        return self.frames[slot]
+
+    def commit(self, timestamp: Optional[float] = None) -> int:
+        with self._lock:
+            self.seq += 1
+            slot = self.seq % self.capacity
+            self.timestamps[slot] = time.perf_counter() if timestamp is None else timestamp
+            self.slot_seq[slot] = self.seq
+            return self.seq
+
+    def push(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        np.copyto(self.next_slot(), frame)
+        return self.commit(timestamp)
+
+    def is_current(self, seq: int) -> bool:
+        """Слот всё ещё содержит кадр seq (не перезаписан писателем)."""
+        return seq >= 0 and int(self.slot_seq[seq % self.capacity]) == seq
+
+    def get(self, seq: int) -> Optional[Tuple[np.ndarray, float]]:
+        """Кадр по номеру (view в буфер) или None, если он уже перезаписан."""
+        with self._lock:
+            if not self.is_current(seq):
+                return None
+            slot = seq % self.capacity
+            return self.frames[slot], float(self.timestamps[slot])
+
+    def latest(self) -> Optional[Tuple[int, np.ndarray, float]]:
+        seq = self.seq
+        item = self.get(seq)
+        return (seq,) + item if item else None
+
+
+# =============================================================================
+# ИСТОЧНИКИ
+# =============================================================================
+class FrameSource(ABC):
+    """Базовый источник. read_into() пишет кадр в готовый массив (без аллокаций)."""
+
+    def __init__(self, area: Optional[Dict] = None, region: Optional[Region] = None):
+        self.area = area or RECOGNITION_AREA
+        self.region = region
+        # Полный размер кадра/экрана — по нему распознаватель выбирает окно и масштаб эталонов
+        self.screen_size: Optional[Tuple[int, int]] = None
+
+    def _region_for(self, width: int, height: int) -> Region:
+        self.screen_size = (width, height)
+        return self.region or recognition_box(width, height, self.area)
+
+    @property
+    def frame_shape(self) -> Tuple[int, int, int]:
+        left, top, right, bottom = self.region
+        return bottom - top, right - left, 3
+
+    @abstractmethod
+    def read(self) -> Optional[np.ndarray]:
+        """Очередной кадр или None, если источник исчерпан."""
+
+    def read_into(self, out: np.ndarray) -> bool:
+        frame = self.read()
+        if frame is None:
+            return False
+        if frame.shape != out.shape:
+            # Кадры разного размера (разные разрешения в папке) приводим к размеру буфера
+            frame = np.asarray(Image.fromarray(frame).resize((out.shape[1], out.shape[0]), Image.BILINEAR))
+        np.copyto(out, frame)
+        return True
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ScreenSource(FrameSource):
+    """Захват только области распознавания с экрана."""
+
+    def __init__(self, area: Optional[Dict] = None, region: Optional[Region] = None, monitor: int = 1):
+        super().__init__(area, region)
+        try:
+            import mss
+            self._mss = mss.mss()
+            mon = self._mss.monitors[monitor]
+            self._origin = (mon["left"], mon["top"])
+            width, height = mon["width"], mon["height"]
+        except ImportError:
+            import pyautogui
+            self._mss = None
+            self._origin = (0, 0)
+            width, height = pyautogui.size()
+        self.region = self._region_for(width, height)
+
+    def read(self) -> np.ndarray:
+        left, top, right, bottom = self.region
+        if self._mss is not None:
+            shot = self._mss.grab({"left": self._origin[0] + left, "top": self._origin[1] + top,
+                                   "width": right - left, "height": bottom - top})
+            # BGRA -> RGB
+            return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)[..., 2::-1]
+        import pyautogui
+        return np.asarray(pyautogui.screenshot(region=(left, top, right - left, bottom - top)).convert("RGB"))
+
+    def close(self):
+        if self._mss is not None:
+            self._mss.close()
+
+
+class FolderSource(FrameSource):
+    """PNG из папки по кругу. preload=True декодирует ROI один раз и держит в памяти,
+    чтобы замер показывал стоимость распознавания, а не чтения с диска."""
+
+    def __init__(self, directory: str, area: Optional[Dict] = None, region: Optional[Region] = None,
+                 loop: bool = True, preload: bool = False):
+        super().__init__(area, region)
+        self._explicit_region = region
+        self.files = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                            if f.lower().endswith(".png"))
+        if not self.files:
+            raise FileNotFoundError(f"В {directory} нет PNG")
+        self.loop = loop
+        self._index = 0
+        with Image.open(self.files[0]) as img:
+            self.region = self._region_for(img.width, img.height)
+        self._cache = [self._load(p) for p in self.files] if preload else None
+
+    def _load(self, path: str) -> np.ndarray:
+        with Image.open(path) as img:
+            # Регион считается по размеру каждого файла: в папке бывают разные разрешения
+            box = self._explicit_region or recognition_box(img.width, img.height, self.area)
+            return np.asarray(img.convert("RGB").crop(box))
+
+    def read(self) -> Optional[np.ndarray]:
+        if self._index >= len(self.files):
+            if not self.loop:
+                return None
+            self._index = 0
+        i = self._index
+        self._index += 1
+        return self._cache[i] if self._cache is not None else self._load(self.files[i])
+
+
+class VideoSource(FrameSource):
+    """Кадры видеофайла (OpenCV), обрезанные до области распознавания."""
+
+    def __init__(self, path: str, area: Optional[Dict] = None, region: Optional[Region] = None,
+                 loop: bool = False):
+        super().__init__(area, region)
+        import cv2
+        self._cv2 = cv2
+        self.path = path
+        self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise IOError(f"Не удалось открыть видео: {path}")
+        width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.region = self._region_for(width, height)
+
+    def read(self) -> Optional[np.ndarray]:
+        ok, frame = self._cap.read()
+        if not ok and self.loop:
+            self._cap.set(self._cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        if not ok:
+            return None
+        left, top, right, bottom = self.region
+        return frame[top:bottom, left:right, ::-1]  # BGR -> RGB
+
+    def close(self):
+        self._cap.release()
+
+
+def open_source(spec: str, area: Optional[Dict] = None, **kwargs) -> FrameSource:
+    """'screen' — экран, папка — FolderSource, видеофайл — VideoSource."""
+    if spec == "screen":
+        return ScreenSource(area, **kwargs)
+    if os.path.isdir(spec):
+        return FolderSource(spec, area, **kwargs)
+    if spec.lower().endswith(VIDEO_EXTENSIONS):
+        return VideoSource(spec, area, **kwargs)
+    raise ValueError(f"Неизвестный источник кадров: {spec}")
+
+
+# =============================================================================
+# ЦИКЛ ЗАХВАТА
+# =============================================================================
+def capture_loop(source: FrameSource, ring: FrameRing, fps: float,
+                 max_frames: Optional[int] = None, duration: Optional[float] = None,
+                 on_frame: Optional[Callable[[int, np.ndarray], None]] = None,
+                 stop_event: Optional[threading.Event] = None) -> Dict:
+    """Пишет кадры в ring с частотой fps. Возвращает статистику захвата.
+
+    Если кадр не успели снять к следующему тику, тик пропускается (missed),
+    а не накапливается — частота не «догоняет» рывком.
+    """
+    interval = 1.0 / fps if fps > 0 else 0.0
+    grab_times: List[float] = []
+    missed = 0
+    start = next_tick = time.perf_counter()
+    frames = 0
+    while True:
+        if max_frames is not None and frames >= max_frames:
+            break
+        if duration is not None and time.perf_counter() - start >= duration:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+
+        t = time.perf_counter()
+        if not source.read_into(ring.next_slot()):
+            break
+        seq = ring.commit()
+        grab_times.append(time.perf_counter() - t)
+        frames += 1
+        if on_frame is not None:
+            on_frame(seq, ring.frames[seq % ring.capacity])
+
+        if interval:
+            next_tick += interval
+            now = time.perf_counter()
+            if now > next_tick:
+                skipped = int((now - next_tick) / interval) + 1
+                missed += skipped
+                next_tick += skipped * interval
+            else:
+                time.sleep(next_tick - now)
+
+    elapsed = time.perf_counter() - start
+    grab_ms = sorted(g * 1000.0 for g in grab_times)
+    return {
+        "frames": frames,
+        "missed_ticks": missed,
+        "elapsed_s": round(elapsed, 3),
+        "fps": round(frames / elapsed, 2) if elapsed else 0.0,
+        "grab_ms_p50": round(grab_ms[len(grab_ms) // 2], 3) if grab_ms else 0.0,
+        "grab_ms_max": round(grab_ms[-1], 3) if grab_ms else 0.0,
+    }
+
+
+def iter_frames(source: FrameSource, ring_size: int = 4) -> Iterator[Tuple[int, np.ndarray]]:
+    """Простой генератор без пейсинга (для офлайн-обработки)."""
+    ring = FrameRing(ring_size, source.frame_shape)
+    while source.read_into(ring.next_slot()):
+        seq = ring.commit()
+        yield seq, ring.frames[seq % ring.capacity]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон захвата кадров (и распознавания)")
+    parser.add_argument("source", help="'screen', папка с PNG или видеофайл")
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--ring", type=int, default=8, help="Размер кольцевого буфера")
+    parser.add_argument("--preload", action="store_true", help="Держать кадры папки в памяти")
+    parser.add_argument("--recognize", action="store_true", help="Распознавать каждый кадр")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    kwargs = {"preload": True} if args.preload and os.path.isdir(args.source) else {}
+    on_frame = None
+    recognize_ms: List[float] = []
+    if args.recognize:
+        from recognition_pipeline import StagedRecognizer
+        recognizer = StagedRecognizer()
+        if not (recognizer.load_model() and recognizer.load_embeddings()):
+            return 1
+
+        def on_frame(seq, frame):
+            t = time.perf_counter()
+            heroes = [d["hero"] for d in recognizer.recognize_roi(Image.fromarray(frame))]
+            recognize_ms.append((time.perf_counter() - t) * 1000.0)
+            logger.info(f"кадр {seq}: {heroes}")
+
+    with open_source(args.source, **kwargs) as source:
+        logger.info(f"Регион захвата: {source.region}, кадр {source.frame_shape}")
+        if args.recognize:
+            recognizer.configure(*source.screen_size)
+        ring = FrameRing(args.ring, source.frame_shape)
+        stats = capture_loop(source, ring, args.fps, max_frames=args.frames, on_frame=on_frame)
+    if recognize_ms:
+        stats["recognize_ms_mean"] = round(sum(recognize_ms) / len(recognize_ms), 2)
+    logger.info(f"Статистика: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
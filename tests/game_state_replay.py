@@ -0,0 +1,595 @@
+"""
+Реплей игровых событий через порт конечного автомата background.js.
+
+Поток GEP (onInfoUpdates2 + поллинг getInfo раз в 5 с) очень шумный:
+пустые roster_*, повторные banned_characters, одинаковые снапшоты. Скрипт
+собирает таймлайн событий из записи (JSONL) или из логов, прогоняет его с
+ускорением через порт updateStateFromInfo / processGameData и движок
+контрпиков (counterpick_logic.py) и считает, сколько пересчётов было
+запущено, сколько из них ничего не изменили и сколько времени они заняли.
+
+Источники таймлайна:
+  * запись JSONL — строка на событие:
+        {"t": 12.5, "kind": "info", "info": {"match_info": {...}}}
+        {"t": 13.0, "kind": "poll", "info": {...}}      # ответ getInfo
+        {"t": 14.0, "kind": "event", "name": "match_start"}
+  * app.log (HH:MM:SS.mmm - LEVEL - [file:line] - func - msg) с ретранслированными
+    строками [OW DEBUG] (updateStateFromInfo called / Map changed / Roster ...);
+  * лог вкладки «Логи» приложения ([HH:MM:SS] [INFO] msg) со строками
+    [MATCH], [RAW_BANS], [DIAG] roster ... и [EVENT] match_start.
+
+    python tests/game_state_replay.py app.log
+    python tests/game_state_replay.py recording.jsonl --speed 0 --coalesce-ms 0
+    python tests/game_state_replay.py overlay_logs.txt --poll 5 --json report.json
+"""
+import re
+import ast
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+from latency_stats import summarize
+from counterpick_logic import CounterpickLogic
+
+logger = logging.getLogger("game_state_replay")
+
+# Пауза длиннее этой (между сессиями, в меню) при реплее сжимается до неё
+DEFAULT_MAX_GAP = 30.0
+DEFAULT_SPEED = 100.0
+# Планировщик пересчёта из background.js (RECOMPUTE_COALESCE_MS / RECOMPUTE_MAX_WAIT_MS)
+RECOMPUTE_COALESCE_MS = 50.0
+RECOMPUTE_MAX_WAIT_MS = 250.0
+EMPTY_VALUES = (None, "null", "")
+
+_MISSING = object()
+
+# app.log: "09:31:12.980 - INFO - [main_window_refactored.py:156] - _on_overwolf_data - msg"
+_PY_LINE = re.compile(r"^(\d{1,2}):(\d\d):(\d\d)\.(\d{3}) - (\w+) - \[[^\]]*\] - \S+ - (.*)$")
+# Вкладка «Логи» (toLocaleTimeString): "[10:48:39] [INFO] msg" или "[10:48:39 AM] [INFO] msg"
+_APP_LINE = re.compile(r"^\[(\d{1,2}):(\d\d):(\d\d)(?:\s*([AP]M))?\] \[(\w+)\] (.*)$")
+_RELAY_PREFIX = re.compile(r"^\[OW DEBUG\] (?:\w+: )?")
+
+_CALLED = re.compile(r"^updateStateFromInfo called")
+_RETURNING = re.compile(r"^updateStateFromInfo returning")
+_MAP_CHANGED = re.compile(r'^Map changed from "(.*)" to "(.*)"$')
+_ROSTER_CHANGED = re.compile(r'^Roster "(roster_\d+)" hero changed from "(.*)" to "(.*)"$')
+_RAW_SNAPSHOT = re.compile(r"^\[Overwolf\] Получены сырые данные\. Карта: '(.*)', Враги: (\[.*\]), Союзники: (\[.*\])$")
+_INIT = re.compile(r"^=== INIT STARTED ===")
+_MATCH_ID = re.compile(r"^\[MATCH\] Смена match_id: '(.*)' -> '(.*)'$")
+_RAW_BANS = re.compile(r"^\[RAW_BANS\] Изменение сырых данных banned_characters: ?(.*)$")
+_DIAG_UPDATED = re.compile(r"^\[DIAG\] roster '(roster_\d+)' обновлён: (.*) \(teammate=(\w+)\)$")
+_DIAG_EMPTY = re.compile(r"^\[DIAG\] roster '(roster_\d+)' пришёл пустым")
+_MAP_RESET = re.compile(r"^\[MATCH_STATE\] Карта сброшена")
+_MATCH_START = re.compile(r"^\[EVENT\] match_start")
+
+
+def _js(value) -> str:
+    """JSON.stringify для сравнения состояний (порядок ключей сохраняется)."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_banned_characters(raw_bans) -> List:
+    """Порт parseBannedCharacters: JSON внутри JSON'а, объект, строка через запятую."""
+    if raw_bans in (None, "", "null", "[]"):
+        return []
+    parsed = raw_bans
+    attempts = 0
+    while isinstance(parsed, str) and attempts < 3:
+        try:
+            tmp = json.loads(parsed)
+        except ValueError:
+            break
+        if isinstance(tmp, (str, list, dict)) or tmp is None:
+            parsed = tmp
+        else:
+            break
+        attempts += 1
+
+    if isinstance(parsed, list):
+        return parsed
+    if isinstance(parsed, dict):
+        if parsed.get("character_id") or parsed.get("character_name"):
+            return [parsed]
+        return list(parsed.values())
+    if isinstance(parsed, str):
+        return [s.strip() for s in parsed.split(",") if s.strip()]
+    return []
+
+
+class GameStateMachine:
+    """Порт matchState и обработчиков из background.js.
+
+    process_game_data возвращает отправленный в in_game latestData либо None,
+    если пересчёт не понадобился (пустые ростеры, движок не готов).
+    """
+
+    def __init__(self, logic: CounterpickLogic):
+        self.logic = logic
+        self.tray_clears = 0
+        self.reset()
+
+    def reset(self):
+        self.rosters: Dict = {}
+        self.raw_rosters: Dict[str, str] = {}
+        self.map = None
+        self.match_id = None
+        self.banned_characters: List = []
+        self.last_raw_bans = None
+        self.last_processed_bans = None
+        self.tray_cleared_for_match_id = None
+        self.latest_data: Optional[Dict] = None
+
+    def update_state_from_info(self, info) -> bool:
+        if not info or not info.get("match_info"):
+            return False
+        mi = info["match_info"]
+        changed = False
+
+        if "match_id" in mi:
+            incoming = None if mi["match_id"] in ("null", "") else mi["match_id"]
+            if incoming != self.match_id:
+                logger.debug(f"[MATCH] Смена match_id: '{self.match_id}' -> '{incoming}'")
+                if incoming is not None:
+                    self.clear_tray_for_new_match(incoming)
+                self.match_id = incoming
+                changed = True
+
+        if "map" in mi and self.map != mi["map"]:
+            self.map = mi["map"]
+            changed = True
+            if mi["map"] in EMPTY_VALUES:
+                self.rosters = {}
+                self.raw_rosters = {}
+                self.banned_characters = []
+                self.last_processed_bans = None
+                self.last_raw_bans = None
+
+        if "banned_characters" in mi:
+            raw_bans = mi["banned_characters"]
+            # Те же сырые баны не парсятся повторно
+            if self.last_raw_bans != _js(raw_bans):
+                logger.debug(f"[RAW_BANS] Изменение сырых данных banned_characters: {raw_bans}")
+                self.last_raw_bans = _js(raw_bans)
+                parsed = parse_banned_characters(raw_bans)
+                if _js(parsed) != _js(self.banned_characters):
+                    self.banned_characters = parsed
+                    changed = True
+
+        for key, val in mi.items():
+            if not key.startswith("roster_"):
+                continue
+            if val in EMPTY_VALUES:
+                continue
+            if isinstance(val, str) and self.raw_rosters.get(key) == val:
+                continue
+            try:
+                parsed_val = json.loads(val) if isinstance(val, str) else val
+            except ValueError:
+                continue
+            if isinstance(val, str):
+                self.raw_rosters[key] = val
+            old = self.rosters.get(key, _MISSING)
+            if old is _MISSING or _js(old) != _js(parsed_val):
+                self.rosters[key] = parsed_val
+                changed = True
+        return changed
+
+    def clear_tray_for_new_match(self, new_match_id):
+        if self.tray_cleared_for_match_id == new_match_id:
+            return
+        self.tray_cleared_for_match_id = new_match_id
+        self.rosters = {}
+        self.raw_rosters = {}
+        self.map = None
+        self.banned_characters = []
+        self.last_processed_bans = None
+        self.last_raw_bans = None
+        self.tray_clears += 1
+        self.latest_data = {
+            "map": None,
+            "is_map_effective": False,
+            "enemy_heroes": [],
+            "ally_heroes": [],
+            "banned_heroes": [],
+            "counter_scores": {},
+            "effective_team": [],
+        }
+
+    def _hero_by_id(self, character_id) -> Optional[str]:
+        return (self.logic.game_entities.get("heroes") or {}).get(str(character_id))
+
+    def collect_teams(self):
+        """(враги, союзники, баны) в нормализованных именах, как в processGameData."""
+        logic = self.logic
+        enemies, allies, banned = [], [], []
+        for r in self.rosters.values():
+            if not isinstance(r, dict):
+                continue
+            name = r.get("character_name")
+            if name in (None, "", "UNKNOWN", "null") and r.get("character_id") is not None:
+                name = self._hero_by_id(r["character_id"]) or name
+            if name and name not in ("UNKNOWN", "null"):
+                norm = logic.normalize_hero_name(name)
+                if r.get("is_teammate") is False:
+                    enemies.append(norm)
+                elif r.get("is_teammate") is True:
+                    allies.append(norm)
+
+        for b in self.banned_characters if isinstance(self.banned_characters, list) else []:
+            if isinstance(b, str):
+                banned.append(logic.normalize_hero_name(b))
+            elif isinstance(b, dict):
+                if b.get("character_name"):
+                    banned.append(logic.normalize_hero_name(b["character_name"]))
+                elif b.get("character_id"):
+                    name = self._hero_by_id(b["character_id"])
+                    if name:
+                        banned.append(logic.normalize_hero_name(name))
+        banned = [h for h in dict.fromkeys(banned) if h]
+        return enemies, allies, banned
+
+    def resolve_map(self):
+        """(итоговое имя карты, влияет ли она на очки)."""
+        if not self.map:
+            return self.map, False
+        resolved = self.logic.resolve_map_name(self.map)
+        found = next((m for m in self.logic.available_maps if m.lower() == resolved.lower()), None)
+        final = found or resolved
+        return final, self.logic.does_map_affect_scores(final)
+
+    def process_game_data(self) -> Optional[Dict]:
+        logic = self.logic
+        if not logic.is_ready:
+            return None
+        enemies, allies, banned = self.collect_teams()
+        if _js(self.last_processed_bans) != _js(banned):
+            self.last_processed_bans = banned
+        final_map, is_map_effective = self.resolve_map()
+
+        if not enemies and not allies:
+            return None
+
+        sorted_enemies = sorted(h for h in enemies if h not in banned)
+        cache_key = _js([sorted_enemies, sorted(allies), sorted(banned), final_map, logic.db_version])
+
+        def compute():
+            if not sorted_enemies:
+                scores = logic.calculate_tier_list_scores_with_map(final_map)
+                return {"scores": scores,
+                        "optimalTeam": logic.get_recommended_heroes(scores, allies, banned) if allies else []}
+            counters = logic.calculate_counter_scores_for_team(sorted_enemies, final_map)
+            counters["optimalTeam"] = logic.get_recommended_heroes(counters["scores"], allies, banned) if allies else []
+            return counters
+
+        result = logic.cached_result(cache_key, compute)
+
+        self.latest_data = {
+            "map": final_map,
+            "is_map_effective": is_map_effective,
+            "enemy_heroes": enemies,
+            "ally_heroes": allies,
+            "banned_heroes": banned,
+            "counter_scores": result["scores"],
+            "effective_team": result["optimalTeam"],
+        }
+        return self.latest_data
+
+    def handle(self, event: Dict) -> bool:
+        """Обработать событие таймлайна; True, если оно вызвало processGameData."""
+        kind = event.get("kind")
+        if kind in ("info", "poll"):
+            return self.update_state_from_info(event.get("info"))
+        if kind == "event" and event.get("name") == "match_start" and not self.match_id:
+            self.clear_tray_for_new_match(f"match_start_{event.get('t', 0)}")
+        elif kind == "reset":
+            self.reset()
+        return False
+
+
+# === Таймлайн ===
+
+def load_recording(path: str) -> List[Dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                logger.warning(f"{path}:{line_no}: не JSON, строка пропущена")
+                continue
+            event.setdefault("kind", "info")
+            events.append(event)
+    events.sort(key=lambda e: e.get("t", 0))
+    return events
+
+
+class _LogTimelineBuilder:
+    """Собирает события из строк лога, накапливая снапшот match_info как у getInfo."""
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.snapshot: Dict = {}
+        self.block_t = None
+        self.block_explicit = False
+        self.pending_teams: List[Dict] = []
+
+    def _flush(self):
+        if self.block_t is not None:
+            self.events.append({"t": self.block_t, "kind": "info",
+                                "info": {"match_info": dict(self.snapshot)}})
+        self.block_t = None
+        self.block_explicit = False
+
+    def _open(self, t: float, explicit: bool):
+        self._flush()
+        self.block_t = t
+        self.block_explicit = explicit
+
+    def _delta(self, t: float):
+        # Лог приложения не отмечает границ вызова: изменения одной секунды — одно событие
+        if self.block_t is None or (not self.block_explicit and self.block_t != t):
+            self._open(t, explicit=False)
+
+    def _set_roster(self, key: str, name: str, teammate=None, pending: bool = False):
+        if name in ("null", ""):
+            self.snapshot[key] = None
+            return
+        roster = {"character_name": name, "is_teammate": teammate}
+        if pending:
+            self.pending_teams.append(roster)
+        self.snapshot[key] = roster
+
+    def _resolve_teams(self, enemies: List[str], allies: List[str]):
+        """Команда не пишется в строке Roster — берём её из следующей сводки «сырые данные»."""
+        enemies, allies = set(enemies), set(allies)
+        still_pending = []
+        for roster in self.pending_teams:
+            if roster["character_name"] in allies:
+                roster["is_teammate"] = True
+            elif roster["character_name"] in enemies:
+                roster["is_teammate"] = False
+            else:
+                still_pending.append(roster)
+        self.pending_teams = still_pending
+
+    def feed(self, t: float, msg: str):
+        msg = _RELAY_PREFIX.sub("", msg, count=1)
+        if _CALLED.match(msg):
+            self._open(t, explicit=True)
+        elif _RETURNING.match(msg):
+            self._flush()
+        elif _INIT.match(msg):
+            self._flush()
+            self.snapshot = {}
+            self.events.append({"t": t, "kind": "reset"})
+        elif _MATCH_START.match(msg):
+            self._flush()
+            self.events.append({"t": t, "kind": "event", "name": "match_start"})
+        elif (m := _RAW_SNAPSHOT.match(msg)):
+            try:
+                self._resolve_teams(ast.literal_eval(m.group(2)), ast.literal_eval(m.group(3)))
+            except (ValueError, SyntaxError):
+                pass
+        elif (m := _MAP_CHANGED.match(msg)):
+            self._delta(t)
+            self.snapshot["map"] = None if m.group(2) == "null" else m.group(2)
+        elif (m := _ROSTER_CHANGED.match(msg)):
+            self._delta(t)
+            self._set_roster(m.group(1), m.group(3), pending=True)
+        elif (m := _MATCH_ID.match(msg)):
+            self._delta(t)
+            self.snapshot["match_id"] = None if m.group(2) == "null" else m.group(2)
+        elif (m := _RAW_BANS.match(msg)):
+            self._delta(t)
+            self.snapshot["banned_characters"] = m.group(1)
+        elif (m := _DIAG_UPDATED.match(msg)):
+            self._delta(t)
+            self._set_roster(m.group(1), m.group(2), {"true": True, "false": False}.get(m.group(3)))
+        elif (m := _DIAG_EMPTY.match(msg)):
+            self._delta(t)
+            self.snapshot[m.group(1)] = None
+        elif _MAP_RESET.match(msg):
+            self._delta(t)
+            self.snapshot["map"] = None
+
+    def finish(self) -> List[Dict]:
+        self._flush()
+        # Overwolf присылает roster_* строкой JSON — так же и отдаём автомату
+        for event in self.events:
+            mi = event.get("info", {}).get("match_info", {})
+            for key, val in mi.items():
+                if key.startswith("roster_") and isinstance(val, dict):
+                    mi[key] = _js(val)
+        return self.events
+
+
+def parse_log_lines(lines: Iterable[str]) -> List[Dict]:
+    """Таймлайн из строк app.log или лога вкладки «Логи».
+
+    Время — секунды от полуночи; переход через полночь или новая сессия
+    (время пошло назад) сдвигают отсчёт на сутки, чтобы таймлайн был монотонным.
+    """
+    builder = _LogTimelineBuilder()
+    day_offset, prev_t = 0.0, None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        m = _PY_LINE.match(line)
+        if m:
+            h, mi, s, ms, _, msg = m.groups()
+            t = int(h) * 3600 + int(mi) * 60 + int(s) + int(ms) / 1000.0
+        else:
+            m = _APP_LINE.match(line)
+            if not m:
+                continue
+            h, mi, s, ampm, _, msg = m.groups()
+            h = int(h) % 12 + (12 if ampm == "PM" else 0) if ampm else int(h)
+            t = h * 3600 + int(mi) * 60 + int(s)
+        if prev_t is not None and t + day_offset < prev_t - 1.0:
+            day_offset += 86400.0
+        prev_t = t + day_offset
+        builder.feed(prev_t, msg)
+    return builder.finish()
+
+
+def load_timeline(path: str) -> List[Dict]:
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return load_recording(path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_log_lines(f)
+
+
+def with_polls(timeline: List[Dict], interval: float) -> List[Dict]:
+    """Добавить поллинг getInfo каждые interval секунд (ответ — последний полный снапшот).
+
+    Для записей, где поллинг не попал в лог (лог приложения пишет только изменения).
+    """
+    result, snapshot, next_poll = [], {}, None
+    for event in timeline:
+        t = event.get("t", 0.0)
+        while next_poll is not None and next_poll < t:
+            result.append({"t": next_poll, "kind": "poll", "info": {"match_info": dict(snapshot)}})
+            next_poll += interval
+        if event.get("kind") == "reset":
+            snapshot = {}
+        mi = (event.get("info") or {}).get("match_info")
+        if mi:
+            snapshot.update(mi)
+        result.append(event)
+        if next_poll is None:
+            next_poll = t + interval
+    return result
+
+
+# === Реплей ===
+
+def replay(timeline: List[Dict], logic: CounterpickLogic, speed: float = DEFAULT_SPEED,
+           max_gap: float = DEFAULT_MAX_GAP, coalesce_ms: float = RECOMPUTE_COALESCE_MS,
+           max_wait_ms: float = RECOMPUTE_MAX_WAIT_MS) -> Dict:
+    """Прогнать таймлайн через автомат и движок; speed <= 0 — без пауз.
+
+    Пересчёт планируется как scheduleProcessGameData: после изменения ждёт
+    coalesce_ms тишины, но не дольше max_wait_ms от первого изменения пачки;
+    coalesce_ms=0 — пересчёт сразу на каждое изменение (поведение до планировщика).
+    """
+    machine = GameStateMachine(logic)
+    kinds: Dict[str, int] = {}
+    compute_times: List[float] = []
+    counters = {"skipped_empty": 0, "redundant": 0}
+    last_sent = [None]
+    state_changes = 0
+    hits_before = logic.cache_hits
+    coalesce, max_wait = coalesce_ms / 1000.0, max_wait_ms / 1000.0
+
+    def run():
+        started = time.perf_counter()
+        data = machine.process_game_data()
+        elapsed = time.perf_counter() - started
+        if data is None:
+            counters["skipped_empty"] += 1
+            return
+        compute_times.append(elapsed)
+        sent = _js(data)
+        if sent == last_sent[0]:
+            counters["redundant"] += 1
+        last_sent[0] = sent
+
+    virtual = 0.0
+    batch_start = deadline = None
+    prev_t = timeline[0].get("t", 0.0) if timeline else 0.0
+    wall_start = time.perf_counter()
+    for event in timeline:
+        t = event.get("t", prev_t)
+        virtual += min(max(t - prev_t, 0.0), max_gap)
+        prev_t = t
+        if speed > 0:
+            delay = virtual / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+        if deadline is not None and deadline <= virtual:
+            run()
+            deadline = None
+
+        kind = event.get("kind", "info")
+        kinds[kind] = kinds.get(kind, 0) + 1
+        if not machine.handle(event):
+            continue
+        state_changes += 1
+        if coalesce <= 0:
+            run()
+            continue
+        if deadline is None:
+            batch_start = virtual
+        deadline = max(virtual, min(virtual + coalesce, batch_start + max_wait))
+    if deadline is not None:
+        run()
+
+    wall = time.perf_counter() - wall_start
+    return {
+        "events": len(timeline),
+        "kinds": kinds,
+        "state_changes": state_changes,
+        "recomputations": len(compute_times),
+        "redundant": counters["redundant"],
+        "cache_hits": logic.cache_hits - hits_before,
+        "skipped_empty": counters["skipped_empty"],
+        "tray_clears": machine.tray_clears,
+        "coalesce_ms": coalesce_ms,
+        "max_wait_ms": max_wait_ms,
+        "compute_ms": round(sum(compute_times) * 1000.0, 3),
+        "compute": summarize(compute_times),
+        "timeline_s": round(virtual, 3),
+        "wall_s": round(wall, 3),
+        "speedup": round(virtual / wall, 1) if wall > 0 else None,
+        "db_version": logic.db_version,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Реплей игровых событий через порт background.js")
+    parser.add_argument("source", help="Запись .jsonl, app.log или лог вкладки «Логи»")
+    parser.add_argument("--db", default=None, help="Файл статистики (по умолчанию как в приложении: latest.json)")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="Ускорение; 0 — без пауз")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP, help="Сжимать паузы длиннее (с)")
+    parser.add_argument("--poll", type=float, default=None, help="Добавить поллинг getInfo с интервалом (с)")
+    parser.add_argument("--coalesce-ms", type=float, default=RECOMPUTE_COALESCE_MS,
+                        help="Окно слияния изменений перед пересчётом (мс); 0 — пересчёт на каждое изменение")
+    parser.add_argument("--max-wait-ms", type=float, default=RECOMPUTE_MAX_WAIT_MS,
+                        help="Максимальная задержка пересчёта от первого изменения пачки (мс)")
+    parser.add_argument("--json", default=None, help="Сохранить отчёт в JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    logic = CounterpickLogic()
+    if not logic.init(args.db):
+        return 1
+    timeline = load_timeline(args.source)
+    if args.poll:
+        timeline = with_polls(timeline, args.poll)
+    if not timeline:
+        logger.error(f"В {args.source} не найдено игровых событий")
+        return 1
+    logger.info(f"Событий в таймлайне: {len(timeline)}")
+
+    report = replay(timeline, logic, speed=args.speed, max_gap=args.max_gap,
+                    coalesce_ms=args.coalesce_ms, max_wait_ms=args.max_wait_ms)
+    logger.info(f"События: {report['kinds']}, изменений состояния: {report['state_changes']}")
+    logger.info(f"Пересчётов: {report['recomputations']} (окно {args.coalesce_ms:g} мс), "
+                f"избыточных (тот же результат): {report['redundant']}, из кэша: {report['cache_hits']}, "
+                f"пустых: {report['skipped_empty']}")
+    logger.info(f"Время пересчётов: {report['compute_ms']:.1f} мс (p50 {report['compute']['p50']} мс, "
+                f"p95 {report['compute']['p95']} мс); таймлайн {report['timeline_s']} с "
+                f"за {report['wall_s']} с")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Перцентили и сводка по длительностям для отчётов о задержках.
+
+Вынесено из benchmark_recognition.py, чтобы утилиты без стека распознавания
+(log_analyzer.py, game_state_replay.py) не тянули его импорт и настройку
+логирования. Только стандартная библиотека.
+"""
+from typing import Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией (как numpy.percentile по умолчанию)."""
+    if not values:
+        return 0.0
+    data = sorted(values)
+    pos = (len(data) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+
+def summarize(samples_sec: List[float]) -> Dict[str, float]:
+    """Сводка по выборке длительностей в секундах; результат в миллисекундах."""
+    ms = [s * 1000.0 for s in samples_sec]
+    return {
+        "p50": round(percentile(ms, 50), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+        "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "count": len(ms),
+    }
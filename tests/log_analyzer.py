@@ -0,0 +1,565 @@
+"""
+Анализ логов приложения и скрапера: индекс на диске + быстрые запросы.
+
+Форматы (определяются по первым строкам):
+  * app.log       "09:31:12.980 - INFO - [main_window_refactored.py:156] - func - msg"
+  * scraper.log   "2026-08-10 15:06:24,123 - INFO - msg"
+  * вкладка «Логи» оверлея "[10:48:39] [INFO] msg" (и "[10:48:39][INFO] msg" debug-страницы)
+Строки без заголовка (traceback, многострочный JSON) относятся к записи выше.
+
+Лог читается потоком один раз, рядом пишется индекс <log>.idx:
+  * списки смещений записей по уровню, исходному файлу и тегу ([MATCH], [DIAG],
+    [API_ERROR], [OW DEBUG] — все ведущие теги сообщения);
+  * блоки по CHECKPOINT_EVERY записей: смещение начала, минимальное и
+    максимальное время — выборка по интервалу времени читает только блоки,
+    которые его задевают (в app.log несколько сессий, время не монотонно);
+  * смещения записей, с которых начинается следующий день (в app.log и логе
+    оверлея время — только часы);
+  * счётчики и самые длинные паузы между соседними записями.
+Лог дописывается — при следующем запуске индексируется только хвост; если
+начало файла изменилось (ротация), индекс строится заново. Записи по смещениям
+читаются через mmap, остальной файл не трогается.
+
+Время в логах app.log и оверлея — только часы; переход через полночь
+учитывается (время назад больше чем на 12 ч — следующий день). В запросах
+время задаётся как HH:MM[:SS[.mmm]], для следующих дней — "1+00:15",
+для scraper.log — "2026-08-10 15:06[:SS]".
+
+    python tests/log_analyzer.py app.log stats
+    python tests/log_analyzer.py app.log query --tag MATCH --since 09:30 --until 10:00
+    python tests/log_analyzer.py app.log query --level WARNING --file main.py --grep "timeout"
+    python tests/log_analyzer.py overlay_logs.txt timings --json timings.json
+    python tests/log_analyzer.py app.log bursts --window 10 --min-count 5
+"""
+import os
+import re
+import sys
+import mmap
+import json
+import heapq
+import hashlib
+import logging
+import calendar
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from latency_stats import summarize
+
+logger = logging.getLogger("log_analyzer")
+
+INDEX_VERSION = 2
+INDEX_MAGIC = b"RCPLOGIDX\n"
+INDEX_SUFFIX = ".idx"
+# Записей в блоке индекса времени
+CHECKPOINT_EVERY = 256
+TOP_GAPS = 20
+# Отпечаток начала файла: по нему видно, что лог переписан, а не дописан
+FINGERPRINT_BYTES = 64 * 1024
+DETECT_LINES = 200
+DAY_S = 86400
+ERROR_LEVELS = ("WARNING", "WARN", "ERROR", "CRITICAL", "JS_ERROR", "PROMISE_REJECT")
+
+_APP_LOG_LINE = re.compile(rb"^(\d{1,2}):(\d\d):(\d\d)\.(\d{3}) - ([A-Z]+) - \[([^\]:]*)(?::\d+)?\] - \S+ - ")
+_SCRAPER_LINE = re.compile(rb"^(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d),(\d{3}) - ([A-Z]+) - ")
+_OVERLAY_LINE = re.compile(rb"^\[(\d{1,2}):(\d\d):(\d\d)(?:\s*([AP]M))?\] ?\[(\w+)\] ")
+_TAG = re.compile(rb"\[([A-Za-z][\w .-]{0,39})\]\s*")
+_QUERY_CLOCK = re.compile(r"^(?:(\d+)\+)?(\d{1,2}):(\d\d)(?::(\d\d)(?:\.(\d{1,3}))?)?$")
+_QUERY_DATE = re.compile(r"^(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d)(?::(\d\d))?$")
+
+# Производные интервалы: от строки start до первой строки end после неё.
+# Повторный start при открытом интервале игнорируется (match_start и
+# [MATCH] НАЧАЛО приходят парой), интервалы длиннее max_s — без пары.
+DERIVED_TIMINGS = {
+    "match_start_to_first_roster": {
+        "tags": ("EVENT", "MATCH", "OW DEBUG"),
+        "start": r"\[EVENT\] match_start|\[MATCH\] НАЧАЛО НОВОГО МАТЧА|Map changed from \"[^\"]*\" to \"(?!null\")[^\"]+\"",
+        "end": r"\[DIAG\] roster '[^']+' обновлён: |Roster \"roster_\d+\" hero changed from \"[^\"]*\" to \"(?!null\")[^\"]+\"",
+        "end_tags": ("DIAG", "OW DEBUG"),
+        "max_s": 600.0,
+    },
+    "first_roster_to_counters": {
+        "tags": ("DIAG", "OW DEBUG"),
+        "start": r"\[DIAG\] roster '[^']+' обновлён: |Roster \"roster_\d+\" hero changed from \"[^\"]*\" to \"(?!null\")[^\"]+\"",
+        "end": r"calculate_team_counters: рассчитаны очки|\[Logic\] calculate_counter_scores_for_team: рассчитано",
+        "end_tags": ("DB", "Logic"),
+        "max_s": 60.0,
+    },
+}
+
+
+class Record(NamedTuple):
+    offset: int
+    t: float
+    level: str
+    source: str
+    tags: Tuple[str, ...]
+    text: str
+
+
+def _parse_app_log(m) -> Tuple[float, bytes, bytes]:
+    secs = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3)) + int(m.group(4)) / 1000
+    return secs, m.group(5), m.group(6)
+
+
+def _parse_scraper(m) -> Tuple[float, bytes, bytes]:
+    stamp = calendar.timegm(tuple(int(m.group(i)) for i in range(1, 7)))
+    return stamp + int(m.group(7)) / 1000, m.group(8), b""
+
+
+def _parse_overlay(m) -> Tuple[float, bytes, bytes]:
+    hours = int(m.group(1))
+    if m.group(4):  # toLocaleTimeString в 12-часовом формате
+        hours = hours % 12 + (12 if m.group(4) == b"PM" else 0)
+    return hours * 3600 + int(m.group(2)) * 60 + int(m.group(3)), m.group(5).upper(), b""
+
+
+# имя -> (регулярка заголовка, разбор, время только часы)
+FORMATS = {
+    "app_log": (_APP_LOG_LINE, _parse_app_log, True),
+    "scraper": (_SCRAPER_LINE, _parse_scraper, False),
+    "overlay": (_OVERLAY_LINE, _parse_overlay, True),
+}
+
+
+def detect_format(path: str) -> Optional[str]:
+    with open(path, "rb") as f:
+        for _ in range(DETECT_LINES):
+            line = f.readline()
+            if not line:
+                break
+            for name, (regex, _parse, _clock) in FORMATS.items():
+                if regex.match(line):
+                    return name
+    return None
+
+
+def leading_tags(message: bytes) -> List[str]:
+    tags, pos = [], 0
+    while True:
+        m = _TAG.match(message, pos)
+        if not m:
+            return tags
+        tags.append(m.group(1).decode("utf-8", "replace"))
+        pos = m.end()
+
+
+def _fingerprint(path: str, size: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(min(size, FINGERPRINT_BYTES))).hexdigest()
+
+
+def format_time(t: float, clock: bool) -> str:
+    if not clock:
+        return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    day, secs = divmod(t, DAY_S)
+    h, rest = divmod(secs, 3600)
+    text = f"{int(h):02d}:{int(rest // 60):02d}:{rest % 60:06.3f}"
+    return f"{int(day)}+{text}" if day else text
+
+
+def parse_time(text: str, clock: bool) -> float:
+    """Граница запроса в шкале индекса (см. format_time)."""
+    if clock:
+        m = _QUERY_CLOCK.match(text.strip())
+        if not m:
+            raise ValueError(f"Время '{text}': ожидается HH:MM[:SS[.mmm]] или N+HH:MM")
+        day, h, mi, s, ms = m.groups()
+        return (int(day or 0) * DAY_S + int(h) * 3600 + int(mi) * 60 + int(s or 0)
+                + int((ms or "0").ljust(3, "0")) / 1000)
+    m = _QUERY_DATE.match(text.strip())
+    if not m:
+        raise ValueError(f"Время '{text}': ожидается YYYY-MM-DD HH:MM[:SS]")
+    return calendar.timegm(tuple(int(g or 0) for g in m.groups()))
+
+
+class LogIndex:
+    """Индекс одного лога; LogIndex.open() загружает его с диска и дописывает хвост."""
+
+    def __init__(self, log_path: str, fmt: str, index_path: Optional[str] = None):
+        self.log_path = log_path
+        self.index_path = index_path or log_path + INDEX_SUFFIX
+        self.format = fmt
+        self.clock = FORMATS[fmt][2]
+        self.size = 0
+        self.fingerprint = ""
+        self.records = 0
+        self.first_t: Optional[float] = None
+        self.last_t: Optional[float] = None
+        self.day = 0
+        self.counts: Dict[str, int] = {}
+        self.top_gaps: List[List[float]] = []  # [пауза, время, смещение до, смещение после]
+        self.block_offset = array("Q")
+        self.block_min = array("d")
+        self.block_max = array("d")
+        self.day_start = array("Q")  # смещение первой записи каждого следующего дня
+        self.postings: Dict[str, array] = {}
+        self._last_offset: Optional[int] = None
+
+    # --- построение ---
+    @classmethod
+    def open(cls, log_path: str, index_path: Optional[str] = None, rebuild: bool = False) -> "LogIndex":
+        index = None if rebuild else cls.load(log_path, index_path)
+        if index is None:
+            fmt = detect_format(log_path)
+            if fmt is None:
+                raise ValueError(f"{log_path}: формат лога не распознан")
+            index = cls(log_path, fmt, index_path)
+        if index.update():
+            index.save()
+        return index
+
+    def update(self) -> bool:
+        """Дочитать лог с места, где остановились; True — индекс изменился."""
+        size = os.path.getsize(self.log_path)
+        if size == self.size:
+            return False
+        regex, parse, clock = FORMATS[self.format]
+        start = self.size
+        added = 0
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # строка ещё дописывается — возьмём в следующий раз
+                m = regex.match(line)
+                if m:
+                    self._add(offset, line, m, parse, clock)
+                    added += 1
+                offset += len(line)
+        self.size = offset
+        self.fingerprint = _fingerprint(self.log_path, self.size)
+        logger.info(f"Проиндексировано {self.size - start} байт, записей: +{added} (всего {self.records})")
+        return True
+
+    def _add(self, offset: int, line: bytes, m, parse, clock: bool):
+        t, level, source = parse(m)
+        if clock:
+            t += self.day * DAY_S
+            if self.last_t is not None and t < self.last_t - DAY_S / 2:
+                self.day += 1
+                t += DAY_S
+                self.day_start.append(offset)
+        if self.last_t is not None:
+            gap = t - self.last_t
+            entry = [gap, self.last_t, self._last_offset, offset]
+            if len(self.top_gaps) < TOP_GAPS:
+                heapq.heappush(self.top_gaps, entry)
+            elif gap > self.top_gaps[0][0]:
+                heapq.heapreplace(self.top_gaps, entry)
+        if self.first_t is None:
+            self.first_t = t
+        self.last_t = t
+        self._last_offset = offset
+        if self.records % CHECKPOINT_EVERY == 0:
+            self.block_offset.append(offset)
+            self.block_min.append(t)
+            self.block_max.append(t)
+        elif t < self.block_min[-1]:
+            self.block_min[-1] = t
+        elif t > self.block_max[-1]:
+            self.block_max[-1] = t
+        self.records += 1
+
+        keys = ["level:" + level.decode("ascii")]
+        if source:
+            keys.append("file:" + source.decode("utf-8", "replace"))
+        keys.extend("tag:" + tag for tag in leading_tags(line[m.end():]))
+        for key in keys:
+            postings = self.postings.get(key)
+            if postings is None:
+                postings = self.postings[key] = array("Q")
+                self.counts[key] = 0
+            postings.append(offset)
+            self.counts[key] += 1
+
+    # --- хранение ---
+    def save(self):
+        arrays = [("block_offset", self.block_offset), ("block_min", self.block_min), ("block_max", self.block_max),
+                  ("day_start", self.day_start)]
+        arrays += [("postings:" + key, self.postings[key]) for key in sorted(self.postings)]
+        header = {
+            "version": INDEX_VERSION, "format": self.format, "byteorder": sys.byteorder,
+            "size": self.size, "fingerprint": self.fingerprint, "records": self.records,
+            "first_t": self.first_t, "last_t": self.last_t,
+            "day": self.day, "last_offset": self._last_offset, "counts": self.counts,
+            "top_gaps": sorted(self.top_gaps, reverse=True),
+            "arrays": [{"name": name, "type": arr.typecode, "count": len(arr)} for name, arr in arrays],
+        }
+        payload = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(len(payload).to_bytes(4, "little"))
+            f.write(payload)
+            for _name, arr in arrays:
+                arr.tofile(f)
+        os.replace(tmp, self.index_path)
+
+    @classmethod
+    def load(cls, log_path: str, index_path: Optional[str] = None) -> Optional["LogIndex"]:
+        """Индекс с диска или None, если его нет, он устарел или лог переписан."""
+        index_path = index_path or log_path + INDEX_SUFFIX
+        if not os.path.isfile(index_path):
+            return None
+        with open(index_path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            header = json.loads(f.read(int.from_bytes(f.read(4), "little")).decode("utf-8"))
+            if header.get("version") != INDEX_VERSION or header["format"] not in FORMATS:
+                return None
+            if os.path.getsize(log_path) < header["size"] or _fingerprint(log_path, header["size"]) != header["fingerprint"]:
+                logger.info(f"{log_path} переписан с момента индексации — индекс строится заново")
+                return None
+            index = cls(log_path, header["format"], index_path)
+            for spec in header["arrays"]:
+                arr = array(spec["type"])
+                arr.fromfile(f, spec["count"])
+                if header["byteorder"] != sys.byteorder:
+                    arr.byteswap()
+                name = spec["name"]
+                if name.startswith("postings:"):
+                    index.postings[name[len("postings:"):]] = arr
+                else:
+                    setattr(index, name, arr)
+        index.size, index.fingerprint, index.records = header["size"], header["fingerprint"], header["records"]
+        index.first_t, index.last_t, index.day = header["first_t"], header["last_t"], header["day"]
+        index._last_offset = header["last_offset"]
+        index.counts = header["counts"]
+        index.top_gaps = [list(g) for g in header["top_gaps"]]
+        heapq.heapify(index.top_gaps)
+        return index
+
+    # --- чтение ---
+    def _ranges(self, since: Optional[float], until: Optional[float]) -> List[Tuple[int, int]]:
+        """Диапазоны смещений блоков, время которых пересекается с [since, until]."""
+        if since is None and until is None:
+            return [(0, self.size)]
+        ranges = []
+        for i, start in enumerate(self.block_offset):
+            if (since is not None and self.block_max[i] < since) or (until is not None and self.block_min[i] > until):
+                continue
+            end = self.block_offset[i + 1] if i + 1 < len(self.block_offset) else self.size
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def _read_record(self, mm, offset: int, regex) -> Tuple[bytes, int]:
+        """(текст записи с продолжениями, смещение следующей строки)."""
+        end = mm.find(b"\n", offset, self.size)
+        end = self.size if end < 0 else end + 1
+        pos = end
+        while pos < self.size:
+            nxt = mm.find(b"\n", pos, self.size)
+            nxt = self.size if nxt < 0 else nxt + 1
+            if regex.match(mm[pos:nxt]):
+                break
+            pos = nxt
+        return mm[offset:pos], pos
+
+    def _record(self, mm, offset: int) -> Tuple[Record, int]:
+        regex, parse, clock = FORMATS[self.format]
+        raw, nxt = self._read_record(mm, offset, regex)
+        m = regex.match(raw)
+        t, level, source = parse(m)
+        if clock:
+            # В логе только часы — день тот же, что назначил _add при индексации
+            t += bisect_right(self.day_start, offset) * DAY_S
+        text = raw.decode("utf-8", "replace").rstrip("\r\n")
+        return Record(offset, t, level.decode("ascii"), source.decode("utf-8", "replace"),
+                      tuple(leading_tags(raw[m.end():])), text), nxt
+
+    def read(self, offsets) -> Iterator[Record]:
+        """Записи по смещениям из индекса (по возрастанию)."""
+        if not self.size:
+            return
+        with open(self.log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in offsets:
+                yield self._record(mm, offset)[0]
+
+    def scan(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[Record]:
+        """Все записи в диапазоне смещений подряд."""
+        hi = self.size if hi is None else hi
+        if not self.size:
+            return
+        regex = FORMATS[self.format][0]
+        with open(self.log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = lo
+            # lo — начало блока или 0, а в начале файла могут быть строки без заголовка
+            while pos < hi and not regex.match(mm[pos:mm.find(b"\n", pos, self.size) + 1 or self.size]):
+                nxt = mm.find(b"\n", pos, self.size)
+                pos = self.size if nxt < 0 else nxt + 1
+            while pos < hi:
+                record, pos = self._record(mm, pos)
+                yield record
+
+    def offsets(self, level: Optional[str] = None, source: Optional[str] = None,
+                tags: Tuple[str, ...] = ()) -> Optional[array]:
+        """Смещения записей, подходящих под все фильтры; None — фильтров нет."""
+        keys = ([f"level:{level.upper()}"] if level else []) + ([f"file:{source}"] if source else [])
+        keys += [f"tag:{tag.strip('[]')}" for tag in tags]
+        if not keys:
+            return None
+        lists = sorted((self.postings.get(key, array("Q")) for key in keys), key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            # Списки отсортированы по смещению — пересечение бинарным поиском по большему
+            result = array("Q", (o for o in result if (i := bisect_left(other, o)) < len(other) and other[i] == o))
+        return result
+
+    def query(self, level: Optional[str] = None, source: Optional[str] = None, tags: Tuple[str, ...] = (),
+              since: Optional[float] = None, until: Optional[float] = None,
+              pattern: Optional[str] = None) -> Iterator[Record]:
+        ranges = self._ranges(since, until)
+        offsets = self.offsets(level, source, tags)
+        if offsets is None:
+            records = (record for lo, hi in ranges for record in self.scan(lo, hi))
+        else:
+            records = self.read([o for lo, hi in ranges for o in offsets[bisect_left(offsets, lo):bisect_left(offsets, hi)]])
+        regex = re.compile(pattern) if pattern else None
+        for record in records:
+            if since is not None and record.t < since:
+                continue
+            if until is not None and record.t > until:
+                continue
+            if regex and not regex.search(record.text):
+                continue
+            yield record
+
+    # --- производные метрики ---
+    def _tagged(self, tags) -> array:
+        merged = set()
+        for tag in tags:
+            merged.update(self.postings.get("tag:" + tag, ()))
+        return array("Q", sorted(merged))
+
+    def timings(self, specs: Dict = DERIVED_TIMINGS) -> Dict:
+        """Интервалы между парами событий (см. DERIVED_TIMINGS); читаются только записи с нужными тегами."""
+        report = {}
+        for name, spec in specs.items():
+            start_re, end_re = re.compile(spec["start"]), re.compile(spec["end"])
+            spans, unmatched, opened = [], 0, None
+            for record in self.read(self._tagged(tuple(spec["tags"]) + tuple(spec["end_tags"]))):
+                if opened is not None and record.t - opened.t > spec["max_s"]:
+                    unmatched += 1
+                    opened = None
+                if opened is not None and end_re.search(record.text):
+                    spans.append({"start": format_time(opened.t, self.clock), "seconds": round(record.t - opened.t, 3),
+                                  "start_offset": opened.offset, "end_offset": record.offset})
+                    opened = None
+                elif opened is None and start_re.search(record.text):
+                    opened = record
+            if opened is not None:
+                unmatched += 1
+            durations = [s["seconds"] for s in spans]
+            report[name] = {"count": len(spans), "unmatched": unmatched,
+                            "ms": dict(summarize(durations), max=round(max(durations) * 1000, 3)) if durations else None,
+                            "spans": spans}
+        return report
+
+    def bursts(self, window: float = 10.0, min_count: int = 5, levels: Tuple[str, ...] = ERROR_LEVELS) -> List[Dict]:
+        """Окна, где предупреждений/ошибок не меньше min_count за window секунд."""
+        merged = set()
+        for level in levels:
+            merged.update(self.postings.get("level:" + level, ()))
+        records = list(self.read(sorted(merged)))
+        result, i = [], 0
+        while i < len(records):
+            j = i
+            while j + 1 < len(records) and records[j + 1].t - records[i].t <= window:
+                j += 1
+            if j - i + 1 >= min_count:
+                counts = {}
+                for r in records[i:j + 1]:
+                    counts[r.level] = counts.get(r.level, 0) + 1
+                result.append({"start": format_time(records[i].t, self.clock), "end": format_time(records[j].t, self.clock),
+                               "count": j - i + 1, "levels": counts, "first": records[i].text[:200]})
+                i = j + 1
+            else:
+                i += 1
+        return result
+
+    def stats(self) -> Dict:
+        grouped = {"level": {}, "file": {}, "tag": {}}
+        for key, count in self.counts.items():
+            kind, _, name = key.partition(":")
+            grouped[kind][name] = count
+        return {
+            "format": self.format, "records": self.records, "bytes": self.size,
+            "first": format_time(self.first_t, self.clock) if self.first_t is not None else None,
+            "last": format_time(self.last_t, self.clock) if self.last_t is not None else None,
+            **{kind: dict(sorted(values.items(), key=lambda kv: -kv[1])) for kind, values in grouped.items()},
+            "longest_gaps": [{"seconds": round(gap, 3), "after": format_time(t, self.clock),
+                              "offset_before": int(before), "offset_after": int(after)}
+                             for gap, t, before, after in sorted(self.top_gaps, reverse=True)],
+        }
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Индекс и запросы по app.log / scraper.log / логам оверлея")
+    parser.add_argument("log", help="Файл лога")
+    parser.add_argument("--index", default=None, help=f"Файл индекса (по умолчанию <log>{INDEX_SUFFIX})")
+    parser.add_argument("--rebuild", action="store_true", help="Построить индекс заново")
+    parser.add_argument("--json", default=None, help="Сохранить результат в JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="Уровни, файлы, теги, самые длинные паузы")
+    query = sub.add_parser("query", help="Записи по уровню, файлу, тегу и времени")
+    query.add_argument("--level", default=None)
+    query.add_argument("--file", default=None, help="Исходный файл из [file:line] (app.log)")
+    query.add_argument("--tag", action="append", default=[], help="Тег без скобок: MATCH, DIAG, API_ERROR; можно несколько")
+    query.add_argument("--since", default=None)
+    query.add_argument("--until", default=None)
+    query.add_argument("--grep", default=None, help="Регулярное выражение по тексту записи")
+    query.add_argument("--limit", type=int, default=0, help="Не больше N записей (0 — все)")
+    sub.add_parser("timings", help="Производные интервалы (match_start -> первый ростер и т.п.)")
+    bursts = sub.add_parser("bursts", help="Всплески предупреждений и ошибок")
+    bursts.add_argument("--window", type=float, default=10.0, help="Окно, с")
+    bursts.add_argument("--min-count", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    index = LogIndex.open(args.log, args.index, rebuild=args.rebuild)
+    if args.command == "stats":
+        result = index.stats()
+        logger.info(f"{result['format']}: {result['records']} записей, {result['first']} .. {result['last']}")
+        for kind in ("level", "file", "tag"):
+            logger.info(f"{kind}: " + ", ".join(f"{k}={v}" for k, v in list(result[kind].items())[:15]))
+        for gap in result["longest_gaps"][:5]:
+            logger.info(f"Пауза {gap['seconds']} с после {gap['after']}")
+    elif args.command == "query":
+        since = parse_time(args.since, index.clock) if args.since else None
+        until = parse_time(args.until, index.clock) if args.until else None
+        result = []
+        for record in index.query(args.level, args.file, tuple(args.tag), since, until, args.grep):
+            print(record.text)
+            result.append(record._asdict())
+            if args.limit and len(result) >= args.limit:
+                break
+        logger.info(f"Найдено записей: {len(result)}")
+    elif args.command == "timings":
+        result = index.timings()
+        for name, item in result.items():
+            ms = item["ms"]
+            logger.info(f"{name}: {item['count']} интервалов, без пары {item['unmatched']}"
+                        + (f", p50 {ms['p50']} мс, p95 {ms['p95']} мс, max {ms['max']} мс" if ms else ""))
+    else:
+        result = index.bursts(args.window, args.min_count)
+        for burst in result:
+            logger.info(f"{burst['start']} .. {burst['end']}: {burst['count']} {burst['levels']} — {burst['first']}")
+        logger.info(f"Всплесков: {len(result)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Определение карты по верхнему левому углу экрана.
+
+Основной путь — сравнение захваченной области с заранее посчитанными
+признаками известных карт (overwolf_app/resources/maps/*.png): уменьшенное
+нормированное изображение в оттенках серого + цветовая гистограмма. Это
+около 10 мс без OCR (вместе с поиском баннера в области).
+
+Захват (1/3 ширины x 1/10 высоты экрана, около 5.9:1) шире баннера карты
+(125x52, около 2.4:1), поэтому баннер сначала ищется в области: окно с
+пропорциями баннера нескольких высот скользит по уменьшенной области, и
+серые миниатюры всех окон разом сравниваются с шаблонами (одно матричное
+умножение на масштаб). Полные признаки считаются только для лучших окон.
+
+Если уверенного совпадения нет, используется EasyOCR — один ридер на весь
+процесс, создаётся лениво. Распознанный текст не возвращается как есть, а
+сопоставляется со словарём карт из game_entities_dict.json нечётким
+поиском (difflib).
+"""
+import os
+import json
+import time
+import difflib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from recognition_common import PROJECT_ROOT
+
+MAPS_DIR = os.path.join(PROJECT_ROOT, "overwolf_app", "resources", "maps")
+ENTITIES_FILE = os.path.join(PROJECT_ROOT, "overwolf_app", "database", "game_entities_dict.json")
+
+# Размер, к которому приводятся шаблоны и захваченная область (пропорции баннеров 125x52)
+FEATURE_SIZE = (40, 16)
+BANNER_ASPECT = 125 / 52
+# Высота окна поиска баннера — доля высоты захваченной области
+WINDOW_SCALES = tuple(np.linspace(0.4, 1.0, 7))
+WINDOW_STEP = 2             # шаг окна в пикселях уменьшенной области
+WINDOW_TOP_K = 3            # окон-кандидатов, для которых считаются полные признаки
+# Область с пропорциями баннера (в пределах допуска) сравнивается целиком
+ASPECT_TOLERANCE = 0.25
+HIST_BINS = 8
+TEMPLATE_THRESHOLD = 0.80   # ниже — не доверяем шаблону и идём в OCR
+FUZZY_CUTOFF = 0.6
+OCR_MIN_CONFIDENCE = 0.3
+# Служебные значения словаря, которые не являются картами
+_NOT_MAPS = {"unknown", "social"}
+
+logger = logging.getLogger("map_recognizer")
+
+
+def _map_key(name: str) -> str:
+    return " ".join(name.lower().replace("-", " ").split())
+
+
+def load_map_vocabulary(path: str = ENTITIES_FILE) -> List[str]:
+    """Названия карт без дублей по регистру (первое написание выигрывает)."""
+    with open(path, "r", encoding="utf-8") as f:
+        maps = json.load(f).get("maps", [])
+    seen, vocabulary = set(), []
+    for name in maps:
+        key = _map_key(name)
+        if key in seen or key in _NOT_MAPS:
+            continue
+        seen.add(key)
+        vocabulary.append(name)
+    return vocabulary
+
+
+def fuzzy_match(text: str, vocabulary: List[str], cutoff: float = FUZZY_CUTOFF) -> Optional[Tuple[str, float]]:
+    """Ближайшее название карты для текста OCR или None."""
+    key = _map_key(text)
+    if not key:
+        return None
+    best, best_ratio = None, 0.0
+    for name in vocabulary:
+        ratio = difflib.SequenceMatcher(None, key, _map_key(name)).ratio()
+        if ratio > best_ratio:
+            best, best_ratio = name, ratio
+    return (best, best_ratio) if best_ratio >= cutoff else None
+
+
+def _normalize_rows(gray: np.ndarray) -> np.ndarray:
+    """Строки [N, D] минус среднее, L2 = 1 (скалярное произведение = корреляция)."""
+    gray = gray - gray.mean(axis=-1, keepdims=True)
+    return gray / np.maximum(np.linalg.norm(gray, axis=-1, keepdims=True), 1e-6)
+
+
+def image_features(image: Image.Image) -> np.ndarray:
+    """Вектор признаков: нормированная миниатюра + гистограмма RGB, L2 = 1."""
+    rgb = image.convert("RGB").resize(FEATURE_SIZE, Image.BILINEAR)
+    arr = np.asarray(rgb, dtype=np.float32)
+    gray = _normalize_rows(arr.mean(axis=2).reshape(-1))
+
+    bins = (arr // (256 // HIST_BINS)).astype(np.int64)
+    codes = (bins[..., 0] * HIST_BINS + bins[..., 1]) * HIST_BINS + bins[..., 2]
+    hist = np.bincount(codes.reshape(-1), minlength=HIST_BINS ** 3).astype(np.float32)
+    hist = np.sqrt(hist / hist.sum())  # Хеллингер: скалярное произведение = коэффициент Бхаттачарьи
+
+    vec = np.concatenate([gray, hist]) / np.sqrt(2.0)
+    return vec
+
+
+class MapRecognizer:
+    """Шаблоны карт считаются один раз в конструкторе; OCR — только при необходимости."""
+
+    def __init__(self, maps_dir: str = MAPS_DIR, entities_file: str = ENTITIES_FILE,
+                 threshold: float = TEMPLATE_THRESHOLD, ocr_languages=("ru", "en")):
+        self.threshold = threshold
+        self.ocr_languages = list(ocr_languages)
+        self.vocabulary = load_map_vocabulary(entities_file)
+        self.names: List[str] = []
+        features = []
+        for fname in sorted(os.listdir(maps_dir)):
+            if not fname.lower().endswith(".png"):
+                continue
+            stem = os.path.splitext(fname)[0]
+            match = fuzzy_match(stem, self.vocabulary, cutoff=0.9)
+            self.names.append(match[0] if match else stem.title())
+            features.append(image_features(Image.open(os.path.join(maps_dir, fname))))
+        self.templates = np.stack(features) if features else np.zeros((0, 1), dtype=np.float32)
+        # Серая часть шаблонов (уже нормирована) — для поиска баннера в области
+        pixels = FEATURE_SIZE[0] * FEATURE_SIZE[1]
+        self.gray_templates = self.templates[:, :pixels] * np.sqrt(2.0)
+        self._reader = None
+
+    @property
+    def reader(self):
+        """EasyOCR тяжёлый (модели грузятся секунды) — создаём один раз и переиспользуем."""
+        if self._reader is None:
+            import easyocr
+            self._reader = easyocr.Reader(self.ocr_languages)
+        return self._reader
+
+    def locate(self, region: Image.Image, top_k: int = WINDOW_TOP_K) -> List[Tuple[int, int, int, int]]:
+        """Окна (left, top, right, bottom) с пропорциями баннера, лучше всего
+        совпавшие с серыми миниатюрами шаблонов."""
+        width, height = region.size
+        if abs(width / height / BANNER_ASPECT - 1.0) <= ASPECT_TOLERANCE:
+            return [(0, 0, width, height)]
+        fw, fh = FEATURE_SIZE
+        gray = region.convert("L")
+        candidates = []  # (корреляция, окно)
+        for scale in WINDOW_SCALES:
+            win_h = height * scale
+            win_w = win_h * BANNER_ASPECT
+            if win_w > width:
+                continue
+            # Область уменьшается так, чтобы окно стало размером FEATURE_SIZE
+            factor = fh / win_h
+            small_w, small_h = max(fw, round(width * factor)), max(fh, round(height * factor))
+            small = np.asarray(gray.resize((small_w, small_h), Image.BILINEAR), dtype=np.float32)
+            windows = np.lib.stride_tricks.sliding_window_view(small, (fh, fw))[::WINDOW_STEP, ::WINDOW_STEP]
+            rows, cols = windows.shape[:2]
+            flat = windows.reshape(rows * cols, fh * fw)
+            # Шаблоны центрированы, поэтому центрировать окна не нужно — достаточно их нормы
+            norms = np.sqrt(np.maximum((flat * flat).sum(axis=1) - flat.sum(axis=1) ** 2 / flat.shape[1], 1e-6))
+            scores = (flat @ self.gray_templates.T).max(axis=1) / norms
+            for i in np.argsort(scores)[-top_k:]:
+                y, x = (WINDOW_STEP * v for v in divmod(int(i), cols))
+                box = (round(x / factor), round(y / factor), round(x / factor + win_w), round(y / factor + win_h))
+                candidates.append((float(scores[i]), box))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [box for _, box in candidates[:top_k]] or [(0, 0, width, height)]
+
+    def match_template(self, region: Image.Image) -> Tuple[Optional[str], float]:
+        if not len(self.names):
+            return None, 0.0
+        best_name, best_score = None, -1.0
+        for box in self.locate(region):
+            scores = self.templates @ image_features(region.crop(box))
+            best = int(scores.argmax())
+            if scores[best] > best_score:
+                best_name, best_score = self.names[best], float(scores[best])
+        return best_name, best_score
+
+    def match_ocr(self, region: Image.Image) -> Tuple[Optional[str], float]:
+        results = self.reader.readtext(np.asarray(region.convert("RGB")))
+        lines = [text for (_, text, conf) in results if conf >= OCR_MIN_CONFIDENCE]
+        candidates = lines + ([" ".join(lines)] if len(lines) > 1 else [])
+        best = None
+        for text in candidates:
+            match = fuzzy_match(text, self.vocabulary)
+            if match and (best is None or match[1] > best[1]):
+                best = match
+        return best if best else (None, 0.0)
+
+    def recognize(self, region: Image.Image, use_ocr: bool = True) -> Dict:
+        """{'map', 'score', 'method', 'elapsed_ms'}; map = None, если не распознано."""
+        t = time.perf_counter()
+        name, score = self.match_template(region)
+        method = "template"
+        if score < self.threshold:
+            name, score, method = None, score, "none"
+            if use_ocr:
+                name, score = self.match_ocr(region)
+                method = "ocr" if name else "none"
+        return {"map": name, "score": round(score, 4), "method": method,
+                "elapsed_ms": round((time.perf_counter() - t) * 1000.0, 2)}
@@ -0,0 +1,194 @@
+"""
+Приближённый поиск ближайшего эталона (IVF) на NumPy.
+
+Эталоны разбиваются сферическим k-means на n_lists кластеров. Для каждого
+окна берутся n_probe ближайших центроидов, и косинусное сходство точно
+считается только с эталонами этих кластеров — доля просмотренных эталонов
+примерно n_probe / n_lists, поэтому стоимость сравнения растёт медленнее,
+чем число эталонов (варианты паддинга, скины, подсветка, масштабы).
+
+Полнота относительно точного поиска измеряется на скриншотах:
+    python tests/recognition_ann.py --probes 1 2 4 8
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("recognition_ann")
+
+# При меньшем числе эталонов точный поиск (одно матричное умножение) быстрее
+ANN_MIN_REFERENCES = 2048
+DEFAULT_PROBES = 4
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-6)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20,
+                     seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """k-means по косинусу. Возвращает (центроиды [C, D], номер кластера [M])."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    assign = np.zeros(len(vectors), dtype=np.int64)
+    for it in range(iterations):
+        new_assign = (vectors @ centroids.T).argmax(axis=1)
+        if it and np.array_equal(new_assign, assign):
+            break
+        assign = new_assign
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=n_clusters) == 0
+        # Пустой кластер перезапускаем случайным эталоном
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids, assign
+
+
+class IVFIndex:
+    """Инвертированный индекс по кластерам с точным пересчётом внутри кластеров."""
+
+    def __init__(self, vectors: np.ndarray, n_lists: Optional[int] = None,
+                 n_probe: int = DEFAULT_PROBES, seed: int = 0):
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if n_lists is None:
+            n_lists = max(int(np.sqrt(len(vectors))), 1)
+        self.n_probe = n_probe
+        self.centroids, assign = spherical_kmeans(vectors, n_lists, seed=seed)
+        self.n_lists = len(self.centroids)
+        # Эталоны переупорядочены по кластерам: кластер c — строки offsets[c]:offsets[c+1]
+        self.order = np.argsort(assign, kind="stable")
+        self.vectors = vectors[self.order]
+        counts = np.bincount(assign, minlength=self.n_lists)
+        self.offsets = np.r_[0, np.cumsum(counts)]
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries: np.ndarray, n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Лучший эталон для каждого запроса: (индексы в исходном порядке [Q], сходства [Q]).
+
+        Запросы (L2-нормированные) группируются по кластерам: для каждого
+        кластера одно матричное умножение с теми запросами, которые его
+        просматривают.
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        queries = np.asarray(queries, dtype=np.float32)
+        best_score = np.full(len(queries), -np.inf, dtype=np.float32)
+        best_row = np.zeros(len(queries), dtype=np.int64)
+        if not len(queries):
+            return best_row, best_score
+
+        coarse = queries @ self.centroids.T
+        probes = np.argpartition(-coarse, n_probe - 1, axis=1)[:, :n_probe] if n_probe < self.n_lists \
+            else np.broadcast_to(np.arange(self.n_lists), (len(queries), self.n_lists))
+        # Пары (запрос, кластер), сгруппированные по кластеру
+        flat = np.asarray(probes).reshape(-1)
+        pair_query = np.repeat(np.arange(len(queries)), probes.shape[1])
+        order = np.argsort(flat, kind="stable")
+        clusters, starts = np.unique(flat[order], return_index=True)
+        for c, q in zip(clusters, np.split(pair_query[order], starts[1:])):
+            start, end = self.offsets[c], self.offsets[c + 1]
+            if start == end:
+                continue
+            sims = queries[q] @ self.vectors[start:end].T
+            local = sims.argmax(axis=1)
+            score = sims[np.arange(len(q)), local]
+            better = score > best_score[q]
+            best_score[q[better]] = score[better]
+            best_row[q[better]] = start + local[better]
+        return self.order[best_row], best_score
+
+    def scanned_fraction(self, n_probe: Optional[int] = None) -> float:
+        """Средняя доля эталонов, просматриваемых одним запросом (оценка)."""
+        return min(n_probe or self.n_probe, self.n_lists) / self.n_lists
+
+
+def exact_search(queries: np.ndarray, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    sims = queries @ vectors.T
+    best = sims.argmax(axis=1)
+    return best, sims[np.arange(len(best)), best]
+
+
+def measure_recall(index: IVFIndex, queries: np.ndarray, vectors: np.ndarray,
+                   labels: Optional[np.ndarray] = None, n_probe: Optional[int] = None,
+                   min_score: Optional[float] = None) -> Dict:
+    """Полнота ANN относительно точного поиска.
+
+    recall — доля запросов с тем же лучшим эталоном; label_recall — с тем же
+    героем (важнее для распознавания). min_score ограничивает оценку окнами,
+    которые вообще прошли бы порог уверенности.
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    t = time.perf_counter()
+    exact_idx, exact_score = exact_search(queries, vectors)
+    exact_s = time.perf_counter() - t
+    t = time.perf_counter()
+    ann_idx, _ = index.search(queries, n_probe)
+    ann_s = time.perf_counter() - t
+
+    mask = np.ones(len(queries), dtype=bool) if min_score is None else exact_score >= min_score
+    total = int(mask.sum())
+    result = {
+        "n_probe": min(n_probe or index.n_probe, index.n_lists),
+        "n_lists": index.n_lists,
+        "queries": total,
+        "recall": float((ann_idx[mask] == exact_idx[mask]).mean()) if total else 1.0,
+        "scanned": round(index.scanned_fraction(n_probe), 4),
+        "exact_ms": round(exact_s * 1000.0, 3),
+        "ann_ms": round(ann_s * 1000.0, 3),
+    }
+    if labels is not None:
+        labels = np.asarray(labels)
+        same = labels[ann_idx[mask]] == labels[exact_idx[mask]]
+        result["label_recall"] = float(same.mean()) if total else 1.0
+    return result
+
+
+def main(argv=None) -> int:
+    from recognition_common import SCREENSHOTS_DIR, BUNDLED_SCREENSHOTS_DIR, CONFIDENCE_THRESHOLD
+    from recognition_pipeline import StagedRecognizer
+
+    parser = argparse.ArgumentParser(description="Полнота и скорость IVF-поиска эталонов против точного")
+    parser.add_argument("--screenshots", default=None)
+    parser.add_argument("--limit", type=int, default=7)
+    parser.add_argument("--lists", type=int, default=None, help="Число кластеров (по умолчанию sqrt(M))")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    directory = args.screenshots or (SCREENSHOTS_DIR if os.path.isdir(SCREENSHOTS_DIR) else BUNDLED_SCREENSHOTS_DIR)
+    files = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(".png"))
+    recognizer = StagedRecognizer(use_ann=False)
+    if not (recognizer.load_model() and recognizer.load_embeddings()):
+        return 1
+
+    queries = []
+    for path in files[:args.limit]:
+        image = recognizer.load_image(path)
+        recognizer.configure(image.width, image.height)
+        window, step = recognizer.window_size()
+        batch, _ = recognizer.make_windows(recognizer.crop(image), window, step)
+        queries.append(recognizer.infer(batch))
+    queries = np.concatenate(queries)
+    refs = recognizer.ref_embeddings
+    index = IVFIndex(refs, n_lists=args.lists)
+    logger.info(f"Окон: {len(queries)}, эталонов: {len(refs)}, кластеров: {index.n_lists}")
+
+    for n_probe in args.probes:
+        for name, min_score in (("все окна", None), ("выше порога", CONFIDENCE_THRESHOLD)):
+            r = measure_recall(index, queries, refs, recognizer.ref_labels, n_probe, min_score)
+            logger.info(f"n_probe={r['n_probe']:<3} {name:<12} recall={r['recall']:.4f} "
+                        f"label_recall={r['label_recall']:.4f} просмотрено {r['scanned']:.1%} "
+                        f"ANN {r['ann_ms']:.2f} мс / точный {r['exact_ms']:.2f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Общие пути, константы и метрики для скриптов распознавания героев.
+
+Модуль намеренно не импортирует numpy/onnxruntime/PIL, чтобы его можно было
+подключать из лёгких утилит (отчёты, сравнение с baseline) без тяжёлых
+зависимостей.
+"""
+import json
+import os
+import re
+import logging
+import platform
+from typing import Dict, Iterable
+
+# =============================================================================
+# ПУТИ К РЕСУРСАМ
+# =============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(PROJECT_ROOT, "vision_models", "dinov3-vitb16-pretrain-lvd1689m", "model_q4.onnx")
+EMBEDDINGS_DIR = os.path.join(PROJECT_ROOT, "resources", "embeddings_padded")
+# Сводная матрица эталонов в EMBEDDINGS_DIR (собирается build_scripts/build_embeddings.py)
+REFERENCES_FILE = "references.npz"
+SCREENSHOTS_DIR = os.path.join(PROJECT_ROOT, "tests", "for_recogn", "screenshots")
+CORRECT_ANSWERS_FILE = os.path.join(PROJECT_ROOT, "tests", "for_recogn", "correct_answers.json")
+DEBUG_DIR = os.path.join(PROJECT_ROOT, "tests", "debug")
+# Скриншоты драфта, которые лежат в репозитории
+BUNDLED_SCREENSHOTS_DIR = os.path.join(PROJECT_ROOT, "screenshots")
+# Машинно-зависимые артефакты (оптимизированный граф, результаты тюнинга)
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "recognition")
+TUNING_FILE = os.path.join(CACHE_DIR, "tuning.json")
+
+# =============================================================================
+# ОСНОВНЫЕ НАСТРОЙКИ
+# =============================================================================
+TARGET_SIZE = 224
+LEFT_OFFSET = 45
+IMAGE_MEAN = [0.485, 0.456, 0.406]
+IMAGE_STD = [0.229, 0.224, 0.225]
+# Параметры для распознавания - УВЕЛИЧЕН ПОРОГ УВЕРЕННОСТИ
+CONFIDENCE_THRESHOLD = 0.70  # Было 0.65
+MAX_HEROES = 6
+BATCH_SIZE_SLIDING_WINDOW_DINO = 32
+# Параметры для поиска квадратов
+HERO_SQUARE_SIZE = 95
+STEP_SIZE = HERO_SQUARE_SIZE // 4  # Шаг как в Rust коде
+# HERO_SQUARE_SIZE подобран для этой высоты экрана; на других разрешениях окно масштабируется
+REFERENCE_HEIGHT = 1080
+# Высоты экрана, под которые заранее считаются эталонные эмбеддинги (1080p, 1440p, 4K)
+EMBEDDING_SCALES = (1080, 1440, 2160)
+RECOGNITION_AREA = {
+    'monitor': 1, 'left_pct': 50, 'top_pct': 20, 'width_pct': 20, 'height_pct': 50
+}
+# Стадии конвейера распознавания (порядок важен для отчётов)
+STAGES = ("load", "crop", "windowing", "inference", "matching", "nms")
+
+
+def recognition_box(width: int, height: int, area: Dict = None):
+    """Возвращает (left, top, right, bottom) области распознавания для кадра width x height."""
+    area = area or RECOGNITION_AREA
+    left = int(width * area['left_pct'] / 100)
+    top = int(height * area['top_pct'] / 100)
+    right = left + int(width * area['width_pct'] / 100)
+    bottom = top + int(height * area['height_pct'] / 100)
+    return left, top, right, bottom
+
+
+def plan_windows(width: int, height: int) -> Dict:
+    """Размер окна и шаг скользящего окна под разрешение экрана width x height.
+
+    Портреты в драфте масштабируются по высоте экрана, поэтому окно —
+    HERO_SQUARE_SIZE, пересчитанный от REFERENCE_HEIGHT. scale — ближайшая
+    высота из EMBEDDING_SCALES, эталоны которой нужно использовать.
+    """
+    window = max(int(round(HERO_SQUARE_SIZE * height / REFERENCE_HEIGHT)), 8)
+    return {
+        "screen": (width, height),
+        "window": window,
+        "step": max(window // 4, 1),
+        "scale": min(EMBEDDING_SCALES, key=lambda h: abs(h - height)),
+    }
+
+
+def calculate_metrics(recognized: Iterable[str], expected: Iterable[str]) -> Dict:
+    rec_set, exp_set = set(recognized), set(expected)
+    correct = len(rec_set & exp_set)
+    fp, fn = len(rec_set - exp_set), len(exp_set - rec_set)
+    precision = correct / len(rec_set) if rec_set else 0
+    recall = correct / len(exp_set) if exp_set else 0
+    f1 = 2*precision*recall / (precision+recall) if (precision+recall) > 0 else 0
+    return {'correct': correct, 'false_positive': fp, 'false_negative': fn, 'precision': precision, 'recall': recall, 'f1': f1}
+
+
+_NAME_SUFFIXES = ("_icon", "_template", "_small", "_left", "_right", "_horizontal", "_adv", "_padded")
+_NAME_ALIASES = {
+    "bruce banner": "Hulk",
+    "deadpool duelist": "Deadpool (Duelist)",
+    "deadpool strategist": "Deadpool (Strategist)",
+    "deadpool vanguard": "Deadpool (Vanguard)",
+}
+
+
+def hero_key(name: str) -> str:
+    """Сравнимый ключ имени: только буквы/цифры в lower-case (как heroKeyNorm в desktop.js)."""
+    return re.sub(r'[^a-zа-яё0-9]', '', str(name).lower())
+
+
+def normalize_hero_name(name: str, known_names: Iterable[str] = ()) -> str:
+    """Порт normalizeHeroName из logic.js для имён файлов эмбеддингов.
+
+    "cloak_dagger_padded_2" -> "Cloak & Dagger", если такое имя есть в known_names.
+    """
+    if not name:
+        return ""
+    normalized = name.lower()
+    normalized = re.sub(r'[_ ]*v\d+$', '', normalized)
+    normalized = re.sub(r'_\d+$', '', normalized)
+    for suffix in _NAME_SUFFIXES:
+        if normalized.endswith(suffix):
+            normalized = normalized[:-len(suffix)]
+    normalized = re.sub(r'[-_]+', ' ', normalized).strip()
+    normalized = _NAME_ALIASES.get(normalized, normalized)
+
+    by_key = {hero_key(h): h for h in known_names}
+    found = by_key.get(hero_key(normalized))
+    if found:
+        return found
+    return ' '.join(p[:1].upper() + p[1:] for p in normalized.split(' ')) or name
+
+
+def load_correct_answers(path: str = CORRECT_ANSWERS_FILE) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def machine_signature() -> Dict:
+    """Описание машины, под которую подобраны настройки тюнинга."""
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_tuned_config(path: str = TUNING_FILE) -> Dict:
+    """Читает результат tune_recognition.py. Пустой dict, если файла нет
+    или он подобран на другой машине."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Не удалось прочитать настройки тюнинга {path}: {e}")
+        return {}
+    if config.get("machine") != machine_signature():
+        logging.warning(f"Настройки тюнинга {path} подобраны на другой машине — игнорируем. "
+                        f"Перезапустите tests/tune_recognition.py")
+        return {}
+    return config
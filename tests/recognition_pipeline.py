@@ -0,0 +1,321 @@
+"""
+Распознавание героев, разбитое на явные стадии.
+
+Каждая стадия (load, crop, windowing, inference, matching, nms) вынесена в
+отдельный метод StagedRecognizer, чтобы бенчмарк мог замерять их по
+отдельности, а остальные утилиты — переиспользовать тот же конвейер.
+
+numpy, PIL и модули, которые их тянут (постобработка, IVF, кэш ROI),
+импортируются в методах: сам импорт модуля дешёвый, тяжёлые библиотеки
+грузятся при первой загрузке эталонов или модели.
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from recognition_common import (
+    MODEL_PATH, EMBEDDINGS_DIR, TARGET_SIZE, IMAGE_MEAN, IMAGE_STD,
+    BATCH_SIZE_SLIDING_WINDOW_DINO, HERO_SQUARE_SIZE, STEP_SIZE,
+    RECOGNITION_AREA, REFERENCES_FILE, REFERENCE_HEIGHT, recognition_box, plan_windows,
+    normalize_hero_name, load_tuned_config,
+)
+from recognition_session import create_session
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+    from recognition_ann import IVFIndex
+
+
+# =============================================================================
+# КОНВЕЙЕР
+# =============================================================================
+class StagedRecognizer:
+    """Конвейер распознавания героев на DINOv3 + косинусное сравнение с эталонами."""
+
+    def __init__(self, model_path: str = MODEL_PATH, embeddings_dir: str = EMBEDDINGS_DIR,
+                 batch_size: Optional[int] = None, known_names=(),
+                 session_options: Optional[Dict] = None,
+                 use_ann: Optional[bool] = None, ann_probe: Optional[int] = None,
+                 roi_cache: bool = False):
+        """batch_size/session_options = None -> берутся из результата
+        tune_recognition.py (TUNING_FILE), а если его нет — значения по умолчанию.
+        use_ann = None -> IVF-индекс включается сам, когда эталонов не меньше
+        ANN_MIN_REFERENCES; ann_probe = None -> DEFAULT_PROBES. roi_cache=True ->
+        recognize_file читает обрезанную область из кэша roi_cache.py."""
+        self.model_path = model_path
+        self.embeddings_dir = embeddings_dir
+        tuned = load_tuned_config() if batch_size is None or session_options is None else {}
+        if batch_size is None:
+            batch_size = tuned.get("batch_size", BATCH_SIZE_SLIDING_WINDOW_DINO)
+        if session_options is None:
+            session_options = tuned.get("session_options", {})
+        self.batch_size = batch_size
+        # intra_op_threads / inter_op_threads / execution_mode / cache_dir для create_session
+        self.session_options = dict(session_options)
+        self.known_names = list(known_names)
+        self.session = None
+        self.input_name = None
+        self.ref_embeddings: Optional[np.ndarray] = None
+        # Несколько эталонов могут принадлежать одному герою (варианты паддинга и т.п.)
+        self.ref_labels: Optional[np.ndarray] = None
+        self.hero_names: List[str] = []
+        # Все загруженные эталоны: (vectors, names, scales); scales = None у эталонов без масштабов
+        self._reference_set = None
+        # Окно и шаг под разрешение экрана (plan_windows), пересчитывается при смене разрешения
+        self.plan: Optional[Dict] = None
+        self.use_ann = use_ann
+        self.ann_probe = ann_probe
+        self.ann_index: Optional[IVFIndex] = None
+        self.roi_cache = roi_cache
+        self._mean_std = None
+
+    # --- загрузка ---------------------------------------------------------
+    def load_model(self) -> bool:
+        if not os.path.exists(self.model_path):
+            logging.error(f"Модель не найдена: {self.model_path}")
+            return False
+        stats = {}
+        self.session = create_session(self.model_path, stats=stats, **self.session_options)
+        self.input_name = self.session.get_inputs()[0].name
+        logging.info(f"Модель загружена: {self.model_path} за {stats['session_s']:.2f} с "
+                     f"(кэш оптимизированного графа: {'да' if stats['cache_hit'] else 'нет'})")
+        return True
+
+    def load_embeddings(self) -> bool:
+        """Эталоны из сводной матрицы REFERENCES_FILE (build_embeddings.py), а если
+        её нет — из отдельных .npy (вектор [D] или варианты [V, D] на файл)."""
+        if not os.path.isdir(self.embeddings_dir):
+            logging.error(f"Папка эмбеддингов не найдена: {self.embeddings_dir}")
+            return False
+        import numpy as np
+        matrix_path = os.path.join(self.embeddings_dir, REFERENCES_FILE)
+        scales = None
+        if os.path.exists(matrix_path):
+            with np.load(matrix_path) as data:
+                vectors, stems = data["vectors"], [str(s) for s in data["names"]]
+                if "scales" in data:
+                    scales = data["scales"].astype(np.int64)
+        else:
+            stems, rows = [], []
+            for fname in sorted(os.listdir(self.embeddings_dir)):
+                if not fname.endswith('.npy'):
+                    continue
+                vec = np.load(os.path.join(self.embeddings_dir, fname)).astype(np.float32)
+                vec = vec.reshape(-1, vec.shape[-1])
+                rows.append(vec)
+                stems.extend([os.path.splitext(fname)[0]] * len(vec))
+            if not rows:
+                logging.error(f"В {self.embeddings_dir} нет файлов .npy")
+                return False
+            vectors = np.concatenate(rows)
+        names = [normalize_hero_name(stem, self.known_names) for stem in stems]
+        self._reference_set = (vectors, names, scales)
+        self._apply_reference_scale()
+        logging.info(f"Загружено эталонных эмбеддингов: {len(self.ref_labels)} из {len(names)} "
+                     f"(героев: {len(self.hero_names)})")
+        return True
+
+    def _apply_reference_scale(self):
+        """Оставляет эталоны масштаба текущего плана (или ближайшего из имеющихся)."""
+        vectors, names, scales = self._reference_set
+        if scales is None or not len(scales):
+            self.set_references(vectors, names)
+            return
+        import numpy as np
+        wanted = self.plan["scale"] if self.plan else REFERENCE_HEIGHT
+        available = np.unique(scales)
+        scale = available[np.argmin(np.abs(available - wanted))]
+        rows = np.flatnonzero(scales == scale)
+        self.set_references(vectors[rows], [names[i] for i in rows])
+
+    def configure(self, width: int, height: int) -> Dict:
+        """Один раз на разрешение: окно/шаг под экран и эталоны нужного масштаба."""
+        if self.plan is not None and self.plan["screen"] == (width, height):
+            return self.plan
+        previous = self.plan["scale"] if self.plan else None
+        self.plan = plan_windows(width, height)
+        if self._reference_set is not None and self.plan["scale"] != previous:
+            self._apply_reference_scale()
+        logging.info(f"Разрешение {width}x{height}: окно {self.plan['window']} px, "
+                     f"шаг {self.plan['step']} px, эталоны {self.plan['scale']}p")
+        return self.plan
+
+    def set_references(self, vectors: np.ndarray, names: List[str]):
+        """Устанавливает эталоны: vectors [M, D] и имя героя для каждой строки."""
+        import numpy as np
+        from recognition_ann import ANN_MIN_REFERENCES, DEFAULT_PROBES, IVFIndex
+        refs = np.asarray(vectors, dtype=np.float32).copy()
+        refs /= np.maximum(np.linalg.norm(refs, axis=1, keepdims=True), 1e-6)
+        self.hero_names = sorted(set(names))
+        index = {name: i for i, name in enumerate(self.hero_names)}
+        self.ref_labels = np.array([index[n] for n in names], dtype=np.int64)
+        self.ref_embeddings = refs
+        use_ann = self.use_ann if self.use_ann is not None else len(refs) >= ANN_MIN_REFERENCES
+        n_probe = DEFAULT_PROBES if self.ann_probe is None else self.ann_probe
+        self.ann_index = IVFIndex(refs, n_probe=n_probe) if use_ann and len(refs) else None
+        if self.ann_index is not None:
+            logging.info(f"IVF-индекс эталонов: {self.ann_index.n_lists} кластеров, n_probe={n_probe}")
+
+    # --- стадии -----------------------------------------------------------
+    def load_image(self, path: str) -> Image.Image:
+        from PIL import Image
+        img = Image.open(path)
+        img.load()
+        return img.convert('RGB')
+
+    def crop(self, image: Image.Image, area: Dict = None) -> Image.Image:
+        return image.crop(recognition_box(image.width, image.height, area or RECOGNITION_AREA))
+
+    def prepare(self, tiles: List[Image.Image]) -> np.ndarray:
+        """Картинки -> батч NCHW float32 (resize до TARGET_SIZE и нормализация)."""
+        import numpy as np
+        from PIL import Image
+        if self._mean_std is None:
+            self._mean_std = (np.array(IMAGE_MEAN, dtype=np.float32).reshape(3, 1, 1),
+                              np.array(IMAGE_STD, dtype=np.float32).reshape(3, 1, 1))
+        mean, std = self._mean_std
+        batch = np.empty((len(tiles), 3, TARGET_SIZE, TARGET_SIZE), dtype=np.float32)
+        for i, tile in enumerate(tiles):
+            tile = tile.convert('RGB').resize((TARGET_SIZE, TARGET_SIZE), Image.BILINEAR)
+            batch[i] = np.asarray(tile, dtype=np.float32).transpose(2, 0, 1)
+        batch /= 255.0
+        batch -= mean
+        batch /= std
+        return batch
+
+    def make_windows(self, roi: Image.Image, window: int = HERO_SQUARE_SIZE,
+                     step: int = STEP_SIZE) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """Нарезает ROI скользящим окном и готовит батч NCHW float32 для модели."""
+        positions = [(x, y)
+                     for y in range(0, max(roi.height - window, 0) + 1, step)
+                     for x in range(0, max(roi.width - window, 0) + 1, step)]
+        tiles = [roi.crop((x, y, x + window, y + window)) for x, y in positions]
+        return self.prepare(tiles), positions
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        """Прогоняет батч через модель и возвращает L2-нормированные эмбеддинги."""
+        import numpy as np
+        outputs = []
+        for start in range(0, len(batch), self.batch_size):
+            out = self.session.run(None, {self.input_name: batch[start:start + self.batch_size]})[0]
+            if out.ndim == 3:
+                out = out[:, 0, :]  # CLS-токен
+            outputs.append(out.astype(np.float32, copy=False))
+        if not outputs:
+            return np.zeros((0, self.ref_embeddings.shape[1]), dtype=np.float32)
+        emb = np.concatenate(outputs)
+        emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-6)
+        return emb
+
+    def match(self, embeddings: np.ndarray, positions: List[Tuple[int, int]],
+              window: int = HERO_SQUARE_SIZE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Лучший эталон для каждого окна: (boxes [N, 4], scores [N], labels [N])."""
+        import numpy as np
+        pos = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        boxes = np.concatenate([pos, pos + window], axis=1)
+        if len(embeddings) == 0:
+            return boxes, np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        if self.ann_index is not None:
+            best, scores = self.ann_index.search(embeddings)
+        else:
+            sims = embeddings @ self.ref_embeddings.T
+            best = sims.argmax(axis=1)
+            scores = sims[np.arange(len(best)), best]
+        return boxes, scores, self.ref_labels[best]
+
+    def nms(self, boxes: np.ndarray, scores: np.ndarray, labels: np.ndarray,
+            image_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Порог уверенности, NMS и top-MAX_HEROES. Возвращает индексы детекций."""
+        from recognition_postprocess import postprocess
+        return postprocess(boxes, scores, labels, image_ids)
+
+    def to_detections(self, boxes: np.ndarray, scores: np.ndarray, labels: np.ndarray,
+                      indices: np.ndarray) -> List[Dict]:
+        return [
+            {'hero': self.hero_names[labels[i]], 'confidence': float(scores[i]),
+             'position': (int(boxes[i, 0]), int(boxes[i, 1])),
+             'size': (int(boxes[i, 2] - boxes[i, 0]), int(boxes[i, 3] - boxes[i, 1]))}
+            for i in indices
+        ]
+
+    def window_size(self) -> Tuple[int, int]:
+        """(окно, шаг) текущего плана; без плана — значения для REFERENCE_HEIGHT."""
+        if self.plan is None:
+            return HERO_SQUARE_SIZE, STEP_SIZE
+        return self.plan["window"], self.plan["step"]
+
+    # --- целиком ----------------------------------------------------------
+    def recognize_image(self, image: Image.Image, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Стадии crop..nms для уже загруженного кадра."""
+        timings = timings if timings is not None else {}
+        self.configure(image.width, image.height)
+        t = time.perf_counter()
+        roi = self.crop(image)
+        timings['crop'] = time.perf_counter() - t
+        return self.recognize_roi(roi, timings)
+
+    def recognize_roi(self, roi: Image.Image, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        timings = timings if timings is not None else {}
+        window, step = self.window_size()
+        t = time.perf_counter()
+        batch, positions = self.make_windows(roi, window, step)
+        timings['windowing'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        embeddings = self.infer(batch)
+        timings['inference'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        boxes, scores, labels = self.match(embeddings, positions, window)
+        timings['matching'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        keep = self.nms(boxes, scores, labels)
+        timings['nms'] = time.perf_counter() - t
+        return self.to_detections(boxes, scores, labels, keep)
+
+    def recognize_file(self, path: str, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        timings = timings if timings is not None else {}
+        if self.roi_cache:
+            # Уже обрезанная область из .npy (mmap) вместо декодирования всего PNG
+            import numpy as np
+            from PIL import Image
+            from roi_cache import load_roi
+            t = time.perf_counter()
+            roi, size = load_roi(path)
+            roi = Image.fromarray(np.asarray(roi))
+            timings['load'] = time.perf_counter() - t
+            timings['crop'] = 0.0
+            self.configure(*size)
+            return self.recognize_roi(roi, timings)
+        t = time.perf_counter()
+        image = self.load_image(path)
+        timings['load'] = time.perf_counter() - t
+        return self.recognize_image(image, timings)
+
+    def recognize_batch(self, images: List[Image.Image]) -> List[List[Dict]]:
+        """Распознаёт несколько кадров одного разрешения за один проход модели
+        и одну постобработку."""
+        import numpy as np
+        from recognition_postprocess import split_by_image
+        batches, positions, image_ids = [], [], []
+        if images:
+            self.configure(images[0].width, images[0].height)
+        window, step = self.window_size()
+        for i, image in enumerate(images):
+            batch, pos = self.make_windows(self.crop(image), window, step)
+            batches.append(batch)
+            positions.extend(pos)
+            image_ids.append(np.full(len(pos), i, dtype=np.int64))
+        if not batches:
+            return []
+        embeddings = self.infer(np.concatenate(batches))
+        boxes, scores, labels = self.match(embeddings, positions, window)
+        ids = np.concatenate(image_ids)
+        keep = self.nms(boxes, scores, labels, ids)
+        return [self.to_detections(boxes, scores, labels, part)
+                for part in split_by_image(keep, ids, len(images))]
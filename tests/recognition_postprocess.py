@@ -0,0 +1,166 @@
+"""
+Векторизованная постобработка детекций: фильтр по порогу, жадный NMS и
+отбор top-MAX_HEROES.
+
+Работает напрямую с массивами NumPy (boxes [N, 4] в формате x1, y1, x2, y2;
+scores [N]; labels [N]; image_ids [N]) и принимает детекции сразу с многих
+изображений, чтобы пакетное распознавание не платило Python-оверхед за
+каждый кадр.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from recognition_common import CONFIDENCE_THRESHOLD, MAX_HEROES
+
+NMS_IOU_THRESHOLD = 0.4
+
+
+def box_area(box):
+    """Вычислить площадь bounding box"""
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def box_iou_batch(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Векторизованный расчет IoU для двух наборов bounding boxes"""
+    area_a = box_area(boxes_a.T)
+    area_b = box_area(boxes_b.T)
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[:, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[:, 2:])
+
+    area_inter = np.prod(
+        np.clip(bottom_right - top_left, a_min=0, a_max=None), axis=2
+    )
+
+    return area_inter / (area_a[:, None] + area_b - area_inter)
+
+
+def _group_ids(*keys: np.ndarray) -> np.ndarray:
+    """Плотные номера групп для комбинации ключей (например, image_id + label)."""
+    stacked = np.stack([np.asarray(k, dtype=np.int64) for k in keys], axis=1)
+    _, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return inverse.reshape(-1)
+
+
+def greedy_nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = NMS_IOU_THRESHOLD) -> np.ndarray:
+    """Жадный NMS без разделения по классам. Возвращает индексы по убыванию score.
+
+    Итераций ровно столько, сколько боксов осталось, а IoU каждый раз
+    считается одним векторным вызовом — полная матрица N x N не строится.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    areas = box_area(boxes.T)
+    remaining = np.argsort(-np.asarray(scores), kind="stable")
+    keep = []
+    while remaining.size:
+        i = remaining[0]
+        keep.append(i)
+        rest = remaining[1:]
+        if not rest.size:
+            break
+        top_left = np.maximum(boxes[i, :2], boxes[rest, :2])
+        bottom_right = np.minimum(boxes[i, 2:], boxes[rest, 2:])
+        inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+        iou = inter / (areas[i] + areas[rest] - inter)
+        remaining = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, labels: Optional[np.ndarray] = None,
+                image_ids: Optional[np.ndarray] = None, iou_threshold: float = NMS_IOU_THRESHOLD,
+                class_agnostic: bool = False) -> np.ndarray:
+    """NMS по группам (изображение и, если не class_agnostic, класс) за один проход.
+
+    Боксы разных групп разносятся по координатам на непересекающиеся
+    участки, поэтому один вызов greedy_nms эквивалентен отдельному NMS в
+    каждой группе.
+    """
+    n = len(boxes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = [np.zeros(n, dtype=np.int64) if image_ids is None else image_ids]
+    if not class_agnostic and labels is not None:
+        keys.append(labels)
+    groups = _group_ids(*keys)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    offset = boxes.max() - boxes.min() + 1.0
+    shifted = boxes + (groups * offset)[:, None]
+    return greedy_nms(shifted, scores, iou_threshold)
+
+
+def top_k_per_image(scores: np.ndarray, image_ids: np.ndarray, k: int) -> np.ndarray:
+    """Индексы не более чем k лучших детекций каждого изображения (изображение, -score)."""
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((-np.asarray(scores), np.asarray(image_ids)))
+    sorted_ids = np.asarray(image_ids)[order]
+    starts = np.r_[0, np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    rank = np.arange(len(order)) - group_start
+    return order[rank < k]
+
+
+def best_per_label(scores: np.ndarray, labels: np.ndarray, image_ids: np.ndarray) -> np.ndarray:
+    """Оставляет одну (лучшую) детекцию каждого класса на изображении."""
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((-np.asarray(scores), np.asarray(labels), np.asarray(image_ids)))
+    pairs = np.stack([np.asarray(image_ids)[order], np.asarray(labels)[order]], axis=1)
+    first = np.r_[True, np.any(pairs[1:] != pairs[:-1], axis=1)]
+    return order[first]
+
+
+def postprocess(boxes: np.ndarray, scores: np.ndarray, labels: np.ndarray,
+                image_ids: Optional[np.ndarray] = None,
+                confidence_threshold: float = CONFIDENCE_THRESHOLD,
+                iou_threshold: float = NMS_IOU_THRESHOLD,
+                max_per_image: int = MAX_HEROES,
+                class_agnostic: bool = True) -> np.ndarray:
+    """Полная постобработка: порог -> NMS -> один бокс на героя -> top-k.
+
+    По умолчанию NMS не разделяет классы: соседние окна одного портрета,
+    совпавшие с разными героями, должны гасить друг друга (как в исходном
+    non_max_suppression). Возвращает индексы исходных детекций,
+    отсортированные по (изображение, -score).
+    """
+    scores = np.asarray(scores)
+    labels = np.asarray(labels)
+    image_ids = np.zeros(len(scores), dtype=np.int64) if image_ids is None else np.asarray(image_ids)
+
+    idx = np.flatnonzero(scores >= confidence_threshold)
+    if not idx.size:
+        return idx
+    kept = idx[batched_nms(np.asarray(boxes)[idx], scores[idx], labels[idx], image_ids[idx],
+                           iou_threshold, class_agnostic)]
+    kept = kept[best_per_label(scores[kept], labels[kept], image_ids[kept])]
+    kept = kept[top_k_per_image(scores[kept], image_ids[kept], max_per_image)]
+    return kept
+
+
+def split_by_image(indices: np.ndarray, image_ids: np.ndarray, n_images: int) -> List[np.ndarray]:
+    """Раскладывает индексы детекций по изображениям, сохраняя порядок."""
+    ids = np.asarray(image_ids)[indices]
+    return [indices[ids == i] for i in range(n_images)]
+
+
+# =============================================================================
+# СОВМЕСТИМОСТЬ СО СЛОВАРЯМИ ДЕТЕКЦИЙ
+# =============================================================================
+def detections_to_arrays(detections: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """[{'position': (x, y), 'size': (w, h), 'confidence': c}, ...] -> boxes, scores."""
+    if not detections:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32)
+    pos = np.array([d['position'] for d in detections], dtype=np.float32)
+    size = np.array([d['size'] for d in detections], dtype=np.float32)
+    boxes = np.concatenate([pos, pos + size], axis=1)
+    scores = np.array([d['confidence'] for d in detections], dtype=np.float32)
+    return boxes, scores
+
+
+def non_max_suppression(detections: List[Dict], iou_threshold: float = NMS_IOU_THRESHOLD) -> List[Dict]:
+    """Non-Maximum Suppression для удаления пересекающихся детекций (словарный интерфейс)."""
+    boxes, scores = detections_to_arrays(detections)
+    return [detections[i] for i in greedy_nms(boxes, scores, iou_threshold)]
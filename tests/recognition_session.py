@@ -0,0 +1,199 @@
+"""
+Быстрый старт распознавателя.
+
+- Граф ONNX оптимизируется один раз и сохраняется на диск (CACHE_DIR);
+  следующие запуски грузят уже оптимизированную модель без повторной
+  оптимизации.
+- onnxruntime импортируется только при создании сессии.
+- Отчёт о холодном/тёплом старте:
+      python tests/recognition_session.py --report
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+from recognition_common import MODEL_PATH, TARGET_SIZE, CACHE_DIR
+
+logger = logging.getLogger("recognition_session")
+
+
+def _model_fingerprint(model_path: str, ort_version: str, extra: str = "") -> str:
+    """Ключ кэша: модель (путь, размер, mtime) + версия onnxruntime + настройки."""
+    st = os.stat(model_path)
+    raw = f"{os.path.abspath(model_path)}|{st.st_size}|{int(st.st_mtime)}|{ort_version}|{extra}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def optimized_model_path(model_path: str, cache_dir: str = CACHE_DIR) -> str:
+    import onnxruntime
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    key = _model_fingerprint(model_path, onnxruntime.__version__)
+    return os.path.join(cache_dir, f"{stem}.{key}.opt.onnx")
+
+
+def make_session_options(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                         execution_mode: Optional[str] = None):
+    import onnxruntime
+    opts = onnxruntime.SessionOptions()
+    if intra_op_threads:
+        opts.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        opts.inter_op_num_threads = inter_op_threads
+    if execution_mode == "parallel":
+        opts.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+    elif execution_mode == "sequential":
+        opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    return opts
+
+
+def create_session(model_path: str = MODEL_PATH, cache_dir: Optional[str] = CACHE_DIR,
+                   intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                   execution_mode: Optional[str] = None, stats: Optional[Dict] = None):
+    """Создаёт InferenceSession, используя сохранённый оптимизированный граф.
+
+    cache_dir=None отключает кэш (каждый раз полная оптимизация).
+    В stats (если передан) пишутся import_s, session_s и cache_hit.
+    """
+    stats = stats if stats is not None else {}
+    t = time.perf_counter()
+    import onnxruntime
+    stats["import_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    opts = make_session_options(intra_op_threads, inter_op_threads, execution_mode)
+    providers = ['CPUExecutionProvider']
+    cached = optimized_model_path(model_path, cache_dir) if cache_dir else None
+
+    if cached and os.path.exists(cached):
+        # Граф уже оптимизирован — повторно не прогоняем оптимизатор.
+        opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        session = onnxruntime.InferenceSession(cached, sess_options=opts, providers=providers)
+        stats["cache_hit"] = True
+    else:
+        stats["cache_hit"] = False
+        if cached:
+            os.makedirs(cache_dir, exist_ok=True)
+            # EXTENDED, а не ALL: сохранённый граф не зависит от раскладки
+            # памяти конкретного CPU и переносим между машинами.
+            opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+            tmp_path = f"{cached}.{os.getpid()}.tmp"
+            opts.optimized_model_filepath = tmp_path
+            session = onnxruntime.InferenceSession(model_path, sess_options=opts, providers=providers)
+            try:
+                # Атомарно: параллельные воркеры не увидят недописанный файл.
+                os.replace(tmp_path, cached)
+                logger.info(f"Оптимизированный граф сохранён: {cached}")
+            except OSError as e:
+                logger.warning(f"Не удалось сохранить оптимизированный граф: {e}")
+        else:
+            session = onnxruntime.InferenceSession(model_path, sess_options=opts, providers=providers)
+    stats["session_s"] = time.perf_counter() - t
+    return session
+
+
+def dummy_input(session, batch: int = 1):
+    """Нулевой тензор под первый вход модели (динамические оси -> batch/TARGET_SIZE)."""
+    import numpy as np
+    inp = session.get_inputs()[0]
+    shape = []
+    for i, dim in enumerate(inp.shape):
+        if isinstance(dim, int) and dim > 0:
+            shape.append(dim)
+        else:
+            shape.append(batch if i == 0 else (3 if i == 1 else TARGET_SIZE))
+    return inp.name, np.zeros(shape, dtype=np.float32)
+
+
+# =============================================================================
+# ОТЧЁТ О СТАРТЕ
+# =============================================================================
+def measure_startup(model_path: str, cache_dir: Optional[str]) -> Dict:
+    """Замеряет старт в ТЕКУЩЕМ процессе (вызывается из дочернего процесса)."""
+    result = {}
+    t0 = time.perf_counter()
+    t = time.perf_counter()
+    import numpy  # noqa: F401
+    result["import_numpy_s"] = time.perf_counter() - t
+    t = time.perf_counter()
+    from PIL import Image  # noqa: F401
+    result["import_pil_s"] = time.perf_counter() - t
+
+    stats = {}
+    session = create_session(model_path, cache_dir=cache_dir, stats=stats)
+    result["import_onnxruntime_s"] = stats["import_s"]
+    result["session_s"] = stats["session_s"]
+    result["cache_hit"] = stats["cache_hit"]
+
+    name, tensor = dummy_input(session)
+    t = time.perf_counter()
+    session.run(None, {name: tensor})
+    result["first_inference_s"] = time.perf_counter() - t
+    result["total_s"] = time.perf_counter() - t0
+    return result
+
+
+def _run_child(model_path: str, cache_dir: Optional[str]) -> Dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--measure", "--model", model_path]
+    cmd += ["--cache-dir", cache_dir] if cache_dir else ["--no-cache"]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def startup_report(model_path: str) -> Dict:
+    """Холодный старт (пустой кэш) против тёплого (кэш уже заполнен), каждый в свежем процессе."""
+    with tempfile.TemporaryDirectory(prefix="ort_cache_") as tmp_cache:
+        report = {
+            "no_cache": _run_child(model_path, None),
+            "cold": _run_child(model_path, tmp_cache),
+            "warm": _run_child(model_path, tmp_cache),
+        }
+    return report
+
+
+def print_startup_report(report: Dict):
+    keys = ["import_numpy_s", "import_pil_s", "import_onnxruntime_s", "session_s", "first_inference_s", "total_s"]
+    print(f"{'Этап':<24}" + "".join(f"{name:>12}" for name in report))
+    for key in keys:
+        print(f"{key:<24}" + "".join(f"{report[name][key] * 1000:>10.1f}мс" for name in report))
+    cold, warm = report["cold"]["session_s"], report["warm"]["session_s"]
+    if warm > 0:
+        print(f"\nСоздание сессии: холодный {cold * 1000:.0f} мс -> тёплый {warm * 1000:.0f} мс (x{cold / warm:.1f})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Кэш оптимизированной ONNX-модели и отчёт о времени старта")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--report", action="store_true", help="Сравнить холодный и тёплый старт")
+    parser.add_argument("--json", action="store_true", help="Вывести отчёт в JSON")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure_startup(args.model, None if args.no_cache else args.cache_dir)))
+        return 0
+    if args.report:
+        report = startup_report(args.model)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_startup_report(report)
+        return 0
+
+    # Без флагов — просто прогреваем кэш
+    stats = {}
+    create_session(args.model, cache_dir=None if args.no_cache else args.cache_dir, stats=stats)
+    print(f"Сессия создана за {stats['session_s'] * 1000:.0f} мс (кэш {'найден' if stats['cache_hit'] else 'создан'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
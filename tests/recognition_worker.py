@@ -0,0 +1,233 @@
+"""
+Распознавание в отдельном процессе.
+
+Захват и инференс ONNX больше не делят один GIL: кадры пишутся в
+кольцевой буфер в multiprocessing.shared_memory (SharedFrameRing), а через
+очереди ходят только короткие сообщения — (seq, время захвата) к воркеру и
+результат (герои, уверенности, позиции, отметки времени) обратно.
+
+Воркер всегда берёт самый свежий кадр: если инференс не успевает за
+захватом, промежуточные кадры пропускаются, а частота захвата не падает.
+Если писатель начал перезаписывать слот (даже не закоммитив кадр), пока воркер его обрабатывал,
+результат помечается torn и не учитывается.
+
+    python tests/recognition_worker.py screenshots --fps 10 --frames 100
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import argparse
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from frame_source import FrameRing, capture_loop, open_source
+from latency_stats import summarize
+
+logger = logging.getLogger("recognition_worker")
+
+READY = "ready"
+
+
+class SharedFrameRing(FrameRing):
+    """FrameRing поверх shared_memory. name=None — создать, иначе подключиться."""
+
+    def __init__(self, capacity: int, shape: Tuple[int, ...], name: Optional[str] = None):
+        create = name is None
+        size = FrameRing.nbytes(capacity, shape)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        super().__init__(capacity, shape, buffer=self.shm.buf, init=create)
+        self.owner = create
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        # numpy-представления держат ссылку на буфер — без их удаления close() падает с BufferError
+        self.frames = self.timestamps = self.slot_seq = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# =============================================================================
+# ПРОЦЕСС-ВОРКЕР
+# =============================================================================
+def recognizer_handler(screen_size: Optional[Tuple[int, int]] = None, **kwargs) -> Callable[[np.ndarray], List[Dict]]:
+    """Фабрика обработчика по умолчанию: StagedRecognizer внутри воркера.
+    screen_size — полный размер экрана, по которому выбираются окно и эталоны."""
+    from PIL import Image
+    from recognition_pipeline import StagedRecognizer
+
+    recognizer = StagedRecognizer(**kwargs)
+    if not (recognizer.load_model() and recognizer.load_embeddings()):
+        raise RuntimeError("Не удалось загрузить модель или эмбеддинги")
+    if screen_size:
+        recognizer.configure(*screen_size)
+
+    def handle(frame: np.ndarray) -> List[Dict]:
+        return recognizer.recognize_roi(Image.fromarray(frame))
+    return handle
+
+
+def _latest_request(requests, first):
+    """Сливает накопившиеся запросы и возвращает (самый свежий, сколько пропущено)."""
+    latest, skipped = first, 0
+    while True:
+        try:
+            item = requests.get_nowait()
+        except queue.Empty:
+            return latest, skipped
+        if item is None:
+            return None, skipped
+        latest, skipped = item, skipped + 1
+
+
+def worker_main(shm_name: str, capacity: int, shape: Tuple[int, ...], requests, results,
+                handler_factory: Callable = recognizer_handler, factory_kwargs: Optional[Dict] = None):
+    ring = SharedFrameRing(capacity, shape, name=shm_name)
+    try:
+        try:
+            handle = handler_factory(**(factory_kwargs or {}))
+        except Exception as e:
+            # Иначе родитель ждал бы READY до таймаута, не зная причины
+            results.put({"error": f"{type(e).__name__}: {e}"})
+            return
+        results.put(READY)
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            request, skipped = _latest_request(requests, request)
+            if request is None:
+                break
+            seq, t_capture = request
+            t_start = time.perf_counter()
+            # Обработка прямо в разделяемой памяти, без копии кадра. Слот проверяется
+            # до и после: писатель помечает его пустым ещё до начала перезаписи
+            torn = not ring.is_current(seq)
+            detections = [] if torn else handle(ring.frames[seq % capacity])
+            results.put({
+                "seq": seq,
+                "detections": detections,
+                "skipped": skipped,
+                "torn": torn or not ring.is_current(seq),
+                "t_capture": t_capture,
+                "t_start": t_start,
+                "t_done": time.perf_counter(),
+            })
+    finally:
+        ring.close()
+
+
+class RecognitionWorker:
+    """Родительская сторона: буфер, очереди и процесс распознавания."""
+
+    def __init__(self, shape: Tuple[int, ...], capacity: int = 8,
+                 handler_factory: Callable = recognizer_handler, factory_kwargs: Optional[Dict] = None):
+        self.ring = SharedFrameRing(capacity, shape)
+        self.requests = mp.Queue()
+        self.results = mp.Queue()
+        self.process = mp.Process(
+            target=worker_main, daemon=True,
+            args=(self.ring.name, capacity, tuple(shape), self.requests, self.results,
+                  handler_factory, factory_kwargs),
+        )
+
+    def start(self, timeout: float = 120.0):
+        """Запускает процесс и ждёт, пока он загрузит модель."""
+        self.process.start()
+        msg = self.results.get(timeout=timeout)
+        if msg != READY:
+            self.process.join(timeout=5.0)
+            self.ring.close()
+            error = msg.get("error") if isinstance(msg, dict) else msg
+            raise RuntimeError(f"Воркер не запустился: {error}")
+        return self
+
+    def submit(self, seq: int):
+        """Сообщает воркеру о новом кадре в буфере (кадр уже записан и закоммичен)."""
+        self.requests.put((seq, float(self.ring.timestamps[seq % self.ring.capacity])))
+
+    def poll(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Готовые результаты; timeout — ждать первый результат до timeout секунд."""
+        out = []
+        try:
+            out.append(self.results.get(timeout=timeout) if timeout else self.results.get_nowait())
+            while True:
+                out.append(self.results.get_nowait())
+        except queue.Empty:
+            pass
+        return out
+
+    def stop(self, timeout: float = 10.0) -> List[Dict]:
+        """Останавливает воркер и возвращает результаты, полученные при остановке."""
+        self.requests.put(None)
+        leftovers = []
+        deadline = time.monotonic() + timeout
+        while self.process.is_alive() and time.monotonic() < deadline:
+            leftovers.extend(self.poll(timeout=0.1))
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        leftovers.extend(self.poll())
+        self.ring.close()
+        return leftovers
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        if self.ring.frames is not None:
+            self.stop()
+
+
+def latency_report(results: List[Dict], captured: int) -> Dict:
+    """Сквозная задержка (захват -> результат) и доля обработанных кадров."""
+    valid = [r for r in results if not r["torn"]]
+    return {
+        "captured": captured,
+        "processed": len(valid),
+        "skipped": sum(r["skipped"] for r in results),
+        "torn": len(results) - len(valid),
+        "end_to_end_ms": summarize([r["t_done"] - r["t_capture"] for r in valid]),
+        "queue_wait_ms": summarize([r["t_start"] - r["t_capture"] for r in valid]),
+        "inference_ms": summarize([r["t_done"] - r["t_start"] for r in valid]),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Захват в основном процессе, распознавание в воркере")
+    parser.add_argument("source", help="'screen', папка с PNG или видеофайл")
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--ring", type=int, default=8)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    results: List[Dict] = []
+    kwargs = {"preload": True} if os.path.isdir(args.source) else {}
+    with open_source(args.source, **kwargs) as source:
+        with RecognitionWorker(source.frame_shape, capacity=args.ring,
+                               factory_kwargs={"screen_size": source.screen_size}) as worker:
+            def on_frame(seq, _frame):
+                worker.submit(seq)
+                results.extend(worker.poll())
+
+            stats = capture_loop(source, worker.ring, args.fps, max_frames=args.frames, on_frame=on_frame)
+            results.extend(worker.stop())
+
+    for r in results[-3:]:
+        logger.info(f"кадр {r['seq']}: {[d['hero'] for d in r['detections']]}")
+    logger.info(f"Захват: {stats}")
+    logger.info(f"Распознавание: {latency_report(results, stats['frames'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Кэш декодированных областей распознавания.
+
+Скриншоты — PNG по 2-3 МБ, из которых распознаванию нужна только
+RECOGNITION_AREA. Обрезанная область сохраняется в .npy, ключ — хэш
+содержимого файла и параметры области; повторные прогоны тестов и
+бенчмарка читают её через np.load(mmap_mode='r') вместо декодирования PNG.
+
+    python tests/roi_cache.py --warm screenshots
+    python tests/roi_cache.py --clear
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from recognition_common import CACHE_DIR, RECOGNITION_AREA, recognition_box
+
+ROI_CACHE_DIR = os.path.join(CACHE_DIR, "rois")
+
+logger = logging.getLogger("roi_cache")
+
+# Хэш содержимого в пределах процесса: (путь, размер, mtime) -> sha1.
+# Бенчмарк читает один файл десятки раз — перечитывать его ради хэша незачем.
+_content_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_hash(path: str) -> str:
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _content_hashes.get(memo_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _content_hashes[memo_key] = h.hexdigest()
+    return digest
+
+
+def roi_cache_key(path: str, area: Optional[Dict] = None) -> str:
+    area_key = json.dumps(area or RECOGNITION_AREA, sort_keys=True)
+    return hashlib.sha1(f"{file_hash(path)}|{area_key}".encode("utf-8")).hexdigest()
+
+
+def load_roi(path: str, area: Optional[Dict] = None,
+             cache_dir: str = ROI_CACHE_DIR) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """(ROI [H, W, 3] uint8 только для чтения, размер полного кадра (w, h)).
+
+    Размер кадра берётся из заголовка PNG (без декодирования) — он нужен
+    распознавателю для выбора окна.
+    """
+    area = area or RECOGNITION_AREA
+    with Image.open(path) as img:
+        size = img.size
+        cached = os.path.join(cache_dir, f"{roi_cache_key(path, area)}.npy")
+        if not os.path.exists(cached):
+            img.load()
+            roi = np.asarray(img.convert("RGB").crop(recognition_box(size[0], size[1], area)))
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(roi))
+            os.replace(tmp, cached)
+    return np.load(cached, mmap_mode="r"), size
+
+
+def clear(cache_dir: str = ROI_CACHE_DIR):
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Кэш обрезанных областей распознавания (.npy)")
+    parser.add_argument("--warm", metavar="DIR", help="Заполнить кэш для всех PNG в папке")
+    parser.add_argument("--clear", action="store_true", help="Очистить кэш")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.clear:
+        clear()
+        logger.info(f"Кэш очищен: {ROI_CACHE_DIR}")
+    if args.warm:
+        files = sorted(f for f in os.listdir(args.warm) if f.lower().endswith(".png"))
+        for fname in files:
+            roi, size = load_roi(os.path.join(args.warm, fname))
+            logger.info(f"{fname}: {size[0]}x{size[1]} -> ROI {roi.shape[1]}x{roi.shape[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
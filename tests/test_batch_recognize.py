@@ -0,0 +1,53 @@
+import json
+
+import batch_recognize
+
+from batch_recognize import load_done, split_threads, walk_images
+
+
+def test_walk_images_is_recursive_and_sorted(tmp_path):
+    (tmp_path / "b").mkdir()
+    for rel in ("b/2.png", "a.png", "b/1.PNG", "notes.txt"):
+        (tmp_path / rel).write_bytes(b"")
+    assert walk_images(str(tmp_path)) == ["a.png", "b/1.PNG", "b/2.png"]
+
+
+def test_load_done_skips_errors_and_truncated_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    lines = [
+        json.dumps({"file": "ok.png", "heroes": []}),
+        json.dumps({"file": "bad.png", "error": "OSError"}),
+        '{"file": "cut',
+    ]
+    output.write_text("\n".join(lines), encoding="utf-8")
+    assert load_done(str(output)) == {"ok.png"}
+    assert load_done(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_thread_budget_is_split_between_workers():
+    assert split_threads(8, 4) == 2
+    assert split_threads(2, 4) == 1
+
+
+def test_worker_init_exception_is_reported_not_raised(tmp_path):
+    model = tmp_path / "broken.onnx"
+    model.write_bytes(b"not a model")
+    try:
+        batch_recognize._init_worker({"model_path": str(model), "batch_size": 1, "session_options": {}})
+        record = batch_recognize._process((str(tmp_path), "a.png"))
+        assert record["fatal"] and record["file"] == "a.png"
+        assert ":" in record["error"]
+    finally:
+        batch_recognize._recognizer = batch_recognize._init_error = None
+
+
+def test_truncated_last_line_is_terminated_before_append(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"file": "ok.png"}\n{"file": "cut', encoding="utf-8")
+    batch_recognize.ensure_trailing_newline(str(output))
+    batch_recognize.ensure_trailing_newline(str(output))
+    assert output.read_text(encoding="utf-8") == '{"file": "ok.png"}\n{"file": "cut\n'
+    empty = tmp_path / "empty.jsonl"
+    empty.write_bytes(b"")
+    batch_recognize.ensure_trailing_newline(str(empty))
+    assert empty.read_bytes() == b""
@@ -0,0 +1,88 @@
+import sys
+import types
+
+from PIL import Image
+
+from benchmark_recognition import compare_with_baseline, run_benchmark
+from latency_stats import percentile, summarize
+
+
+def _result(p95=100.0, fps=5.0, f1=0.9):
+    stages = {"inference": {"p50": p95 / 2, "p95": p95, "p99": p95, "mean": p95 / 2, "count": 10}}
+    return {
+        "stages": stages,
+        "total": {"p50": p95, "p95": p95, "p99": p95, "mean": p95, "count": 10},
+        "throughput_fps": fps,
+        "accuracy": {"precision": f1, "recall": f1, "f1": f1},
+    }
+
+
+def test_percentile_interpolates_like_numpy():
+    values = [1, 2, 3, 4]
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 0) == 1
+    assert percentile(values, 100) == 4
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_converts_to_milliseconds():
+    s = summarize([0.010, 0.020, 0.030])
+    assert s["p50"] == 20.0
+    assert s["count"] == 3
+
+
+def test_same_result_is_not_a_regression():
+    assert compare_with_baseline(_result(), _result()) == []
+
+
+def test_slower_stage_is_a_regression():
+    problems = compare_with_baseline(_result(p95=200.0, fps=5.0), _result())
+    assert any("inference" in p for p in problems)
+
+
+def test_accuracy_drop_is_a_regression():
+    problems = compare_with_baseline(_result(f1=0.5), _result(f1=0.9))
+    assert any("F1" in p for p in problems)
+
+
+def test_baseline_without_accuracy_is_ignored():
+    base = _result()
+    base["accuracy"] = None
+    assert compare_with_baseline(_result(f1=0.1), base) == []
+
+
+def test_baseline_from_another_entry_point_is_not_compared():
+    base, result = _result(), _result(p95=10.0)
+    result["meta"] = {"entry": "system"}
+    problems = compare_with_baseline(result, base)
+    assert len(problems) == 1 and "pipeline" in problems[0]
+
+
+def test_system_entry_times_the_app_recognizer(tmp_path, monkeypatch):
+    class FakeSystem:
+        crops = []
+
+        def load_model(self):
+            return True
+
+        def load_embeddings(self):
+            return True
+
+        def crop_image_to_recognition_area(self, img):
+            FakeSystem.crops.append(img.size)
+            return img
+
+        def recognize_heroes_optimized(self, roi):
+            return ["storm_1"]
+
+        def normalize_hero_name_for_display(self, name):
+            return name.split("_")[0].capitalize()
+
+    monkeypatch.setitem(sys.modules, "hero_recognition_system",
+                        types.SimpleNamespace(HeroRecognitionSystem=FakeSystem))
+    shot = tmp_path / "1.png"
+    Image.new("RGB", (64, 36)).save(shot)
+    result = run_benchmark([str(shot)], {"1": ["Storm"]}, iterations=2, warmup=1, entry="system")
+    assert result["meta"]["entry"] == "system" and len(FakeSystem.crops) == 3
+    assert result["per_image"]["1"]["recognized"] == ["Storm"]
+    assert result["accuracy"]["f1"] == 1.0 and result["total"]["count"] == 2
@@ -0,0 +1,106 @@
+import os
+import sys
+import importlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "build_scripts"))
+
+from recognition_common import EMBEDDING_SCALES, REFERENCE_HEIGHT, REFERENCES_FILE  # noqa: E402
+
+
+@pytest.fixture
+def be(tmp_path, monkeypatch):
+    # build_embeddings при импорте открывает build_embeddings.log в текущей папке
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("build_embeddings")
+
+
+class StubRecognizer:
+    """Вместо модели: «эмбеддинг» тайла — его средний цвет и размер."""
+    calls = []
+
+    def __init__(self, model_path=None, batch_size=None):
+        self.batch_size = batch_size or 4
+
+    def load_model(self):
+        return True
+
+    def prepare(self, tiles):
+        return tiles
+
+    def infer(self, tiles):
+        StubRecognizer.calls.append(len(tiles))
+        return np.array([list(np.asarray(t, dtype=np.float32).mean(axis=(0, 1))) + [t.width] for t in tiles],
+                        dtype=np.float32)
+
+
+def _manifest(be, icons, signature="model|1|1"):
+    return {"version": be.MANIFEST_VERSION, "model": signature, "variants": list(be.PADDING_VARIANTS),
+            "scales": list(EMBEDDING_SCALES), "icons": icons}
+
+
+def test_plan_detects_added_changed_and_removed_icons(be, tmp_path):
+    out = tmp_path / "emb"
+    out.mkdir()
+    for name in ("kept", "edited", "gone"):
+        np.save(out / f"{name}.npy", np.zeros(4, dtype=np.float32))
+    manifest = _manifest(be, {"kept.png": "1", "edited.png": "2", "gone.png": "3", "lost.png": "4"})
+    icons = {"kept.png": "1", "edited.png": "22", "new.png": "5", "lost.png": "4"}
+
+    changed, removed, config_changed = be.plan(icons, manifest, "model|1|1", str(out))
+    # lost.png не менялась, но её .npy пропал — тоже пересчёт
+    assert changed == ["edited.png", "lost.png", "new.png"]
+    assert removed == ["gone.png"] and not config_changed
+
+    # Другая модель — пересчёт всего, удалённые всё равно вычищаются
+    changed, removed, config_changed = be.plan(icons, manifest, "model|2|2", str(out))
+    assert changed == sorted(icons) and removed == ["gone.png"] and config_changed
+    assert be.plan(icons, manifest, "model|1|1", str(out), full=True)[0] == sorted(icons)
+
+
+def test_consolidate_stacks_variants_with_scales(be, tmp_path):
+    per_icon = len(be.PADDING_VARIANTS) * len(EMBEDDING_SCALES)
+    np.save(tmp_path / "a.npy", np.ones((per_icon, 4), dtype=np.float16))
+    np.save(tmp_path / "b.npy", np.full(4, 2.0, dtype=np.float32))  # старый формат: один вектор
+    (tmp_path / "notes.txt").write_text("x")
+
+    assert be.consolidate(str(tmp_path)) == (per_icon + 1, 4)
+    with np.load(tmp_path / REFERENCES_FILE) as refs:
+        assert refs["vectors"].dtype == np.float32
+        assert list(refs["names"]) == ["a"] * per_icon + ["b"]
+        assert list(refs["scales"][:per_icon]) == list(np.repeat(EMBEDDING_SCALES, len(be.PADDING_VARIANTS)))
+        assert refs["scales"][-1] == REFERENCE_HEIGHT
+        assert refs["vectors"][-1].tolist() == [2.0] * 4
+
+
+def test_main_embeds_only_new_and_changed_icons(be, tmp_path, monkeypatch):
+    monkeypatch.setattr("recognition_pipeline.StagedRecognizer", StubRecognizer)
+    StubRecognizer.calls = []
+    icons, out, model = tmp_path / "icons", tmp_path / "emb", tmp_path / "model.onnx"
+    icons.mkdir()
+    model.write_bytes(b"stub")
+    for name, color in (("storm", (200, 0, 0)), ("hulk", (0, 200, 0))):
+        Image.new("RGB", (32, 32), color).save(icons / f"{name}.png")
+    per_icon = len(be.PADDING_VARIANTS) * len(EMBEDDING_SCALES)
+
+    def build():
+        return be.main(icons_dir=str(icons), out_dir=str(out), model_path=str(model), batch_size=4)
+
+    def chunks(n):
+        # Модель получает тайлы пачками не больше batch_size
+        return [min(4, n - start) for start in range(0, n, 4)]
+
+    assert build() == 0 and StubRecognizer.calls == chunks(2 * per_icon)
+    assert build() == 0 and StubRecognizer.calls == chunks(2 * per_icon)  # ничего не изменилось
+
+    Image.new("RGB", (32, 32), (0, 0, 200)).save(icons / "storm.png")
+    os.remove(icons / "hulk.png")
+    assert build() == 0 and StubRecognizer.calls == chunks(2 * per_icon) + chunks(per_icon)
+    assert sorted(f for f in os.listdir(out) if f.endswith(".npy")) == ["storm.npy"]
+    with np.load(out / REFERENCES_FILE) as refs:
+        assert list(refs["names"]) == ["storm"] * per_icon
+        assert refs["vectors"][0, 2] > refs["vectors"][0, 0]  # пересчитан по новой (синей) иконке
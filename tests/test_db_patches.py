@@ -0,0 +1,75 @@
+import os
+import sys
+import copy
+import json
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "build_scripts"))
+
+from build_db_patches import apply_patch, build_patches, diff, sha256  # noqa: E402
+
+
+def _snapshot(heroes=40, opponents=30):
+    names = [f"Hero {i}" for i in range(heroes)]
+    return {
+        "teamups": [{"name": "DUO", "tier": "A", "win_rate": "51.0%", "heroes": ["hero-0", "hero-1"]}],
+        "heroes": {
+            name: {
+                "win_rate": "50.00%", "role": "Duelist",
+                "opponents": [{"opponent": o, "difference": f"{(i * 7 + j) % 21 - 10}.00%", "matches": "1,000"}
+                              for j, o in enumerate(names[:opponents]) if o != name],
+                "maps": [{"map_name": f"img_map_{m}", "win_rate": "50.0%"} for m in range(5)],
+            }
+            for i, name in enumerate(names)
+        },
+    }
+
+
+def test_delta_round_trip_covers_keyed_lists_and_reordering():
+    old = _snapshot(heroes=6, opponents=6)
+    new = copy.deepcopy(old)
+    hero = new["heroes"]["Hero 0"]
+    hero["opponents"][0]["difference"] = "-3.50%"
+    hero["opponents"].append({"opponent": "Hero 9", "difference": "1.00%", "matches": "10"})
+    hero["opponents"].reverse()
+    del hero["maps"][2]
+    hero["tier"] = "S"
+    del new["heroes"]["Hero 5"]["role"]
+    new["heroes"]["Hero 6"] = {"win_rate": "49.00%", "opponents": [], "maps": []}
+    new["teamups"][0]["heroes"] = ["hero-0", "hero-2"]
+
+    delta = diff(old, new)
+    assert delta["heroes"]["Hero 0"]["opponents"]["$key"] == "opponent"
+    assert "$order" in delta["heroes"]["Hero 0"]["opponents"]
+    assert delta["heroes"]["Hero 5"]["$del"] == ["role"]
+
+    patched = apply_patch(copy.deepcopy(old), {"delta": delta})
+    assert patched == new
+    assert json.dumps(patched) == json.dumps(new)  # порядок элементов списков тоже совпадает
+
+
+def test_build_patches_writes_chain_and_skips_unprofitable(tmp_path):
+    first = _snapshot()
+    second = copy.deepcopy(first)
+    second["heroes"]["Hero 3"]["opponents"][4]["difference"] = "9.99%"
+    # Третий снапшот переписан целиком — патч не меньше файла, его быть не должно
+    third = {"teamups": [], "heroes": {f"Other {i}": {"win_rate": f"{i}%"} for i in range(2000)}}
+
+    names = ["marvel_rivals_stats_20260101-000000.json", "marvel_rivals_stats_20260102-000000.json",
+             "marvel_rivals_stats_20260103-000000.json"]
+    for name, data in zip(names, (first, second, third)):
+        (tmp_path / name).write_text(json.dumps(data, indent=2), encoding="utf-8")
+    (tmp_path / "latest.json").write_text(json.dumps({"current": names[-1]}), encoding="utf-8")
+
+    index = build_patches(str(tmp_path))
+    assert [(e["from"], e["to"]) for e in index["patches"]] == [(names[0], names[1])]
+    entry = index["patches"][0]
+    assert entry["size"] < entry["full_size"] // 50
+    assert entry["to_sha256"] == sha256(second)
+
+    patch = json.loads((tmp_path / "patches" / entry["file"]).read_text(encoding="utf-8"))
+    assert apply_patch(copy.deepcopy(first), patch) == second
+    assert json.loads((tmp_path / "patches" / "index.json").read_text(encoding="utf-8")) == index
+
+    # Повторный запуск переиспользует готовый патч
+    assert build_patches(str(tmp_path)) == index
@@ -0,0 +1,80 @@
+import os
+import sys
+import gzip
+import threading
+import http.client
+from functools import partial
+
+import pytest
+
+from recognition_common import PROJECT_ROOT
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "overwolf_app", "debug"))
+
+from serve import DebugHTTPServer, DebugRequestHandler, parse_range  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path):
+    body = b'{"heroes": {}}' * 100
+    (tmp_path / "stats.json").write_bytes(body)
+    (tmp_path / "stats.json.gz").write_bytes(gzip.compress(body, mtime=0))
+    httpd = DebugHTTPServer(("127.0.0.1", 0), partial(DebugRequestHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1], tmp_path, body
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(conn, path, **headers):
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_range_parsing():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=100-", 100) is None
+    assert parse_range("bytes=-", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+def test_etag_revalidation_compression_and_ranges(server):
+    port, root, body = server
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+
+    response, data = _get(conn, "/stats.json")
+    etag = response.getheader("ETag")
+    assert response.status == 200 and data == body
+    assert response.getheader("Cache-Control") == "no-cache"
+    assert etag.startswith('"') and response.getheader("Content-Encoding") is None
+
+    # Тот же keep-alive: 304 без тела, пока файл не изменился
+    response, data = _get(conn, "/stats.json", **{"If-None-Match": etag})
+    assert response.status == 304 and data == b""
+
+    response, data = _get(conn, "/stats.json", **{"Accept-Encoding": "gzip, deflate"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(data) == body and response.getheader("ETag") != etag
+
+    response, data = _get(conn, "/stats.json", Range="bytes=5-14")
+    assert response.status == 206 and data == body[5:15]
+    assert response.getheader("Content-Range") == f"bytes 5-14/{len(body)}"
+
+    response, _ = _get(conn, "/stats.json", Range=f"bytes={len(body)}-")
+    assert response.status == 416
+
+    # Изменение файла — новый ETag; устаревший .gz больше не отдаётся
+    (root / "stats.json").write_bytes(b"{}")
+    os.utime(root / "stats.json.gz", (1, 1))
+    response, data = _get(conn, "/stats.json", **{"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert response.status == 200 and data == b"{}"
+    assert response.getheader("Content-Encoding") is None
+
+    response, _ = _get(conn, "/missing.json")
+    assert response.status == 404
+    conn.close()
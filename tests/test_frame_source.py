@@ -0,0 +1,39 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from PIL import Image
+
+from frame_source import FolderSource, FrameRing, capture_loop, iter_frames
+
+
+def _folder(tmp_path, count=3, size=(200, 100)):
+    for i in range(count):
+        Image.new("RGB", size, (i * 40, 0, 0)).save(tmp_path / f"{i}.png")
+    return str(tmp_path)
+
+
+def test_ring_overwrites_oldest_frame():
+    ring = FrameRing(2, (1, 1, 3))
+    for value in range(3):
+        ring.push(np.full((1, 1, 3), value, dtype=np.uint8))
+    assert ring.get(0) is None
+    assert ring.get(1)[0][0, 0, 0] == 1
+    seq, frame, _ = ring.latest()
+    assert seq == 2 and frame[0, 0, 0] == 2
+
+
+def test_folder_source_yields_only_the_region(tmp_path):
+    source = FolderSource(_folder(tmp_path), region=(10, 20, 60, 40), loop=False)
+    frames = [frame.copy() for _, frame in iter_frames(source)]
+    assert len(frames) == 3
+    assert frames[0].shape == (20, 50, 3)
+    assert [f[0, 0, 0] for f in frames] == [0, 40, 80]
+
+
+def test_capture_loop_respects_max_frames(tmp_path):
+    source = FolderSource(_folder(tmp_path), preload=True)
+    ring = FrameRing(4, source.frame_shape)
+    seen = []
+    stats = capture_loop(source, ring, fps=0, max_frames=7, on_frame=lambda seq, _: seen.append(seq))
+    assert stats["frames"] == 7
+    assert seen == list(range(7))
@@ -0,0 +1,92 @@
+import json
+
+from counterpick_logic import CounterpickLogic
+from game_state_replay import (GameStateMachine, parse_banned_characters, parse_log_lines,
+                               replay, with_polls)
+
+
+def _logic():
+    def hero(role, opponents):
+        return {"role": role, "win_rate": "50%", "maps": [],
+                "opponents": [{"opponent": o, "difference": f"{d}%"} for o, d in opponents]}
+    logic = CounterpickLogic()
+    logic.game_entities = {"heroes": {"1011": "Hulk"}}
+    logic.load_data({"heroes": {
+        "Hulk": hero("Vanguard", [("Loki", -3), ("Storm", 2)]),
+        "Loki": hero("Strategist", [("Hulk", 3), ("Storm", -1)]),
+        "Storm": hero("Duelist", [("Hulk", -2), ("Loki", 1)]),
+    }})
+    return logic
+
+
+def _roster(name, teammate, character_id=None):
+    return json.dumps({"character_name": name, "character_id": character_id, "is_teammate": teammate})
+
+
+def test_banned_characters_unwraps_double_encoding():
+    raw = json.dumps(json.dumps([{"character_id": 1011}]))
+    assert parse_banned_characters(raw) == [{"character_id": 1011}]
+    assert parse_banned_characters("Hulk, Loki") == ["Hulk", "Loki"]
+    assert parse_banned_characters(json.dumps({"character_name": "Loki"})) == [{"character_name": "Loki"}]
+    assert parse_banned_characters("null") == []
+
+
+def test_empty_rosters_and_repeated_snapshots_do_not_change_state():
+    machine = GameStateMachine(_logic())
+    info = {"match_info": {"match_id": "m1", "map": "Arakko",
+                           "roster_0": _roster(None, False, 1011), "roster_1": _roster("LOKI", True)}}
+    assert machine.update_state_from_info(info)
+    assert machine.process_game_data()["enemy_heroes"] == ["Hulk"]
+
+    assert not machine.update_state_from_info(info)
+    assert not machine.update_state_from_info({"match_info": {"roster_0": None, "roster_1": ""}})
+    assert machine.collect_teams() == (["Hulk"], ["Loki"], [])
+
+    assert machine.update_state_from_info({"match_info": {"match_id": "m2"}})
+    assert machine.rosters == {} and machine.tray_clears == 2
+
+
+def test_replay_counts_redundant_and_coalesced_recomputations():
+    base = {"match_id": "m1", "map": "Arakko", "roster_0": _roster("STORM", False)}
+    timeline = [
+        {"t": 0.0, "kind": "info", "info": {"match_info": dict(base)}},
+        # Тот же враг, но другой character_id: состояние меняется, результат — нет
+        {"t": 0.1, "kind": "info", "info": {"match_info": {"roster_0": _roster("STORM", False, 1015)}}},
+        {"t": 0.2, "kind": "info", "info": {"match_info": {"roster_1": _roster("HULK", True)}}},
+        {"t": 9.0, "kind": "info", "info": {"match_info": {"banned_characters": '"[\\"Storm\\"]"'}}},
+    ]
+    timeline = with_polls(timeline, 5.0)
+
+    report = replay(timeline, _logic(), speed=0, coalesce_ms=0)
+    assert report["kinds"] == {"info": 4, "poll": 1}
+    assert report["recomputations"] == 4
+    assert report["redundant"] == 1
+    assert report["cache_hits"] == 1
+
+    # Три изменения за 200 мс сливаются в один пересчёт (не позже max_wait от первого)
+    report = replay(timeline, _logic(), speed=0, coalesce_ms=150, max_wait_ms=250)
+    assert report["state_changes"] == 4
+    assert report["recomputations"] == 2
+    assert report["redundant"] == 0
+
+
+def test_log_lines_become_cumulative_snapshots():
+    prefix = " - INFO - [main_window_refactored.py:156] - _on_overwolf_data - [OW DEBUG] DEBUG: "
+    lines = [
+        "09:31:12.978" + prefix + "updateStateFromInfo called with keys: match_info",
+        "09:31:12.979" + prefix + 'Map changed from "null" to "Arakko"',
+        "09:31:12.980" + prefix + 'Roster "roster_0" hero changed from "null" to "LOKI"',
+        "09:31:12.982" + prefix + "updateStateFromInfo returning changed=true, rosters count: 1",
+        "09:31:12.984 - INFO - [main_window_refactored.py:168] - _on_overwolf_data - [Overwolf] "
+        "Получены сырые данные. Карта: 'Arakko', Враги: ['LOKI'], Союзники: []",
+        "[09:31:20] [INFO] [RAW_BANS] Изменение сырых данных banned_characters: Storm",
+        "[09:31:20] [INFO] [DIAG] roster 'roster_1' обновлён: HULK (teammate=true)",
+    ]
+    timeline = parse_log_lines(lines)
+    assert [e["t"] for e in timeline] == [34272.978, 34280.0]
+    first = timeline[0]["info"]["match_info"]
+    assert first["map"] == "Arakko"
+    assert json.loads(first["roster_0"])["is_teammate"] is False
+    second = timeline[1]["info"]["match_info"]
+    assert second["banned_characters"] == "Storm"
+    assert json.loads(second["roster_1"]) == {"character_name": "HULK", "is_teammate": True}
@@ -0,0 +1,38 @@
+import os
+import sys
+import itertools
+
+from recognition_common import PROJECT_ROOT
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "overwolf_app", "debug"))
+
+from gep_stream import DEFAULTS, delays, generate, parse_params  # noqa: E402
+from counterpick_logic import CounterpickLogic  # noqa: E402
+from game_state_replay import GameStateMachine, replay  # noqa: E402
+
+
+def test_params_and_burst_pattern():
+    params = parse_params("pattern=burst&burst=3&interval=0.5&seed=7&unknown=1")
+    assert params == dict(DEFAULTS, pattern="burst", burst=3, interval=0.5, seed=7)
+    assert list(itertools.islice(delays("burst", 20.0, 3, 0.5), 6)) == [0.5, 0.0, 0.0, 0.5, 0.0, 0.0]
+
+
+def test_stream_is_reproducible_and_drives_the_state_machine():
+    params = dict(DEFAULTS, pattern="storm", rate=100.0, duration=3.0, seed=3)
+    events = list(generate(params))
+    assert events == list(generate(params))
+    assert all(b["t"] >= a["t"] for a, b in zip(events, events[1:]))
+
+    logic = CounterpickLogic()
+    assert logic.init()
+    machine = GameStateMachine(logic)
+    bans_seen = False
+    for event in events:
+        if machine.handle(event) and machine.banned_characters:
+            bans_seen = True
+            assert all(isinstance(b, (str, dict)) for b in machine.banned_characters)
+    assert bans_seen
+
+    report = replay(events, logic, speed=0)
+    assert report["kinds"]["event"] >= 1
+    assert 0 < report["recomputations"] < report["events"]
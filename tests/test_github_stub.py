@@ -0,0 +1,101 @@
+import os
+import sys
+import gzip
+import json
+import threading
+import http.client
+from functools import partial
+from urllib.parse import urlsplit
+
+import pytest
+
+from recognition_common import PROJECT_ROOT
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "overwolf_app", "debug"))
+
+import serve  # noqa: E402
+import github_stub  # noqa: E402
+
+LISTING = "/__github/local/api/repos/owner/repo/contents/overwolf_app/database/stats?ref=master"
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    stats = tmp_path / "database" / "stats"
+    (stats / "patches").mkdir(parents=True)
+    snapshot = json.dumps({"heroes": {"Hero": {"win_rate": "50%"}}, "teamups": []}).encode("utf-8")
+    (stats / "marvel_rivals_stats_20260101-000000.json").write_bytes(snapshot)
+    (stats / "latest.json").write_text('{"current": "marvel_rivals_stats_20260101-000000.json"}', encoding="utf-8")
+    monkeypatch.setattr(serve, "github", github_stub.GitHubStub(str(tmp_path), rate_limit=2, seed=1))
+
+    httpd = serve.DebugHTTPServer(("127.0.0.1", 0), partial(serve.DebugRequestHandler, directory=str(tmp_path)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5), snapshot
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(conn, path, **headers):
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_listing_download_and_rate_limit(server):
+    conn, snapshot = server
+    response, body = _get(conn, LISTING, **{"Accept-Encoding": "gzip"})
+    assert response.status == 200 and response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("X-RateLimit-Remaining") == "1"
+    listing = json.loads(gzip.decompress(body))
+    assert [(f["name"], f["type"]) for f in listing] == [
+        ("latest.json", "file"), ("marvel_rivals_stats_20260101-000000.json", "file"), ("patches", "dir")]
+    item = listing[1]
+    assert item["size"] == len(snapshot) and item["download_url"].endswith(item["path"])
+
+    # Как в desktop.js: к download_url дописывается ?t=...
+    response, body = _get(conn, urlsplit(item["download_url"]).path + "?t=1")
+    assert response.status == 200 and body == snapshot
+    assert response.getheader("ETag") == f'"{item["sha"]}"'
+    response, _ = _get(conn, urlsplit(item["download_url"]).path, **{"If-None-Match": f'"{item["sha"]}"'})
+    assert response.status == 304
+
+    # 304 лимит не расходует, обычный запрос — расходует, дальше 403
+    response, _ = _get(conn, LISTING, **{"If-None-Match": 'W/"stale"'})
+    assert response.status == 200 and response.getheader("X-RateLimit-Remaining") == "0"
+    response, body = _get(conn, LISTING, **{"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304
+    response, body = _get(conn, LISTING)
+    assert response.status == 403 and "rate limit" in json.loads(body)["message"]
+
+
+def test_lossy_profile_truncates_body(server, monkeypatch):
+    conn, snapshot = server
+    monkeypatch.setitem(github_stub.NETWORK_PROFILES, "lossy",
+                        {"latency": 0.0, "bandwidth": None, "loss": 1.0})
+    path = "/__github/lossy/raw/owner/repo/master/overwolf_app/database/stats/marvel_rivals_stats_20260101-000000.json"
+    conn.request("GET", path)
+    response = conn.getresponse()
+    assert response.status == 200
+    with pytest.raises(http.client.IncompleteRead):
+        response.read()
+
+    conn.close()
+    response, body = _get(conn, "/__github/nope/api")
+    assert response.status == 404 and "profiles" in json.loads(body)
+
+
+def test_head_is_routed_like_get(server):
+    conn, snapshot = server
+    raw = "/__github/local/raw/owner/repo/master/overwolf_app/database/stats/marvel_rivals_stats_20260101-000000.json"
+    conn.request("HEAD", raw)
+    response = conn.getresponse()
+    assert response.status == 200 and response.read() == b""
+    assert response.getheader("Content-Length") == str(len(snapshot)) and response.getheader("ETag")
+
+    # Потоки SSE на HEAD не открываются; соединение остаётся рабочим
+    for path in (serve.GEP_STREAM_PATH, serve.LIVERELOAD_PATH):
+        conn.request("HEAD", path)
+        response = conn.getresponse()
+        assert response.status == 405 and response.getheader("Allow") == "GET" and response.read() == b""
+    response, body = _get(conn, raw)
+    assert response.status == 200 and body == snapshot
@@ -0,0 +1,31 @@
+import os
+import sys
+import json
+
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "build_scripts"))
+
+from build_icon_atlas import build_atlas  # noqa: E402
+
+
+def test_atlas_index_points_at_each_icon(tmp_path):
+    icons = tmp_path / "icons"
+    icons.mkdir()
+    colors = {"hulk": (0, 200, 0), "loki": (0, 0, 200), "storm": (200, 200, 200), "thor": (200, 0, 0),
+              "venom": (20, 20, 20)}
+    for name, color in colors.items():
+        Image.new("RGBA", (300, 300), color + (255,)).save(icons / f"{name}.png")
+
+    index = build_atlas(str(icons), str(tmp_path / "atlas"), cell=32)
+    assert (index["columns"], index["rows"]) == (3, 2)
+    assert json.loads((tmp_path / "atlas" / "heroes.json").read_text(encoding="utf-8")) == index
+
+    with Image.open(tmp_path / "atlas" / index["image"]) as atlas:
+        assert atlas.size == (3 * 32, 2 * 32)
+        rgb = atlas.convert("RGB")
+        for name, (col, row) in index["icons"].items():
+            # Центр ячейки — цвет своей иконки (WebP с потерями, поэтому с допуском)
+            pixel = rgb.getpixel((col * 32 + 16, row * 32 + 16))
+            assert all(abs(a - b) < 24 for a, b in zip(pixel, colors[name])), name
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import queue
+
+import pytest
+
+from recognition_common import PROJECT_ROOT
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "overwolf_app", "debug"))
+
+from livereload import ChangeWatcher, LiveReloadHub, classify  # noqa: E402
+
+
+def test_classify_and_hub_publish():
+    assert classify("debug/debug-panel.css") == "css"
+    assert classify("database/stats/latest.json") == "db"
+    assert classify("windows/desktop/desktop.js") == "page"
+    assert classify("resources/atlas/heroes.json") == "page"
+
+    hub = LiveReloadHub()
+    q = queue.Queue()
+    hub._subscribers.append(q)
+    hub.publish(["database/game_entities_dict.json", "logic.js"])
+    assert q.get_nowait() == {"files": [{"path": "database/game_entities_dict.json", "kind": "db"},
+                                        {"path": "logic.js", "kind": "page"}]}
+
+
+@pytest.mark.parametrize("use_inotify", [True, False], ids=["inotify", "polling"])
+def test_watcher_reports_changes_in_batches(tmp_path, use_inotify):
+    (tmp_path / "windows").mkdir()
+    style = tmp_path / "windows" / "style.css"
+    style.write_text("a {}", encoding="utf-8")
+
+    batches = queue.Queue()
+    watcher = ChangeWatcher(str(tmp_path), batches.put, debounce=0.2, interval=0.05, use_inotify=use_inotify)
+    if use_inotify and watcher.backend != "inotify":
+        pytest.skip("inotify недоступен")
+    watcher.start()
+    try:
+        # Поток опроса сначала снимает исходное состояние
+        time.sleep(0.2)
+        style.write_text("a { color: red }", encoding="utf-8")
+        (tmp_path / "windows" / "style.css.gz").write_bytes(b"")  # предсжатые соседи игнорируются
+        (tmp_path / "database").mkdir()
+        (tmp_path / "database" / "latest.json").write_text("{}", encoding="utf-8")
+
+        seen = set()
+        while seen != {"windows/style.css", "database/latest.json"}:
+            seen.update(batches.get(timeout=3))
+    finally:
+        watcher.stop()
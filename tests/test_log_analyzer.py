@@ -0,0 +1,90 @@
+import os
+
+from log_analyzer import DAY_S, LogIndex, parse_time
+
+APP_LOG = [
+    "23:59:58.000 - INFO - [main.py:10] - <module> - [Main] Старт",
+    "23:59:59.500 - WARNING - [logic.py:126] - set_map_by_name - [Logic] ВНИМАНИЕ: карта не распознана",
+    "Traceback (most recent call last):",
+    '  File "logic.py", line 126',
+    '00:00:01.000 - INFO - [main_window_refactored.py:156] - _on_overwolf_data - [OW DEBUG] DEBUG: Map changed from "null" to "Arakko"',
+    '00:00:01.250 - INFO - [main_window_refactored.py:156] - _on_overwolf_data - [OW DEBUG] DEBUG: Roster "roster_0" hero changed from "null" to "STORM"',
+    "00:00:01.300 - INFO - [heroes_bd.py:158] - calculate_team_counters - [DB] calculate_team_counters: рассчитаны очки для 50 героев",
+]
+
+OVERLAY_LOG = [
+    "[10:48:39] [INFO] [EVENT] match_start получен.",
+    "[10:48:39] [INFO] [MATCH] НАЧАЛО НОВОГО МАТЧА (m1) — очищаем трей 1 раз.",
+    "[10:48:40] [INFO] [DIAG] roster 'roster_3' пришёл пустым (null/\"\"), оставляем старое значение. match_id=m1",
+    "[10:48:43] [INFO] [DIAG] roster 'roster_3' обновлён: STORM (teammate=false)",
+    "[10:48:44] [ERROR] [API_ERROR] getRunningGameInfo: пустой ответ",
+]
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_index_queries_rollover_and_incremental_update(tmp_path):
+    log = tmp_path / "app.log"
+    _write(log, APP_LOG)
+    index = LogIndex.open(str(log))
+    assert index.format == "app_log" and index.records == 5
+    assert index.counts["level:WARNING"] == 1 and index.counts["tag:OW DEBUG"] == 2
+    assert os.path.isfile(str(log) + ".idx")
+
+    # Запись с traceback целиком; после полуночи — следующий день
+    warning, = index.query(level="warning")
+    assert warning.text.endswith('line 126') and warning.tags == ("Logic",)
+    after_midnight = list(index.query(since=parse_time("1+00:00", True), source="main_window_refactored.py"))
+    assert [r.t for r in after_midnight] == [86401.0, 86401.25]
+    assert [r.offset for r in index.query(tags=("OW DEBUG",), pattern="Roster")] == [after_midnight[1].offset]
+
+    timings = index.timings()
+    assert [s["seconds"] for s in timings["match_start_to_first_roster"]["spans"]] == [0.25]
+    assert [s["seconds"] for s in timings["first_roster_to_counters"]["spans"]] == [0.05]
+    assert index.stats()["longest_gaps"][0]["seconds"] == 1.5
+
+    # Дописанный хвост индексируется без перечитывания начала; недописанная строка — потом
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("00:00:02.000 - ERROR - [server.py:5] - send - [OverwolfServer] ошибка\n00:00:03")
+    reloaded = LogIndex.open(str(log))
+    assert reloaded.records == 6 and reloaded.counts["file:server.py"] == 1
+    assert reloaded.size == os.path.getsize(log) - len("00:00:03")
+
+    # Лог переписан (ротация) — индекс строится заново
+    _write(log, APP_LOG[:1])
+    assert LogIndex.open(str(log)).records == 1
+
+
+def test_overlay_log_tags_and_timings(tmp_path):
+    log = tmp_path / "overlay_logs.txt"
+    _write(log, OVERLAY_LOG)
+    index = LogIndex.open(str(log))
+    assert index.format == "overlay"
+    assert [r.text for r in index.query(tags=("API_ERROR",))] == [OVERLAY_LOG[-1]]
+    assert len(list(index.query(tags=("DIAG",), since=parse_time("10:48:41", True)))) == 1
+
+    timings = index.timings()["match_start_to_first_roster"]
+    assert timings["count"] == 1 and timings["spans"][0]["seconds"] == 4.0
+    assert index.bursts(window=10, min_count=1)[0]["levels"] == {"ERROR": 1}
+
+
+def test_long_gap_inside_one_block_keeps_the_day(tmp_path):
+    # Одна сессия: 01:00 и 14:00 в одном блоке индекса — это тот же день, не вчерашний
+    log = tmp_path / "app.log"
+    lines = [f"{hh}:00:0{i}.000 - INFO - [logic.py:10] - f - [MATCH] запись {hh}-{i}"
+             for hh in ("01", "14") for i in range(5)]
+    _write(log, lines)
+    index = LogIndex.open(str(log))
+    times = [r.t for r in index.query(tags=("MATCH",))]
+    assert times == [3600.0 + i for i in range(5)] + [50400.0 + i for i in range(5)]
+    assert len(list(index.query(tags=("MATCH",), since=parse_time("13:00", True)))) == 5
+
+    # Переход через полночь после паузы — по-прежнему следующий день, в том числе после перезагрузки индекса
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("00:30:00.000 - INFO - [logic.py:10] - f - [MATCH] после полуночи\n")
+    reloaded = LogIndex.open(str(log))
+    last = list(reloaded.query(tags=("MATCH",), since=parse_time("1+00:00", True)))
+    assert [r.t for r in last] == [DAY_S + 1800.0]
+    assert [r.t for r in LogIndex.load(str(log)).scan()][4:6] == [3604.0, 50400.0]
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+from PIL import Image
+
+from map_recognizer import MAPS_DIR, MapRecognizer, fuzzy_match, load_map_vocabulary
+
+
+@pytest.fixture(scope="module")
+def recognizer():
+    return MapRecognizer()
+
+
+def test_vocabulary_has_no_case_duplicates():
+    vocabulary = load_map_vocabulary()
+    keys = [name.lower() for name in vocabulary]
+    assert len(keys) == len(set(keys))
+    assert "UNKNOWN" not in vocabulary
+
+
+def test_fuzzy_match_tolerates_ocr_errors():
+    vocabulary = load_map_vocabulary()
+    assert fuzzy_match("YGGDRASIL PAT", vocabulary)[0] == "Yggdrasill Path"
+    assert fuzzy_match("spider islands", vocabulary)[0] == "Spider-Islands"
+    assert fuzzy_match("lorem ipsum", vocabulary) is None
+
+
+def test_rescaled_banner_matches_its_template(recognizer):
+    path = os.path.join(MAPS_DIR, "KRAKOA.png")
+    region = Image.open(path).convert("RGB").resize((250, 104))
+    result = recognizer.recognize(region, use_ocr=False)
+    assert result["map"] == "Krakoa"
+    assert result["method"] == "template"
+
+
+def test_unrelated_region_is_not_forced_to_a_map(recognizer):
+    region = Image.new("RGB", (300, 100), (10, 200, 10))
+    assert recognizer.recognize(region, use_ocr=False)["map"] is None
+
+
+def test_banner_is_found_inside_wider_capture(recognizer):
+    # Захват 1/3 x 1/10 экрана 1920x1080: баннер занимает только его часть
+    capture = Image.new("RGB", (640, 108), (24, 28, 36))
+    banner = Image.open(os.path.join(MAPS_DIR, "KRAKOA.png")).convert("RGB").resize((187, 78))
+    capture.paste(banner, (30, 15))
+    result = recognizer.recognize(capture, use_ocr=False)
+    assert result["map"] == "Krakoa"
+    assert result["method"] == "template"
+
+    left, top, right, bottom = recognizer.locate(capture)[0]
+    assert abs(left - 30) <= 12 and abs(top - 15) <= 12 and abs(right - left - 187) <= 30
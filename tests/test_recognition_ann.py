@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from recognition_ann import IVFIndex, exact_search, measure_recall
+
+
+def _clustered(n_heroes=55, per_hero=40, dim=64, seed=0):
+    """Эталоны «героев»: по per_hero зашумлённых вариантов вокруг центра."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_heroes, dim))
+    vectors = np.repeat(centers, per_hero, axis=0) + 0.3 * rng.normal(size=(n_heroes * per_hero, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    labels = np.repeat(np.arange(n_heroes), per_hero)
+    queries = centers[rng.integers(0, n_heroes, 500)] + 0.3 * rng.normal(size=(500, dim))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors.astype(np.float32), labels, queries.astype(np.float32)
+
+
+def test_probing_all_lists_equals_exact_search():
+    vectors, _, queries = _clustered(n_heroes=10, per_hero=20)
+    index = IVFIndex(vectors, n_lists=8)
+    idx, score = index.search(queries, n_probe=8)
+    exact_idx, exact_score = exact_search(queries, vectors)
+    np.testing.assert_array_equal(idx, exact_idx)
+    np.testing.assert_allclose(score, exact_score, rtol=1e-5)
+
+
+def test_few_probes_keep_hero_recall_and_scan_a_fraction():
+    vectors, labels, queries = _clustered()
+    index = IVFIndex(vectors)
+    result = measure_recall(index, queries, vectors, labels, n_probe=4)
+    assert result["scanned"] < 0.15
+    assert result["label_recall"] > 0.98
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from recognition_common import HERO_SQUARE_SIZE, STEP_SIZE, REFERENCES_FILE, plan_windows
+from recognition_pipeline import StagedRecognizer
+
+
+def test_plan_keeps_window_count_independent_of_resolution():
+    assert plan_windows(1920, 1080)["window"] == HERO_SQUARE_SIZE
+    assert plan_windows(1920, 1080)["step"] == STEP_SIZE
+    assert plan_windows(3840, 2160)["window"] == 2 * HERO_SQUARE_SIZE
+    assert plan_windows(2560, 1440)["scale"] == 1440
+    assert plan_windows(3440, 1440)["scale"] == 1440
+    assert plan_windows(1600, 900)["scale"] == 1080
+
+
+def test_references_follow_the_screen_scale(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    np.savez(tmp_path / REFERENCES_FILE, vectors=vectors,
+             names=np.array(["hela", "hela", "loki", "loki"]),
+             scales=np.array([1080, 2160, 1080, 2160]))
+    recognizer = StagedRecognizer(embeddings_dir=str(tmp_path), batch_size=8, session_options={})
+    assert recognizer.load_embeddings()
+    assert recognizer.hero_names == ["Hela", "Loki"]
+    np.testing.assert_array_equal(recognizer.ref_embeddings, vectors[[0, 2]])
+
+    recognizer.configure(3840, 2160)
+    np.testing.assert_array_equal(recognizer.ref_embeddings, vectors[[1, 3]])
+    assert recognizer.window_size() == (2 * HERO_SQUARE_SIZE, 2 * HERO_SQUARE_SIZE // 4)
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from recognition_postprocess import (
+    box_iou_batch, greedy_nms, batched_nms, top_k_per_image, postprocess,
+    split_by_image, non_max_suppression,
+)
+
+
+def _reference_nms(boxes, scores, iou_threshold=0.4):
+    """Исходная реализация из check_recognition.py (полная матрица IoU + цикл)."""
+    order = np.argsort(-scores, kind="stable")
+    b = boxes[order]
+    ious = box_iou_batch(b, b)
+    np.fill_diagonal(ious, 0)
+    keep, suppressed = [], np.zeros(len(b), dtype=bool)
+    for i in range(len(b)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed[ious[i] > iou_threshold] = True
+    return np.array(keep)
+
+
+def _random_boxes(rng, n, size=95):
+    xy = rng.integers(0, 300, size=(n, 2)).astype(np.float32)
+    return np.concatenate([xy, xy + size], axis=1), rng.random(n).astype(np.float32)
+
+
+def test_greedy_nms_matches_reference():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        boxes, scores = _random_boxes(rng, 60)
+        assert greedy_nms(boxes, scores).tolist() == _reference_nms(boxes, scores).tolist()
+
+
+def test_batched_nms_keeps_groups_independent():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11]], dtype=np.float32)
+    scores = np.array([0.9, 0.8])
+    assert sorted(batched_nms(boxes, scores, labels=np.array([0, 0])).tolist()) == [0]
+    assert sorted(batched_nms(boxes, scores, labels=np.array([0, 1])).tolist()) == [0, 1]
+    assert sorted(batched_nms(boxes, scores, image_ids=np.array([0, 1]), class_agnostic=True).tolist()) == [0, 1]
+
+
+def test_top_k_per_image():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+    ids = np.array([0, 0, 0, 1, 1])
+    assert top_k_per_image(scores, ids, 2).tolist() == [1, 2, 3, 4]
+
+
+def test_postprocess_threshold_dedupe_and_split():
+    boxes = np.array([
+        [0, 0, 95, 95], [200, 0, 295, 95], [400, 0, 495, 95],  # изображение 0
+        [0, 0, 95, 95], [10, 0, 105, 95],                       # изображение 1, пересекаются
+    ], dtype=np.float32)
+    scores = np.array([0.95, 0.80, 0.50, 0.90, 0.85])
+    labels = np.array([3, 3, 4, 1, 2])
+    ids = np.array([0, 0, 0, 1, 1])
+    keep = postprocess(boxes, scores, labels, ids, confidence_threshold=0.7, max_per_image=6)
+    per_image = split_by_image(keep, ids, 2)
+    # герой 3 встречается дважды — остаётся лучший; 0.50 ниже порога
+    assert per_image[0].tolist() == [0]
+    # перекрывающееся окно с другим героем гасится (NMS без разделения классов)
+    assert per_image[1].tolist() == [3]
+
+
+def test_dict_interface_is_preserved():
+    dets = [
+        {'hero': 'A', 'confidence': 0.8, 'position': (0, 0), 'size': (95, 95)},
+        {'hero': 'B', 'confidence': 0.9, 'position': (5, 5), 'size': (95, 95)},
+        {'hero': 'C', 'confidence': 0.7, 'position': (300, 0), 'size': (95, 95)},
+    ]
+    assert [d['hero'] for d in non_max_suppression(dets)] == ['B', 'C']
+    assert non_max_suppression([]) == []
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper
+
+from recognition_session import create_session, dummy_input
+
+
+def _tiny_model(path, scale=2.0):
+    """y = x * scale + 0: Mul и Add, которые оптимизатор может свернуть."""
+    graph = helper.make_graph(
+        [helper.make_node("Mul", ["x", "s"], ["m"]), helper.make_node("Add", ["m", "z"], ["y"])],
+        "tiny",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 4])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 4])],
+        initializer=[helper.make_tensor("s", TensorProto.FLOAT, [1], [scale]),
+                     helper.make_tensor("z", TensorProto.FLOAT, [1], [0.0])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def _run(session):
+    name, x = dummy_input(session, batch=2)
+    return session.run(None, {name: x + 1.0})[0]
+
+
+def test_optimized_graph_is_cached_reused_and_invalidated(tmp_path):
+    model, cache = tmp_path / "model.onnx", tmp_path / "cache"
+    _tiny_model(model)
+
+    stats = {}
+    assert _run(create_session(str(model), cache_dir=str(cache), stats=stats)).tolist() == [[2.0] * 4] * 2
+    assert stats["cache_hit"] is False
+    files = os.listdir(cache)
+    # Записан только готовый файл — временный переименован атомарно
+    assert len(files) == 1 and files[0].endswith(".opt.onnx")
+
+    stats = {}
+    assert _run(create_session(str(model), cache_dir=str(cache), stats=stats)).tolist() == [[2.0] * 4] * 2
+    assert stats["cache_hit"] is True and os.listdir(cache) == files
+
+    # Модель заменили — старый граф не используется, строится новый
+    _tiny_model(model, scale=3.0)
+    st = os.stat(model)
+    os.utime(model, (st.st_atime, st.st_mtime + 10))
+    stats = {}
+    assert _run(create_session(str(model), cache_dir=str(cache), stats=stats)).tolist() == [[3.0] * 4] * 2
+    assert stats["cache_hit"] is False and len(os.listdir(cache)) == 2
+    assert not [f for f in os.listdir(cache) if f.endswith(".tmp")]
+
+
+def test_cache_can_be_disabled(tmp_path):
+    model = tmp_path / "model.onnx"
+    _tiny_model(model)
+    stats = {}
+    create_session(str(model), cache_dir=None, stats=stats)
+    assert stats["cache_hit"] is False and os.listdir(tmp_path) == ["model.onnx"]
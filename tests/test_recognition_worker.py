@@ -0,0 +1,87 @@
+import time
+import queue
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from recognition_worker import READY, RecognitionWorker, SharedFrameRing, latency_report, worker_main
+
+
+def mean_color_handler():
+    """Лёгкий обработчик вместо модели: «детекция» — средний цвет кадра."""
+    def handle(frame):
+        return [{"hero": "mean", "confidence": float(frame.mean()), "position": (0, 0), "size": frame.shape[:2]}]
+    return handle
+
+
+def test_frames_are_recognized_in_worker_process():
+    shape = (8, 8, 3)
+    with RecognitionWorker(shape, capacity=4, handler_factory=mean_color_handler) as worker:
+        results = []
+        for value in (10, 20, 30):
+            seq = worker.ring.push(np.full(shape, value, dtype=np.uint8))
+            worker.submit(seq)
+            # Ждём результат, чтобы воркер не пропустил кадр как устаревший
+            deadline = time.monotonic() + 10
+            while len(results) <= seq and time.monotonic() < deadline:
+                results.extend(worker.poll(timeout=0.1))
+        results.extend(worker.stop())
+
+    assert [r["seq"] for r in results] == [0, 1, 2]
+    assert [r["detections"][0]["confidence"] for r in results] == [10.0, 20.0, 30.0]
+    report = latency_report(results, captured=3)
+    assert report["processed"] == 3
+    assert report["end_to_end_ms"]["count"] == 3
+
+
+def broken_handler():
+    raise RuntimeError("нет модели")
+
+
+def test_handler_factory_error_is_reported_by_start():
+    # Фабрика падает в воркере: start() сразу сообщает причину, а не ждёт таймаута
+    worker = RecognitionWorker((4, 4, 3), capacity=2, handler_factory=broken_handler)
+    with pytest.raises(RuntimeError, match="нет модели"):
+        worker.start(timeout=30)
+    assert not worker.process.is_alive()
+
+
+def _run_worker(ring, factory, seq):
+    """worker_main в потоке текущего процесса: один запрос, затем остановка."""
+    requests, results = queue.Queue(), queue.Queue()
+    thread = threading.Thread(target=worker_main, args=(ring.name, ring.capacity, ring.shape, requests, results, factory))
+    thread.start()
+    assert results.get(timeout=10) == READY
+    requests.put((seq, 0.0))
+    result = results.get(timeout=10)
+    requests.put(None)
+    thread.join(timeout=10)
+    return result
+
+
+def test_frame_overwritten_during_inference_is_torn():
+    shape = (4, 4, 3)
+    ring = SharedFrameRing(2, shape)
+    try:
+        for value in (10, 20):
+            ring.push(np.full(shape, value, dtype=np.uint8))
+
+        def overwriting_handler():
+            def handle(frame):
+                # Писатель заходит в слот кадра 0 посреди инференса и не успевает commit()
+                ring.next_slot()[:] = 99
+                return [{"hero": "mean", "confidence": float(frame.mean())}]
+            return handle
+
+        assert _run_worker(ring, overwriting_handler, 0)["torn"]
+        assert not _run_worker(ring, mean_color_handler, 1)["torn"]
+
+        # Слот, который уже начали перезаписывать, не обрабатывается вовсе
+        ring.commit()
+        ring.next_slot()
+        result = _run_worker(ring, mean_color_handler, 1)
+        assert result["torn"] and result["detections"] == []
+    finally:
+        ring.close()
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from PIL import Image
+
+from recognition_common import recognition_box
+from recognition_pipeline import StagedRecognizer
+from roi_cache import load_roi
+
+
+def _screenshot(path, color=(0, 0, 0)):
+    img = Image.new("RGB", (400, 200), color)
+    img.putpixel((250, 60), (255, 0, 0))
+    img.save(path)
+    return str(path)
+
+
+def test_roi_matches_crop_and_is_memory_mapped(tmp_path):
+    path = _screenshot(tmp_path / "shot.png")
+    roi, size = load_roi(path, cache_dir=str(tmp_path / "cache"))
+    expected = np.asarray(Image.open(path).convert("RGB").crop(recognition_box(400, 200)))
+    assert size == (400, 200)
+    np.testing.assert_array_equal(roi, expected)
+    assert isinstance(roi, np.memmap)
+    assert not roi.flags.writeable
+
+
+def test_cache_key_depends_on_content_and_area(tmp_path):
+    cache = str(tmp_path / "cache")
+    path = _screenshot(tmp_path / "shot.png")
+    load_roi(path, cache_dir=cache)
+    load_roi(path, cache_dir=cache)
+    assert len(os.listdir(cache)) == 1
+
+    load_roi(path, area={'left_pct': 0, 'top_pct': 0, 'width_pct': 10, 'height_pct': 10}, cache_dir=cache)
+    _screenshot(tmp_path / "shot.png", color=(9, 9, 9))
+    os.utime(path, ns=(1, 1))
+    roi, _ = load_roi(path, cache_dir=cache)
+    assert len(os.listdir(cache)) == 3
+    assert roi[0, 0, 0] == 9
+
+
+def test_cached_roi_equals_uncached_crop_stage(tmp_path):
+    # check_recognition раньше обрезал декодированный кадр сам; кэш должен давать
+    # те же пиксели: та же recognition_box (с округлением на нечётных размерах)
+    # и RGB, даже если PNG сохранён с альфа-каналом
+    pixels = np.random.default_rng(0).integers(0, 256, (563, 1001, 4), dtype=np.uint8)
+    path = tmp_path / "shot.png"
+    Image.fromarray(pixels, "RGBA").save(path)
+
+    roi, _ = load_roi(str(path), cache_dir=str(tmp_path / "cache"))
+    cached, _ = load_roi(str(path), cache_dir=str(tmp_path / "cache"))
+    with Image.open(path) as img:
+        expected = np.asarray(StagedRecognizer(batch_size=1, session_options={}).crop(img.convert("RGB")))
+    np.testing.assert_array_equal(roi, expected)
+    np.testing.assert_array_equal(cached, expected)
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import gzip
+
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "build_scripts"))
+
+import build_static_bundle  # noqa: E402
+from build_db_patches import apply_patch, build_patch, sha256  # noqa: E402
+from build_static_bundle import HERO_ICON_SIZE, minify_json, normalize_numbers, process_asset  # noqa: E402
+
+
+def test_numbers_are_normalized_without_changing_parsed_values():
+    data = {"win_rate": "50.00%", "difference": "-0.004%", "d2": "26.460%", "d3": "100.0%",
+            "matches": "1,890", "tier": "S"}
+    assert normalize_numbers(data) == {"win_rate": "50%", "difference": "-0.004%", "d2": "26.46%", "d3": "100%",
+                                       "matches": "1,890", "tier": "S"}
+    assert minify_json(json.dumps({"a": ["1.50%"]}, indent=2).encode()) == b'{"a":["1.5%"]}'
+
+
+def test_bundled_base_keeps_patch_hashes():
+    old = {"heroes": {"Hulk": {"win_rate": "50.00%", "opponents": [{"opponent": "Storm", "difference": "-1.250%"}]}}}
+    new = json.loads(json.dumps(old))
+    new["heroes"]["Hulk"]["opponents"][0]["difference"] = "2.10%"
+    patch, _ = build_patch("old.json", old, "new.json", new)
+
+    bundled = json.loads(minify_json(json.dumps(old).encode()))
+    assert bundled != old and sha256(bundled) == patch["from_sha256"]
+    # Патч накладывается на встроенную (нормализованную) базу и сходится по хэшу
+    assert sha256(apply_patch(bundled, patch)) == patch["to_sha256"]
+
+
+def test_assets_are_reproducible_and_resized(tmp_path, monkeypatch):
+    app = tmp_path / "app"
+    (app / "database").mkdir(parents=True)
+    (app / "resources" / "heroes_icons").mkdir(parents=True)
+    (app / "database" / "stats.json").write_text(json.dumps({"heroes": {"Hulk": {"win_rate": "50.00%"}}} | {
+        f"pad{i}": "x" * 40 for i in range(20)}, indent=2), encoding="utf-8")
+    Image.new("RGBA", (300, 300), (200, 40, 40, 255)).save(app / "resources" / "heroes_icons" / "hulk.png")
+    monkeypatch.setattr(build_static_bundle, "APP_DIR", str(app))
+
+    results = []
+    for run in ("a", "b"):
+        out = str(tmp_path / run)
+        results.append((process_asset(("json", os.path.join("database", "stats.json"), out)),
+                        process_asset(("hero_icon", os.path.join("resources", "heroes_icons", "hulk.png"), out))))
+    assert results[0] == results[1]
+
+    stats, icon = results[0]
+    assert stats["encodings"]["gzip"]["path"] == "database/stats.json.gz"
+    with open(tmp_path / "a" / "database" / "stats.json.gz", "rb") as f:
+        assert gzip.decompress(f.read()) == (tmp_path / "a" / "database" / "stats.json").read_bytes()
+    assert icon["path"] == "resources/heroes_icons/hulk.webp"
+    with Image.open(tmp_path / "a" / icon["path"]) as image:
+        assert image.size == (HERO_ICON_SIZE, HERO_ICON_SIZE)
@@ -0,0 +1,35 @@
+import json
+
+from recognition_common import load_tuned_config, machine_signature
+from tune_recognition import thread_candidates, session_configs
+
+
+def _write(path, machine):
+    path.write_text(json.dumps({"machine": machine, "batch_size": 16,
+                                "session_options": {"intra_op_threads": 2}}), encoding="utf-8")
+    return str(path)
+
+
+def test_thread_candidates_are_capped_by_cpu_count():
+    assert thread_candidates(1) == [1]
+    assert thread_candidates(8) == [1, 2, 4, 8]
+    assert thread_candidates(6) == [1, 2, 3, 4, 6]
+
+
+def test_inter_op_threads_only_in_parallel_mode():
+    for cfg in session_configs(8):
+        if cfg["execution_mode"] == "sequential":
+            assert cfg["inter_op_threads"] == 1
+        else:
+            assert cfg["inter_op_threads"] > 1
+
+
+def test_tuned_config_is_loaded_on_same_machine(tmp_path):
+    path = _write(tmp_path / "tuning.json", machine_signature())
+    assert load_tuned_config(path)["batch_size"] == 16
+
+
+def test_tuned_config_from_other_machine_is_ignored(tmp_path):
+    other = dict(machine_signature(), cpu_count=-1)
+    assert load_tuned_config(_write(tmp_path / "tuning.json", other)) == {}
+    assert load_tuned_config(str(tmp_path / "missing.json")) == {}
@@ -0,0 +1,151 @@
+"""
+Подбор размера батча и потоков onnxruntime под текущую машину.
+
+Перебирает размеры батча, intra_op/inter_op потоки и режим исполнения на
+окнах, нарезанных из скриншотов драфта, и сохраняет самую быструю
+конфигурацию в TUNING_FILE. StagedRecognizer подхватывает её
+автоматически (если batch_size/session_options не заданы явно).
+
+Примеры:
+    python tests/tune_recognition.py
+    python tests/tune_recognition.py --quick
+    python tests/tune_recognition.py --screenshots screenshots --limit 2 --repeats 5
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, List
+
+from recognition_common import (
+    MODEL_PATH, SCREENSHOTS_DIR, BUNDLED_SCREENSHOTS_DIR, TUNING_FILE,
+    BATCH_SIZE_SLIDING_WINDOW_DINO, machine_signature,
+)
+
+BATCH_SIZES = [8, 16, 32, 64]
+QUICK_BATCH_SIZES = [16, 32]
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("recognition_tuner")
+
+
+def thread_candidates(cpu_count: int, quick: bool = False) -> List[int]:
+    """1, 2, 4, половина и все ядра — без повторов и не больше cpu_count."""
+    values = [1, 2, 4, cpu_count // 2, cpu_count] if not quick else [cpu_count // 2, cpu_count]
+    return sorted({v for v in values if 1 <= v <= cpu_count})
+
+
+def session_configs(cpu_count: int, quick: bool = False) -> List[Dict]:
+    """Сетка настроек сессии. inter_op имеет смысл только в параллельном режиме."""
+    configs = []
+    for intra in thread_candidates(cpu_count, quick):
+        configs.append({"intra_op_threads": intra, "inter_op_threads": 1, "execution_mode": "sequential"})
+        if quick:
+            continue
+        for inter in sorted({2, max(cpu_count // intra, 1)}):
+            if inter > 1:
+                configs.append({"intra_op_threads": intra, "inter_op_threads": inter, "execution_mode": "parallel"})
+    return configs
+
+
+def collect_windows(recognizer, screenshots: List[str]):
+    """Окна со всех скриншотов одним массивом — их нарезка в замер не входит."""
+    import numpy as np
+    batches = [recognizer.make_windows(recognizer.crop(recognizer.load_image(p)))[0] for p in screenshots]
+    return np.concatenate(batches)
+
+
+def time_config(recognizer, windows, batch_size: int, repeats: int) -> Dict:
+    recognizer.batch_size = batch_size
+    recognizer.infer(windows[:batch_size])  # прогрев под этот размер батча
+    samples = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        recognizer.infer(windows)
+        samples.append(time.perf_counter() - t)
+    best = min(samples)
+    return {
+        "batch_size": batch_size,
+        "best_s": round(best, 4),
+        "mean_s": round(sum(samples) / len(samples), 4),
+        "windows_per_s": round(len(windows) / best, 2) if best else 0.0,
+    }
+
+
+def tune(screenshots: List[str], model_path: str, batch_sizes: List[int], configs: List[Dict],
+         repeats: int) -> Dict:
+    from recognition_pipeline import StagedRecognizer
+
+    results = []
+    windows = None
+    for cfg in configs:
+        recognizer = StagedRecognizer(model_path=model_path, batch_size=BATCH_SIZE_SLIDING_WINDOW_DINO,
+                                      session_options=cfg)
+        if not recognizer.load_model():
+            raise RuntimeError(f"Не удалось загрузить модель: {model_path}")
+        if windows is None:
+            windows = collect_windows(recognizer, screenshots)
+            logger.info(f"Окон для замера: {len(windows)} из {len(screenshots)} скриншотов")
+        for bs in batch_sizes:
+            entry = {"session_options": cfg, **time_config(recognizer, windows, bs, repeats)}
+            results.append(entry)
+            logger.info(f"batch={bs:<3} intra={cfg['intra_op_threads']:<2} inter={cfg['inter_op_threads']:<2} "
+                        f"{cfg['execution_mode']:<10} -> {entry['windows_per_s']:.1f} окон/с")
+
+    results.sort(key=lambda r: r["windows_per_s"], reverse=True)
+    best = results[0]
+    import onnxruntime
+    return {
+        "machine": machine_signature(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "onnxruntime": onnxruntime.__version__,
+        "batch_size": best["batch_size"],
+        "session_options": best["session_options"],
+        "windows_per_s": best["windows_per_s"],
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Подбор batch size и потоков onnxruntime для распознавания")
+    parser.add_argument("--screenshots", default=None,
+                        help="Папка со скриншотами (по умолчанию тестовые, иначе screenshots/ из репозитория)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=TUNING_FILE, help="Куда сохранить лучшую конфигурацию")
+    parser.add_argument("--repeats", type=int, default=3, help="Замеров на конфигурацию (берётся лучший)")
+    parser.add_argument("--limit", type=int, default=3, help="Сколько скриншотов использовать")
+    parser.add_argument("--quick", action="store_true", help="Урезанная сетка для быстрой проверки")
+    args = parser.parse_args(argv)
+
+    directory = args.screenshots
+    if directory is None:
+        directory = SCREENSHOTS_DIR if os.path.isdir(SCREENSHOTS_DIR) else BUNDLED_SCREENSHOTS_DIR
+    screenshots = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                         if f.lower().endswith(".png"))[:args.limit]
+    if not screenshots:
+        logger.error(f"В {directory} нет скриншотов")
+        return 2
+
+    cpu_count = os.cpu_count() or 1
+    batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    configs = session_configs(cpu_count, args.quick)
+    logger.info(f"CPU: {cpu_count}, конфигураций: {len(configs) * len(batch_sizes)}")
+
+    report = tune(screenshots, args.model, batch_sizes, configs, args.repeats)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    opts = report["session_options"]
+    logger.info(f"Лучшая конфигурация: batch={report['batch_size']}, intra={opts['intra_op_threads']}, "
+                f"inter={opts['inter_op_threads']}, {opts['execution_mode']} "
+                f"({report['windows_per_s']:.1f} окон/с)")
+    logger.info(f"Сохранено: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())